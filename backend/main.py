@@ -10,25 +10,97 @@ import numpy as np
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from sdr.pluto_driver import PlutoDriver, PlutoConfig
-from sdr.signal_processor import SignalProcessor
+from sdr.signal_processor import SignalProcessor, pool_spectrum, POOLING_MODES
 from sdr.sdr_manager import get_sdr_manager
+from sdr.spectrum_codec import QUANTIZATION, SpectrumEncoder
+from sdr.waterfall import WaterfallHistory
+from sdr.rx_pipeline import RxPipeline, RxBuffer
 
 
 # ============ WebSocket 管理器 ============
 class ConnectionManager:
+    # 未订阅的客户端: JSON，约 1/10 点数的最大值降点，30 帧/秒
+    DEFAULT_SPECTRUM = {"format": "json", "dtype": None, "bins": None, "pooling": "max", "fps": 30.0}
+    MAX_FPS = 60.0
+
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # 客户端频谱订阅 -> {"format", "dtype", "bins", "pooling", "fps",
+        #                   "axis_ids": {device_id: 已发送的 axis_id}, "sent": {device_id: 已发送的 seq},
+        #                   "next_due": 下次发送时间 (loop.time())}
+        self.spectrum_clients: Dict[WebSocket, dict] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        self.spectrum_clients[websocket] = self._subscription(**self.DEFAULT_SPECTRUM)
+
+    @staticmethod
+    def _subscription(format: str, dtype: Optional[str], bins: Optional[int], pooling: str, fps: float) -> dict:
+        return {"format": format, "dtype": dtype, "bins": bins, "pooling": pooling, "fps": fps,
+                "axis_ids": {}, "sent": {}, "next_due": 0.0}
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        self.spectrum_clients.pop(websocket, None)
+
+    def set_spectrum_format(self, websocket: WebSocket, fmt: str = 'json', dtype: str = 'uint8',
+                            bins: Optional[int] = None, pooling: str = 'max', fps: Optional[float] = None):
+        """
+        客户端频谱订阅
+        
+        Args:
+            fmt: 'json' (默认) 或 'binary'
+            dtype: 二进制量化格式 uint8 / int16
+            bins: 输出点数 (通常为图表宽度像素)，None 为 FFT 点数的 1/10
+            pooling: 'max' (峰值) 或 'mean' (噪声底)
+            fps: 每台设备的频谱更新率上限 (帧/秒)，None 为 30
+        """
+        if fmt not in ('json', 'binary') or (fmt == 'binary' and dtype not in QUANTIZATION):
+            raise ValueError(f"未知频谱格式: {fmt}/{dtype}")
+        if pooling not in POOLING_MODES:
+            raise ValueError(f"未知降点方式: {pooling}")
+        if bins is not None and int(bins) < 1:
+            raise ValueError(f"bins 必须为正数: {bins}")
+        fps = self.DEFAULT_SPECTRUM["fps"] if fps is None else float(fps)
+        if not 0 < fps <= self.MAX_FPS:
+            raise ValueError(f"fps 必须在 (0, {self.MAX_FPS:g}] 范围内: {fps}")
+        self.spectrum_clients[websocket] = self._subscription(
+            fmt, dtype if fmt == 'binary' else None, int(bins) if bins is not None else None, pooling, fps)
+
+    @staticmethod
+    def _spectrum_key(subscription: dict) -> tuple:
+        return (subscription["format"], subscription["dtype"], subscription["bins"], subscription["pooling"])
+
+    def due_spectrum_clients(self, now: float) -> List[WebSocket]:
+        """到达发送时间的连接"""
+        return [c for c in self.active_connections
+                if c in self.spectrum_clients and self.spectrum_clients[c]["next_due"] <= now]
+
+    def next_spectrum_due(self) -> Optional[float]:
+        return min((self.spectrum_clients[c]["next_due"] for c in self.active_connections
+                    if c in self.spectrum_clients), default=None)
+
+    async def send_spectrum(self, connection: WebSocket, device_id: str, payload) -> bool:
+        """发送一次频谱: JSON 文本或二进制帧 (频率轴变化时先发轴帧)，失败或连接已断开返回 False"""
+        subscription = self.spectrum_clients.get(connection)
+        if subscription is None:
+            return False
+        try:
+            if isinstance(payload, str):
+                await connection.send_text(payload)
+                return True
+            if subscription["axis_ids"].get(device_id) != payload.axis_id:
+                await connection.send_bytes(payload.axis)
+                subscription["axis_ids"][device_id] = payload.axis_id
+            await connection.send_bytes(payload.data)
+            return True
+        except:
+            return False
 
     async def broadcast(self, message: str):
         disconnected = []
@@ -48,6 +120,148 @@ class ConnectionManager:
 
 
 manager = ConnectionManager()
+spectrum_encoder = SpectrumEncoder()
+# device_id -> 瀑布图历史 (停止流后保留，供重连客户端回放)
+waterfalls: Dict[str, WaterfallHistory] = {}
+
+
+class SpectrumUpdate:
+    """
+    一次频谱更新 (发布后不再修改，各订阅的编码结果缓存在 payloads 中)
+    overflow_seq / underflow_seq 为最近一次置溢出标志的缓冲区序号，
+    客户端上次发送之后有过溢出即置位，被覆盖的缓冲区的标志不会丢失
+    """
+    __slots__ = ('seq', 'spectrum', 'center_freq', 'overflow_seq', 'underflow_seq', 'pooled', 'payloads')
+
+    def __init__(self, seq: int, spectrum, center_freq: float, overflow_seq: int = 0, underflow_seq: int = 0):
+        self.seq = seq
+        self.spectrum = spectrum
+        self.center_freq = center_freq
+        self.overflow_seq = overflow_seq
+        self.underflow_seq = underflow_seq
+        self.pooled = {}    # (点数, 降点方式) -> 降点结果
+        self.payloads = {}  # (订阅键, overflow, underflow) -> JSON 文本或 SpectrumFrame
+
+
+class SpectrumSlot:
+    """
+    设备最新频谱槽: RX 线程写入，事件循环定时取走，新值覆盖旧值
+    被覆盖的频谱已在 SignalProcessor 中参与平均与峰值保持
+    """
+    __slots__ = ('latest', 'taken', 'seq', 'coalesced')
+
+    def __init__(self):
+        self.latest: Optional[SpectrumUpdate] = None
+        self.taken = True   # latest 是否已被发送定时器取走
+        self.seq = 0        # 写入次数
+        self.coalesced = 0  # 未被取走即被覆盖的次数
+
+
+spectrum_slots: Dict[str, SpectrumSlot] = {}
+_slots_lock = threading.Lock()
+
+
+def publish_spectrum(device_id: str, spectrum, center_freq: float = 0.0,
+                     overflow: bool = False, underflow: bool = False):
+    """RX 回调线程: 写入设备的最新频谱槽 (不降点、不编码、不调度协程)"""
+    with _slots_lock:
+        slot = spectrum_slots.get(device_id)
+        if slot is None:
+            slot = spectrum_slots[device_id] = SpectrumSlot()
+        previous = slot.latest
+        if not slot.taken:
+            slot.coalesced += 1
+        slot.seq += 1
+        slot.latest = SpectrumUpdate(
+            slot.seq, spectrum, center_freq,
+            slot.seq if overflow else (previous.overflow_seq if previous else 0),
+            slot.seq if underflow else (previous.underflow_seq if previous else 0))
+        slot.taken = False
+
+
+def encode_spectrum(device_id: str, update: SpectrumUpdate, key: tuple, last_sent: int = 0):
+    """
+    按订阅键编码一次更新 (每种点数/降点方式只降点一次，每种格式与标志组合只编码一次)
+    last_sent: 该客户端上次收到的序号，之后的溢出都会在本帧标出
+    """
+    overflow = update.overflow_seq > last_sent
+    underflow = update.underflow_seq > last_sent
+    payload = update.payloads.get((key, overflow, underflow))
+    if payload is not None:
+        return payload
+    fmt, dtype, bins, pooling = key
+    view = (bins or max(1, len(update.spectrum.power) // 10), pooling)
+    reduced = update.pooled.get(view)
+    if reduced is None:
+        reduced = update.pooled[view] = pool_spectrum(update.spectrum, *view)
+    if fmt == 'binary':
+        payload = spectrum_encoder.encode(device_id, reduced.freqs, reduced.power, update.center_freq, dtype,
+                                          reduced.peak, overflow, underflow)
+    else:
+        data = {
+            "type": "spectrum",
+            "device_id": device_id,
+            "frequencies": reduced.freqs.tolist(),
+            "power": reduced.power.tolist(),
+            "overflow": overflow,
+            "underflow": underflow,
+        }
+        if reduced.peak is not None:
+            data["peak"] = reduced.peak.tolist()
+        payload = json.dumps(data)
+    update.payloads[(key, overflow, underflow)] = payload
+    return payload
+
+
+async def spectrum_pump(idle_interval: float = 0.1):
+    """
+    事件循环中的频谱发送定时器 (随应用启动)
+    每个连接按自己的 fps 到期，到期时发送各设备槽中尚未发给它的最新频谱
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        due = manager.next_spectrum_due()
+        now = loop.time()
+        if due is None or due > now:
+            await asyncio.sleep(idle_interval if due is None else min(due - now, idle_interval))
+            continue
+        with _slots_lock:
+            updates = []
+            for device_id, slot in spectrum_slots.items():
+                if slot.latest is not None:
+                    slot.taken = True
+                    updates.append((device_id, slot.latest))
+        disconnected = []
+        # 发送期间其他连接可能断开 (subscription 被移除)，逐个连接查找，单个连接出错不终止定时器
+        for connection in manager.due_spectrum_clients(now):
+            try:
+                if not await _send_due_spectrum(connection, updates, now):
+                    disconnected.append(connection)
+            except Exception as e:
+                print(f"Spectrum send error: {e}")
+                disconnected.append(connection)
+        for conn in disconnected:
+            manager.disconnect(conn)
+
+
+async def _send_due_spectrum(connection: WebSocket, updates: list, now: float) -> bool:
+    """向一个到期连接发送各设备的最新频谱，连接已断开时跳过；发送失败返回 False"""
+    subscription = manager.spectrum_clients.get(connection)
+    if subscription is None:
+        return True
+    subscription["next_due"] = max(subscription["next_due"] + 1.0 / subscription["fps"], now)
+    key = manager._spectrum_key(subscription)
+    for device_id, update in updates:
+        if manager.spectrum_clients.get(connection) is not subscription:
+            return True  # 发送期间断开或重新订阅
+        last_sent = subscription["sent"].get(device_id, 0)
+        if last_sent == update.seq:
+            continue
+        if not await manager.send_spectrum(connection, device_id,
+                                           encode_spectrum(device_id, update, key, last_sent)):
+            return False
+        subscription["sent"][device_id] = update.seq
+    return True
 
 
 # ============ SDR 系统 ============
@@ -93,17 +307,7 @@ class SDRSystem:
         try:
             # Spectrum
             spectrum = self.processor.compute_spectrum(samples)
-            
-            if manager.active_connections:
-                data = {
-                    "type": "spectrum",
-                    "frequencies": spectrum.frequencies[::10],
-                    "power": spectrum.power_db[::10]
-                }
-                asyncio.run_coroutine_threadsafe(
-                    manager.broadcast(json.dumps(data)), 
-                    self.loop_ref
-                )
+            publish_spectrum("", spectrum)
                 
         except Exception as e:
             print(f"Processing error: {e}")
@@ -116,198 +320,158 @@ sdr_system = SDRSystem()
 # ============ WebSocket 命令处理 ============
 MAIN_LOOP = None
 
-# 用于跟踪每个设备的解调工作线程和停止事件
-_demod_workers: dict[str, dict] = {}
+# 每个设备的 RX 流水线 (频谱、解调消费者线程)
+_rx_pipelines: dict[str, RxPipeline] = {}
+# 每个设备的解调统计 (序号不连续时的状态重置次数)，随 get_rx_stats 返回
+_demod_stats: dict[str, dict] = {}
 
-def create_stream_callback(device_id: str, signal_type: str = 'red_broadcast', rx_enabled: bool = True):
-    """创建特定设备的数据流回调 (生产者-消费者模式)
+def create_stream_callback(device_id: str, signal_type: str = 'red_broadcast', rx_enabled: bool = True,
+                           dedup_window: float = 2.0, avg_alpha: Optional[float] = None,
+                           peak_hold: bool = False) -> RxPipeline:
+    """创建特定设备的数据流回调 (RX 流水线)
+    
+    采集线程只把缓冲区交给流水线，频谱与解调各自在消费者线程中处理，
+    各有队列与溢出计数，互不影响，也不延迟下一次 rx()
     
     Args:
         device_id: 设备 ID
         signal_type: 信号类型 (red_broadcast, blue_jam_1, 等)
-        rx_enabled: 是否启用 RX 解调 (仅发射时为 False)
+        rx_enabled: 是否启用 RX 解调 (仅发射时为 False，只计算频谱)
+        dedup_window: 重复帧去重窗口 (秒)
+        avg_alpha: 频谱指数平均系数 (None 不平均)，每个 RX 缓冲区都参与，与客户端帧率无关
+        peak_hold: 频谱峰值保持
     """
     from sdr.demodulator import Demodulator, DemodulatorConfig
-    from protocol.packet_parser import PacketParser
-    import queue
-    import threading
+    from protocol.byte_sync import FourPhaseByteSync
+    from protocol.dedup import PacketDeduplicator
     
-    # 如果该设备已有 worker，先停止它
-    if device_id in _demod_workers:
-        old = _demod_workers[device_id]
-        old['stop_event'].set()
-        if old['thread'].is_alive():
-            old['thread'].join(timeout=1.0)
-        del _demod_workers[device_id]
+    # 如果该设备已有流水线，先停止它
+    stop_rx_pipeline(device_id)
     
-    processor = SignalProcessor(sample_rate=2000000)  # 默认 2M
+    processor = SignalProcessor(sample_rate=2000000, avg_alpha=avg_alpha, peak_hold=peak_hold)  # 默认 2M
+    waterfall = waterfalls.get(device_id)
+    if waterfall is None:
+        waterfall = waterfalls[device_id] = WaterfallHistory(processor.fft_size)
     
-    # 根据信号类型创建解调器配置
-    demod_config = DemodulatorConfig.from_signal_type(signal_type, sample_rate=2000000)
-    demodulator = Demodulator(demod_config)
-    packet_parser = PacketParser()
+    # 采集时的中心频率与溢出标志 (只读属性，不加锁)
+    driver = get_sdr_manager().get_device(device_id)
     
-    # 生产者-消费者队列 (有限容量防止内存溢出)
-    sample_queue = queue.Queue(maxsize=10)
-    stop_event = threading.Event()
+    def center_freq():
+        return driver.config.center_freq if driver else 0.0
     
-    def demod_worker():
-        """解调工作线程 (消费者)"""
-        # 如果 RX 未启用，直接消费队列但不处理
-        if not rx_enabled:
-            print(f"[DEBUG] RX disabled for {device_id}, demod worker will drain queue only")
-            while not stop_event.is_set():
-                try:
-                    sample_queue.get(timeout=0.5)  # 只消费，不处理
-                except queue.Empty:
-                    pass
-            return
-            
-        print(f"[DEBUG] Demod worker started for {device_id}")
-        process_count = 0
-        while not stop_event.is_set():
-            try:
-                # 从队列获取样本 (超时以便检查停止事件)
-                samples, center_freq = sample_queue.get(timeout=0.5)
-                process_count += 1
-                
-                # 解调 IQ 样本
-                symbols, decoded_bytes = demodulator.demodulate(samples)
-                
-                # 每 50 次处理打印一次调试信息
-                if process_count % 50 == 0:
-                    print(f"[DEBUG] Processed {process_count} buffers, last decoded {len(decoded_bytes)} bytes, {len(symbols)} symbols")
-                
-                # 每 500 次检查是否有 SOF (0xA5) 和 Preamble (0xE4) 出现
-                if process_count % 500 == 0:
-                    sof_count = decoded_bytes.count(0xA5)
-                    preamble_count = decoded_bytes.count(0xE4)
-                    print(f"[DEBUG] SOF (0xA5) count: {sof_count}, Preamble (0xE4) count: {preamble_count} in {len(decoded_bytes)} bytes")
-                
-                # 解析数据包 (使用字节级 SOF 同步)
-                if len(decoded_bytes) > 0:
-                    packets = packet_parser.feed_bytes(decoded_bytes)
-                    
-                    if packets:
-                        print(f"[DEBUG] Decoded {len(packets)} packets!")
-                    
-                    # 发送解码的数据包到前端
-                    if not MAIN_LOOP:
-                         print("[DEBUG] WARNING: MAIN_LOOP is None!")
-                    if not manager.active_connections:
-                         # 仅当确定连接时才打印警告，避免泛滥
-                         # print("[DEBUG] WARNING: No active connections!")
-                         pass
-
-                    if MAIN_LOOP and manager.active_connections and packets:
-                        for pkt in packets:
-                            try:
-                                packet_data = {
-                                    "type": "packet",
-                                    "device_id": device_id,
-                                    "timestamp": pkt.timestamp,
-                                    "hex": pkt.hex_string,
-                                    "packet_type": pkt.packet_type,
-                                    "is_valid": pkt.is_valid
-                                }
-                                json_str = json.dumps(packet_data)
-                                # 限制打印频率或长度以免刷屏
-                                if process_count % 10 == 0:
-                                     print(f"[DEBUG] Broadcasting packet: {json_str[:50]}...")
-                                
-                                asyncio.run_coroutine_threadsafe(
-                                    manager.broadcast(json_str), 
-                                    MAIN_LOOP
-                                )
-                            except Exception as e:
-                                print(f"[DEBUG] JSON serialize/broadcast error: {e}")
-                    elif packets and not manager.active_connections:
-                        print("[DEBUG] Packets dropped - no active WebSocket connections")
-                
-                sample_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Demod worker error: {e}")
-                import traceback
-                traceback.print_exc()
-        print(f"[DEBUG] Demod worker stopped for {device_id}")
-    
-    # 启动解调工作线程
-    worker_thread = threading.Thread(target=demod_worker, daemon=True)
-    worker_thread.start()
+    def status():
+        if not driver:
+            return False, False
+        return getattr(driver, '_rx_overflow', False), getattr(driver, '_tx_underflow', False)
     
-    # 注册到全局字典，以便 stop_streaming 时能停止
-    _demod_workers[device_id] = {
-        'stop_event': stop_event,
-        'thread': worker_thread,
-        'queue': sample_queue
-    }
+    # 驱动把样本直接写入流水线的预分配槽环 (见 start_streaming 的 buffer_pool)
+    pipeline = RxPipeline(center_freq, status, slot_size=driver.config.buffer_size if driver else None)
     
-    def callback(samples: np.ndarray):
-        """采样回调 (生产者) - 保持轻量级"""
+    def spectrum_consumer(buffer: RxBuffer):
+        """频谱消费者: FFT、瀑布图历史、写入频谱槽"""
         if not MAIN_LOOP:
             return
+        spectrum = processor.compute_spectrum(buffer.samples, center_freq=buffer.center_freq)
+        waterfall.append(spectrum, buffer.center_freq)
+        publish_spectrum(device_id, spectrum, buffer.center_freq,
+                         overflow=buffer.overflow, underflow=buffer.underflow)
+    
+    pipeline.add_consumer("spectrum", spectrum_consumer, maxsize=4)
+    
+    if rx_enabled:
+        # 根据信号类型创建解调器配置
+        demod_config = DemodulatorConfig.from_signal_type(signal_type, sample_rate=2000000)
+        # 流式模式: 跨 RX 缓冲区保留滤波/定时状态，帧不会被缓冲区边界截断
+        demodulator = Demodulator(demod_config, streaming=True)
+        # 四相位并行字节同步: 帧起点不必对齐到 4 符号边界
+        byte_sync = FourPhaseByteSync()
+        # 循环发射的重复帧只推送首次，之后每秒推送一次累计次数与链路速率
+        dedup = PacketDeduplicator(window=dedup_window, update_interval=1.0)
+        process_count = 0
+        last_seq = 0
+        demod_stats = _demod_stats[device_id] = {"gap_resets": 0, "last_gap_seq": 0}
         
-        # 检查是否已停止
-        if stop_event.is_set():
-            return
+        def demod_consumer(buffer: RxBuffer):
+            """解调消费者"""
+            nonlocal process_count, last_seq
+            process_count += 1
             
-        try:
-            # 获取当前中心频率
-            sdr_mgr = get_sdr_manager()
-            driver = sdr_mgr.get_device(device_id)
-            center_freq = 0.0
+            # 队列溢出丢弃了缓冲区: 样本不连续，滤波/定时状态与未凑满的字节作废，从本缓冲区重新同步
+            if last_seq and buffer.seq != last_seq + 1:
+                demodulator.reset()
+                byte_sync.clear()
+                demod_stats["gap_resets"] += 1
+                demod_stats["last_gap_seq"] = buffer.seq
+            last_seq = buffer.seq
             
-            if driver:
-                center_freq = driver.config.center_freq
+            # 解调 IQ 样本
+            symbols, decoded_bytes = demodulator.demodulate(buffer.samples)
             
-            # 1. 计算频谱 (FFT) - 轻量级处理，不阻塞
-            spectrum = processor.compute_spectrum(samples, center_freq=center_freq)
+            # 每 50 次处理打印一次调试信息
+            if process_count % 50 == 0:
+                print(f"[DEBUG] Processed {process_count} buffers, last decoded {len(decoded_bytes)} bytes, {len(symbols)} symbols")
             
-            # 2. 将样本入队供解调线程处理 (非阻塞)
-            try:
-                sample_queue.put_nowait((samples.copy(), center_freq))
-            except queue.Full:
-                # 队列满则丢弃最旧的样本
-                try:
-                    sample_queue.get_nowait()
-                    sample_queue.put_nowait((samples.copy(), center_freq))
-                except:
-                    pass
+            # 每 500 次检查是否有 SOF (0xA5) 和 Preamble (0xE4) 出现
+            if process_count % 500 == 0:
+                sof_count = decoded_bytes.count(0xA5)
+                preamble_count = decoded_bytes.count(0xE4)
+                print(f"[DEBUG] SOF (0xA5) count: {sof_count}, Preamble (0xE4) count: {preamble_count} in {len(decoded_bytes)} bytes")
             
-            # 3. 发送频谱数据
-            if manager.active_connections:
-                spectrum_data = {
-                    "type": "spectrum",
-                    "device_id": device_id,
-                    "frequencies": spectrum.frequencies[::10],
-                    "power": spectrum.power_db[::10],
-                    "overflow": getattr(driver, '_rx_overflow', False) if driver else False,
-                    "underflow": getattr(driver, '_tx_underflow', False) if driver else False
-                }
-                asyncio.run_coroutine_threadsafe(
-                    manager.broadcast(json.dumps(spectrum_data)), 
-                    MAIN_LOOP
-                )
-        except Exception as e:
-            print(f"Processing error for {device_id}: {e}")
+            # 解析数据包 (四相位字节级 SOF 同步)
+            if len(symbols) == 0:
+                return
+            packets = byte_sync.feed_symbols(symbols)
+            
+            if packets:
+                print(f"[DEBUG] Decoded {len(packets)} packets!")
             
-    return callback
+            # 发送解码的数据包到前端
+            if not MAIN_LOOP:
+                 print("[DEBUG] WARNING: MAIN_LOOP is None!")
+
+            fresh = dedup.feed(device_id, packets) if packets else []
+            repeats, rates = dedup.poll()
+            messages = [pkt.to_json(device_id) for pkt in fresh]
+            messages += [json.dumps({"type": "packet_repeat", **r}) for r in repeats]
+            messages += [json.dumps({"type": "link_stats", **r}) for r in rates]
+
+            if MAIN_LOOP and manager.active_connections and messages:
+                for json_str in messages:
+                    try:
+                        # 限制打印频率或长度以免刷屏
+                        if process_count % 10 == 0:
+                             print(f"[DEBUG] Broadcasting packet: {json_str[:50]}...")
+                        
+                        asyncio.run_coroutine_threadsafe(
+                            manager.broadcast(json_str), 
+                            MAIN_LOOP
+                        )
+                    except Exception as e:
+                        print(f"[DEBUG] JSON serialize/broadcast error: {e}")
+            elif packets and not manager.active_connections:
+                print("[DEBUG] Packets dropped - no active WebSocket connections")
+        
+        # 解调需要连续样本: 队列比频谱深，短时卡顿不丢缓冲区
+        pipeline.add_consumer("demod", demod_consumer, maxsize=10)
+    else:
+        print(f"[DEBUG] RX disabled for {device_id}, spectrum only")
+    
+    pipeline.start()
+    # 注册到全局字典，以便 stop_streaming 时能停止
+    _rx_pipelines[device_id] = pipeline
+    return pipeline
 
 
-def stop_demod_worker(device_id: str):
-    """停止指定设备的解调工作线程"""
-    if device_id in _demod_workers:
-        worker_info = _demod_workers[device_id]
-        print(f"[DEBUG] Stopping demod worker for {device_id}")
-        worker_info['stop_event'].set()
-        if worker_info['thread'].is_alive():
-            worker_info['thread'].join(timeout=1.0)
-        del _demod_workers[device_id]
-        print(f"[DEBUG] Demod worker stopped for {device_id}")
+def stop_rx_pipeline(device_id: str):
+    """停止指定设备的 RX 流水线消费者线程"""
+    pipeline = _rx_pipelines.pop(device_id, None)
+    _demod_stats.pop(device_id, None)
+    if pipeline is not None:
+        print(f"[DEBUG] Stopping RX pipeline for {device_id}")
+        pipeline.stop()
+        print(f"[DEBUG] RX pipeline stopped for {device_id}")
 
-async def handle_command(command: dict) -> dict:
+async def handle_command(command: dict, websocket: Optional[WebSocket] = None) -> dict:
     cmd = command.get("cmd", "")
     params = command.get("params", {})
     sdr_manager = get_sdr_manager()
@@ -315,7 +479,39 @@ async def handle_command(command: dict) -> dict:
     response = {"cmd": cmd, "success": False, "data": None, "error": None}
     
     try:
-        if cmd == "scan_devices":
+        if cmd == "set_spectrum_format":
+            # 本连接的频谱订阅: {"format": "json" | "binary", "dtype": "uint8" | "int16",
+            #                    "bins": 输出点数, "pooling": "max" | "mean", "fps": 每台设备的更新率上限}
+            if websocket is None:
+                response["error"] = "仅支持 WebSocket 连接"
+            else:
+                manager.set_spectrum_format(websocket, params.get("format", "json"),
+                                            params.get("dtype", "uint8"), params.get("bins"),
+                                            params.get("pooling", "max"), params.get("fps"))
+                response["success"] = True
+
+        elif cmd == "get_waterfall":
+            # 瀑布图历史回放: {"device_id", "start"/"end": Unix 时间 (秒) 或 "seconds": 最近 N 秒,
+            #                  "max_rows": 行数上限 (相邻行取最大值合并)}
+            # 数据块以二进制消息先于本响应发送 (格式见 sdr/waterfall.py)
+            device_id = params.get("device_id")
+            waterfall = waterfalls.get(device_id)
+            if websocket is None:
+                response["error"] = "仅支持 WebSocket 连接"
+            elif waterfall is None:
+                response["error"] = f"设备 {device_id} 无瀑布图历史"
+            else:
+                start, end = params.get("start"), params.get("end")
+                if params.get("seconds") is not None:
+                    start = time.time() - float(params["seconds"])
+                # 压缩整段历史需数十毫秒，放到线程池中避免阻塞事件循环
+                block = await asyncio.get_running_loop().run_in_executor(
+                    None, waterfall.encode_block, start, end, params.get("max_rows"))
+                await websocket.send_bytes(block)
+                response["data"] = {"device_id": device_id, "bytes": len(block), "bins": waterfall.bins}
+                response["success"] = True
+
+        elif cmd == "scan_devices":
             devices = sdr_manager.scan_devices()
             response["data"] = [{"id": d.id, "name": d.name, "uri": d.uri, 
                                  "serial": d.serial, "mac": d.mac,
@@ -386,6 +582,102 @@ async def handle_command(command: dict) -> dict:
             else:
                 response["error"] = "缺少参数"
                 
+        elif cmd == "start_multi_tx_signal":
+            device_id = params.get("device_id")
+            signals = params.get("signals")
+            if device_id and signals:
+                success, preview_data = sdr_manager.start_multi_tx_signal(
+                    device_id,
+                    [(s["signal_type"], s.get("payload")) for s in signals],
+                    params.get("center_freq"))
+                response["success"] = success
+                if preview_data:
+                    response["data"] = preview_data
+            else:
+                response["error"] = "缺少参数"
+
+        elif cmd == "start_tx_stream":
+            device_id = params.get("device_id")
+            signal_type = params.get("signal_type")
+            if device_id and signal_type:
+                response["success"] = sdr_manager.start_tx_stream(
+                    device_id, signal_type, params.get("payload"), params.get("cmd_id", 0x0201),
+                    params.get("block_size"))
+            else:
+                response["error"] = "缺少参数"
+
+        elif cmd == "update_tx_payload":
+            device_id = params.get("device_id")
+            payload = params.get("payload")
+            if device_id and payload is not None:
+                response["success"] = sdr_manager.update_tx_payload(
+                    device_id, payload, params.get("cmd_id", 0x0201))
+                response["data"] = sdr_manager.get_tx_stats(device_id)
+                if not response["success"]:
+                    response["error"] = "流式发射未启动"
+            else:
+                response["error"] = "缺少参数"
+
+        elif cmd == "set_tx_command":
+            device_id = params.get("device_id")
+            cmd_id = params.get("cmd_id")
+            payload = params.get("payload")
+            if device_id and cmd_id is not None and payload is not None:
+                response["success"] = sdr_manager.set_tx_command(
+                    device_id, int(cmd_id), payload, params.get("rate_hz"))
+                response["data"] = sdr_manager.get_tx_stats(device_id)
+                if not response["success"]:
+                    response["error"] = "流式发射未启动、缺少 rate_hz 或 0x0A01 由遥测接入占用"
+            else:
+                response["error"] = "缺少参数"
+
+        elif cmd == "remove_tx_command":
+            device_id = params.get("device_id")
+            cmd_id = params.get("cmd_id")
+            if device_id and cmd_id is not None:
+                response["success"] = sdr_manager.remove_tx_command(device_id, int(cmd_id))
+            else:
+                response["error"] = "缺少参数"
+
+        elif cmd == "start_telemetry_ingest":
+            device_id = params.get("device_id")
+            if device_id:
+                response["data"] = sdr_manager.start_telemetry_ingest(
+                    device_id, params.get("port", 9100), params.get("unix_path"))
+                response["success"] = response["data"] is not None
+                if not response["success"]:
+                    response["error"] = "流式发射未启动、TX 块过大 (block_size 须 <= 4096)、0x0A01 已被调度或端口不可用"
+            else:
+                response["error"] = "缺少 device_id"
+
+        elif cmd == "stop_telemetry_ingest":
+            device_id = params.get("device_id")
+            if device_id:
+                response["success"] = sdr_manager.stop_telemetry_ingest(device_id)
+            else:
+                response["error"] = "缺少 device_id"
+
+        elif cmd == "get_tx_stats":
+            device_id = params.get("device_id")
+            if device_id:
+                response["data"] = sdr_manager.get_tx_stats(device_id)
+                response["success"] = response["data"] is not None
+            else:
+                response["error"] = "缺少 device_id"
+
+        elif cmd == "get_rx_stats":
+            # RX 流水线: 各消费者处理/丢弃计数、队列深度、耗时，rx() 调用间隔，以及解调状态重置次数
+            device_id = params.get("device_id")
+            pipeline = _rx_pipelines.get(device_id)
+            if pipeline is None:
+                response["error"] = f"设备 {device_id} 未在接收"
+            else:
+                driver = sdr_manager.get_device(device_id)
+                response["data"] = pipeline.get_stats()
+                response["data"]["rx_gap_ms"] = driver.get_rx_gap_stats() if driver else None
+                response["data"]["demod"] = _demod_stats.get(device_id)
+                response["success"] = True
+
         elif cmd == "stop_tx_signal":
             device_id = params.get("device_id")
             if device_id:
@@ -398,16 +690,18 @@ async def handle_command(command: dict) -> dict:
             signal_type = params.get("signal_type", "red_broadcast")  # 默认红方广播
             rx_enabled = params.get("rx_enabled", True)  # 默认启用 RX
             if device_id:
-                callback = create_stream_callback(device_id, signal_type, rx_enabled)
-                response["success"] = sdr_manager.start_streaming(device_id, callback)
+                callback = create_stream_callback(device_id, signal_type, rx_enabled,
+                                                  avg_alpha=params.get("avg_alpha"),
+                                                  peak_hold=params.get("peak_hold", False))
+                response["success"] = sdr_manager.start_streaming(device_id, callback, buffer_pool=callback)
             else:
                 response["error"] = "缺少 device_id"
 
         elif cmd == "stop_streaming":
             device_id = params.get("device_id")
             if device_id:
-                # 先停止解调工作线程
-                stop_demod_worker(device_id)
+                # 先停止 RX 流水线消费者线程
+                stop_rx_pipeline(device_id)
                 response["success"] = sdr_manager.stop_streaming(device_id)
             else:
                 response["error"] = "缺少 device_id"
@@ -426,8 +720,10 @@ async def handle_command(command: dict) -> dict:
 async def lifespan(app: FastAPI):
     global MAIN_LOOP
     MAIN_LOOP = asyncio.get_running_loop()
+    pump = asyncio.create_task(spectrum_pump())
     # sdr_system.start(loop) # 暂时禁用旧的自动启动，转为手动控制
     yield
+    pump.cancel()
     # sdr_system.stop()
 
 
@@ -459,7 +755,7 @@ async def websocket_endpoint(websocket: WebSocket):
             # 处理命令
             try:
                 command = json.loads(data)
-                response = await handle_command(command)
+                response = await handle_command(command, websocket)
                 await manager.send_json(websocket, response)
             except json.JSONDecodeError:
                 await manager.send_json(websocket, {"error": "无效的 JSON"})
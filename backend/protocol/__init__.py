@@ -1,2 +1,6 @@
 from .crc import get_crc16_check_sum, verify_crc16_check_sum
-from .packet_parser import PacketParser, RadarPacket
+from .packet import RadarPacket, PacketBatch
+from .packet_parser import PacketParser
+from .byte_sync import FourPhaseByteSync
+from .decoders import PayloadDecoder, register_decoder, get_decoder, decode_packet, decode_batch
+from .dedup import PacketDeduplicator
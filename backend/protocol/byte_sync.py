@@ -0,0 +1,106 @@
+"""
+四相位并行字节同步
+符号流每 4 个符号组成 1 字节，帧起始不一定对齐到 4 的倍数。
+这里对 4 种 2-bit 相位同时打包，只对出现 SOF 且 Header CRC8 通过的相位做字节级解析。
+"""
+
+import time
+import numpy as np
+from typing import List, Optional
+
+from .crc import verify_crc8_batch
+from .packet import PacketBatch, RadarPacket
+from .packet_parser import PacketParser
+from .symbol_codec import slice_symbols
+
+
+class FourPhaseByteSync:
+    """
+    字节同步器: 符号流 -> 数据包，与帧在符号流中的对齐方式无关
+
+    - 滑动窗口一次打包所有符号位置，v[i] 为从符号 i 开始的字节，
+      相位 p 的字节流即 v 中绝对位置 ≡ p (mod 4) 的元素
+    - 每块只对 SOF (0xA5) 候选做 Header CRC8 校验，未命中的相位直接丢弃
+    - 锁定相位 (最近一次成功解出数据包的相位) 与有未完成帧的相位持续解析
+    """
+
+    PHASES = 4
+
+    def __init__(self):
+        self._parsers = [PacketParser() for _ in range(self.PHASES)]
+        self._carry = np.zeros(0, dtype=np.uint8)   # 上次剩余的符号索引 (不足一个字节)
+        self._base = 0                              # _carry[0] 的绝对符号位置 (mod 4)
+        self.locked_phase: Optional[int] = None
+
+    def clear(self):
+        for parser in self._parsers:
+            parser.clear()
+        self._carry = np.zeros(0, dtype=np.uint8)
+        self._base = 0
+        self.locked_phase = None
+
+    def _header_phases(self, v: np.ndarray) -> set:
+        """返回本块中存在 CRC8 通过 (或 Header 尚不完整) 的 SOF 候选的相位集合"""
+        header_span = (PacketParser.HEADER_SIZE - 1) * 4
+        candidates = np.flatnonzero(v == PacketParser.SOF)
+        # Header 跨越块边界的候选交给解析器缓存，其余批量校验 CRC8
+        complete = candidates + header_span < len(v)
+        heads = candidates[complete]
+        ok = verify_crc8_batch(v, heads, PacketParser.HEADER_SIZE, stride=4)
+        hits = np.concatenate((heads[ok], candidates[~complete]))
+        return set(((self._base + hits) % self.PHASES).tolist())
+
+    def feed_symbols(self, symbols: np.ndarray) -> List[RadarPacket]:
+        """
+        输入解调后的符号 (软值或判决值)，返回解析出的数据包
+        """
+        frames = self._feed_frames(symbols)
+        if not frames:
+            return []
+        timestamp = time.time()
+        return [RadarPacket(frame, timestamp) for frame in frames]
+
+    def feed_symbols_batch(self, symbols: np.ndarray) -> PacketBatch:
+        """同 feed_symbols，结果以列式 PacketBatch 返回"""
+        frames = self._feed_frames(symbols)
+        if not frames:
+            return PacketBatch.empty()
+        return PacketBatch.from_frames(frames, time.time())
+
+    def _feed_frames(self, symbols: np.ndarray) -> List[bytes]:
+        if len(symbols) == 0:
+            return []
+
+        data = np.concatenate((self._carry, slice_symbols(symbols)))
+        n_bytes = len(data) - 3
+        if n_bytes <= 0:
+            self._carry = data
+            return []
+
+        # v[i] = data[i..i+3] 打包成的字节 (4 种相位交织)
+        v = data[:-3] << 6
+        v |= data[1:-2] << 4
+        v |= data[2:-1] << 2
+        v |= data[3:]
+
+        active = self._header_phases(v)
+        if self.locked_phase is not None:
+            active.add(self.locked_phase)
+
+        frames = []
+        for phase, parser in enumerate(self._parsers):
+            if phase not in active and not parser.has_pending_frame:
+                # 未命中的相位: 丢弃其字节，避免下次拼接出不连续的数据
+                parser.clear()
+                continue
+
+            start = (phase - self._base) % self.PHASES
+            phase_frames = parser._feed_bytes_frames(v[start::4].tobytes())
+            if phase_frames:
+                self.locked_phase = phase
+                frames.extend(phase_frames)
+
+        # 最后 3 个符号是其余相位下一个字节的开头
+        self._carry = data[n_bytes:]
+        self._base = (self._base + n_bytes) % self.PHASES
+        return frames
@@ -3,6 +3,7 @@
 # Based on standard DJI/RoboMaster CRC algorithms
 
 import struct
+import numpy as np
 
 # CRC8 Lookup Table (Poly: 0x31, Init: 0xFF)
 crc8_table = [
@@ -147,3 +148,154 @@ def get_crc16_check_sum(data: bytes, length: int) -> int:
         length -= 1
         
     return wCRC16
+
+
+# ========== 增量计算 ==========
+# 流式组帧时只对新到达的字节继续计算，copy() 可缓存固定前缀的中间状态
+
+class Crc8:
+    """增量 CRC8 (init 0)，value 为当前校验值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, data=b'', value: int = 0):
+        self.value = value
+        if data:
+            self.update(data)
+
+    def update(self, data) -> 'Crc8':
+        crc = self.value
+        for byte in data:
+            crc = crc8_table[crc ^ byte]
+        self.value = crc
+        return self
+
+    def copy(self) -> 'Crc8':
+        return Crc8(value=self.value)
+
+    def digest(self) -> bytes:
+        """校验字节 (与 append_crc8_check_sum 追加的内容相同)"""
+        return bytes([self.value])
+
+
+class Crc16:
+    """增量 CRC16 (init 0xFFFF)，value 为当前校验值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, data=b'', value: int = 0xFFFF):
+        self.value = value
+        if data:
+            self.update(data)
+
+    def update(self, data) -> 'Crc16':
+        crc = self.value
+        for byte in data:
+            crc = (crc >> 8) ^ crc16_table[(crc ^ byte) & 0xFF]
+        self.value = crc
+        return self
+
+    def copy(self) -> 'Crc16':
+        return Crc16(value=self.value)
+
+    def digest(self) -> bytes:
+        """校验字节 (小端，与 append_crc16_check_sum 追加的内容相同)"""
+        return struct.pack('<H', self.value)
+
+
+# ========== 批量校验 (NumPy) ==========
+# 对一个数据块中的大量候选位置同时查表，每次迭代处理所有候选的第 k 个字节
+
+_crc8_table_np = np.array(crc8_table, dtype=np.uint8)
+_crc16_table_np = np.array(crc16_table, dtype=np.uint16)
+
+
+# 候选数少于此值时逐个查表更快 (NumPy 每次调用的固定开销高于少量标量运算)
+BATCH_MIN_CANDIDATES = 64
+
+
+def _as_uint8_array(data) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return np.ascontiguousarray(data, dtype=np.uint8)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def crc8_span(view, offset: int, length: int, stride: int = 1) -> int:
+    """单个候选的 CRC8 (view 为 bytes / memoryview，字节间隔 stride)"""
+    crc = 0
+    for index in range(offset, offset + length * stride, stride):
+        crc = crc8_table[crc ^ view[index]]
+    return crc
+
+
+def crc16_span(view, offset: int, length: int, stride: int = 1) -> int:
+    """单个候选的 CRC16 (init 0xFFFF)"""
+    crc = 0xFFFF
+    for index in range(offset, offset + length * stride, stride):
+        crc = (crc >> 8) ^ crc16_table[(crc ^ view[index]) & 0xFF]
+    return crc
+
+
+def crc8_batch(data, offsets, length: int, stride: int = 1) -> np.ndarray:
+    """
+    批量计算 CRC8
+
+    Args:
+        data: 数据块 (bytes / bytearray / uint8 数组)
+        offsets: 各候选的起始位置
+        length: 每个候选参与计算的字节数
+        stride: 相邻字节在 data 中的间隔 (符号相位交织数据为 4)
+
+    Returns:
+        uint8 数组，CRC8 值 (init 0，与 append_crc8_check_sum 一致)
+    """
+    arr = _as_uint8_array(data)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    if len(offsets) < BATCH_MIN_CANDIDATES:
+        view = memoryview(arr)
+        return np.array([crc8_span(view, off, length, stride) for off in offsets.tolist()],
+                        dtype=np.uint8)
+    crc = np.zeros(len(offsets), dtype=np.uint8)
+    for k in range(length):
+        crc = _crc8_table_np[crc ^ arr[offsets + k * stride]]
+    return crc
+
+
+def crc16_batch(data, offsets, lengths, stride: int = 1) -> np.ndarray:
+    """
+    批量计算 CRC16 (init 0xFFFF)，每个候选长度可以不同
+
+    候选按长度降序排列，第 k 轮只更新长度大于 k 的前缀，无需掩码分支
+    """
+    arr = _as_uint8_array(data)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    lengths = np.broadcast_to(np.asarray(lengths, dtype=np.intp), offsets.shape)
+    if len(offsets) < BATCH_MIN_CANDIDATES:
+        view = memoryview(arr)
+        return np.array([crc16_span(view, off, n, stride)
+                         for off, n in zip(offsets.tolist(), lengths.tolist())], dtype=np.uint16)
+
+    order = np.argsort(-lengths, kind='stable')
+    offs = offsets[order]
+    neg_lens = -lengths[order]
+    # active[k] = 长度 > k 的候选数
+    active = np.searchsorted(neg_lens, -np.arange(-neg_lens[0]), side='left').tolist()
+    crc = np.full(len(offs), 0xFFFF, dtype=np.uint16)
+    for k, m in enumerate(active):
+        c = crc[:m]
+        index = (c ^ arr[offs[:m] + k * stride]) & 0xFF
+        crc[:m] = (c >> 8) ^ _crc16_table_np[index]
+
+    result = np.empty_like(crc)
+    result[order] = crc
+    return result
+
+
+def verify_crc8_batch(data, offsets, length: int, stride: int = 1) -> np.ndarray:
+    """批量校验 CRC8 (含末尾校验字节)，返回 bool 数组"""
+    return crc8_batch(data, offsets, length, stride) == 0
+
+
+def verify_crc16_batch(data, offsets, lengths, stride: int = 1) -> np.ndarray:
+    """批量校验 CRC16 (含末尾 2 字节校验)，返回 bool 数组"""
+    return crc16_batch(data, offsets, lengths, stride) == 0
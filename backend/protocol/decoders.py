@@ -0,0 +1,179 @@
+"""
+雷达无线链路命令的数据段解码 (SDR.md 3.2 / 协议 1.6)
+按 cmd_id 注册解码器，布局预编译为 struct.Struct 与 NumPy dtype:
+- decode(payload): 单个数据包 -> {字段: 值}
+- decode_batch(batch): 同命令的一批数据包 -> {字段: 列数组}，一次 NumPy 视图转换完成
+0x0A03 在 SDR.md 中未定义，不注册 (按原始 hex 推送)
+"""
+
+import struct
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .packet import PACKET_TYPES, PAYLOAD_DECODERS, PacketBatch, RadarPacket
+
+# 机器人名称 (按数据段中的顺序)
+ROBOTS = ('hero', 'engineer', 'infantry_3', 'infantry_4', 'aerial', 'sentry')
+
+
+class PayloadDecoder:
+    """
+    固定布局数据段解码器
+
+    Args:
+        cmd_id: 命令码
+        name: 数据包类型名
+        fields: [(字段名, 偏移, 格式)]，格式为 struct 单字符 ('B' / 'H' / 'h' / 'I')，小端
+        bitfields: [(名称, 源字段, 起始位, 位宽)]，从位掩码字段派生
+    """
+
+    def __init__(self, cmd_id: int, name: str, fields: Sequence[Tuple[str, int, str]],
+                 bitfields: Sequence[Tuple[str, str, int, int]] = ()):
+        self.cmd_id = cmd_id
+        self.name = name
+        self.fields = list(fields)
+        self.bitfields = list(bitfields)
+
+        # 按偏移排序后用填充字节 'x' 补齐空洞，得到与 dtype 一致的 struct 格式
+        fmt = '<'
+        pos = 0
+        for _, offset, code in sorted(self.fields, key=lambda f: f[1]):
+            if offset > pos:
+                fmt += f'{offset - pos}x'
+            fmt += code
+            pos = offset + struct.calcsize('<' + code)
+        self.size = pos
+        self._struct = struct.Struct(fmt)
+        self._names = [f[0] for f in sorted(self.fields, key=lambda f: f[1])]
+        self.dtype = np.dtype({
+            'names': [f[0] for f in self.fields],
+            'formats': ['<' + code for _, _, code in self.fields],
+            'offsets': [f[1] for f in self.fields],
+            'itemsize': self.size,
+        })
+
+    def decode(self, payload) -> Optional[Dict[str, int]]:
+        """解码单个数据段，长度不足时返回 None"""
+        if len(payload) < self.size:
+            return None
+        result = dict(zip(self._names, self._struct.unpack_from(payload)))
+        for name, source, shift, width in self.bitfields:
+            result[name] = (result[source] >> shift) & ((1 << width) - 1)
+        return result
+
+    def decode_array(self, payloads: np.ndarray) -> Dict[str, np.ndarray]:
+        """(N, >= size) uint8 矩阵 -> {字段: 长度 N 的数组}"""
+        rows = np.ascontiguousarray(payloads[:, :self.size], dtype=np.uint8)
+        records = rows.view(self.dtype).reshape(len(rows))
+        columns = {name: records[name] for name in self._names}
+        for name, source, shift, width in self.bitfields:
+            columns[name] = (columns[source] >> shift) & ((1 << width) - 1)
+        return columns
+
+    def decode_batch(self, batch: PacketBatch) -> Dict[str, np.ndarray]:
+        """
+        解码批量中所有本命令的数据包 (长度不足的丢弃)
+        额外返回 'timestamp' 与 'seq' 列
+        """
+        records = batch.records
+        mask = (records['cmd_id'] == self.cmd_id) & (records['data_length'] >= self.size)
+        selected = records[mask]
+        raw = np.frombuffer(batch.data, dtype=np.uint8)
+        starts = selected['offset'].astype(np.intp) + 7
+        columns = self.decode_array(raw[starts[:, np.newaxis] + np.arange(self.size)])
+        columns['timestamp'] = selected['timestamp']
+        columns['seq'] = selected['seq']
+        return columns
+
+
+# ========== 注册表 ==========
+
+# 与 RadarPacket.fields 共用同一个字典
+DECODERS: Dict[int, PayloadDecoder] = PAYLOAD_DECODERS
+
+
+def register_decoder(decoder: PayloadDecoder) -> PayloadDecoder:
+    DECODERS[decoder.cmd_id] = decoder
+    PACKET_TYPES[decoder.cmd_id] = decoder.name
+    return decoder
+
+
+def get_decoder(cmd_id: int) -> Optional[PayloadDecoder]:
+    return DECODERS.get(cmd_id)
+
+
+def decode_packet(packet: RadarPacket) -> Optional[Dict[str, int]]:
+    """解码单个数据包，未注册的命令或长度不足时返回 None"""
+    decoder = DECODERS.get(packet.cmd_id)
+    if decoder is None:
+        return None
+    return decoder.decode(packet.payload)
+
+
+def decode_batch(batch: PacketBatch) -> Dict[int, Dict[str, np.ndarray]]:
+    """按命令分组解码整个批量，返回 {cmd_id: {字段: 列数组}}"""
+    result = {}
+    for cmd_id in np.unique(batch.records['cmd_id']).tolist():
+        decoder = DECODERS.get(cmd_id)
+        if decoder is not None:
+            result[cmd_id] = decoder.decode_batch(batch)
+    return result
+
+
+# ========== 雷达无线链路命令 ==========
+
+def _position_fields() -> List[Tuple[str, int, str]]:
+    fields = []
+    for i, robot in enumerate(ROBOTS):
+        fields += [(f'{robot}_x', i * 4, 'H'), (f'{robot}_y', i * 4 + 2, 'H')]
+    return fields
+
+
+def _buff_fields() -> List[Tuple[str, int, str]]:
+    fields = []
+    robots = ('hero', 'engineer', 'infantry_3', 'infantry_4', 'sentry')
+    for i, robot in enumerate(robots):
+        base = i * 7
+        fields += [
+            (f'{robot}_recovery', base, 'B'),        # 回血增益 (%)
+            (f'{robot}_cooling', base + 1, 'H'),     # 冷却增益
+            (f'{robot}_defence', base + 3, 'B'),     # 防御增益 (%)
+            (f'{robot}_vulnerability', base + 4, 'B'),  # 负防御增益 (%)
+            (f'{robot}_attack', base + 5, 'H'),      # 攻击增益 (%)
+        ]
+    fields.append(('sentry_posture', 35, 'B'))      # 哨兵当前姿态
+    return fields
+
+
+# 0x0A01: 对方机器人位置 (cm)
+register_decoder(PayloadDecoder(0x0A01, 'enemy_position', _position_fields()))
+
+# 0x0A02: 对方机器人血量 (Offset 8 保留)
+register_decoder(PayloadDecoder(0x0A02, 'enemy_hp', [
+    ('hero_hp', 0, 'H'),
+    ('engineer_hp', 2, 'H'),
+    ('infantry_3_hp', 4, 'H'),
+    ('infantry_4_hp', 6, 'H'),
+    ('sentry_hp', 10, 'H'),
+]))
+
+# 0x0A04: 比赛状态 (部分)
+register_decoder(PayloadDecoder(0x0A04, 'game_state', [
+    ('enemy_coins', 0, 'H'),
+    ('status_bits', 4, 'H'),
+], bitfields=[
+    ('supply_zone', 'status_bits', 0, 1),
+    ('central_highland', 'status_bits', 1, 2),
+    ('fortress', 'status_bits', 4, 2),
+    ('base_buff_point', 'status_bits', 8, 1),
+    ('enemy_tunnel_front', 'status_bits', 9, 1),
+    ('enemy_tunnel_rear', 'status_bits', 10, 1),
+    ('own_tunnel_front', 'status_bits', 11, 1),
+    ('own_tunnel_rear', 'status_bits', 12, 1),
+    ('enemy_highland_buff', 'status_bits', 13, 1),
+    ('enemy_ramp_buff', 'status_bits', 14, 1),
+    ('enemy_road_buff', 'status_bits', 15, 1),
+]))
+
+# 0x0A05: 对方机器人增益 (每个机器人 7 字节，哨兵 8 字节)
+register_decoder(PayloadDecoder(0x0A05, 'enemy_buff', _buff_fields()))
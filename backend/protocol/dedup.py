@@ -0,0 +1,145 @@
+"""
+重复帧去重
+循环发射 (tx_cyclic_buffer) 时同一帧每秒会被解出很多次。
+按 (device_id, cmd_id, seq, crc16) 在时间窗口内去重: 首次出现立即输出，
+之后只周期性输出 "已收到 N 次，最后一次在 t" 的汇总，链路速率仍按全部原始包统计。
+"""
+
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .packet import RadarPacket
+
+
+class _SeenFrame:
+    __slots__ = ('count', 'reported', 'first_seen', 'last_seen', 'last_report')
+
+    def __init__(self, timestamp: float):
+        self.count = 1
+        self.reported = 1          # 已推送过的累计次数
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.last_report = timestamp
+
+
+class _LinkRate:
+    """单条链路的包速率 (按 interval 秒的整窗口计数)"""
+    __slots__ = ('window_start', 'packets', 'unique', 'packet_rate', 'unique_rate')
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.packets = 0
+        self.unique = 0
+        self.packet_rate = 0.0
+        self.unique_rate = 0.0
+
+
+class PacketDeduplicator:
+    """
+    Args:
+        window: 去重窗口 (秒)，同一帧超过该时间未再出现则视为新帧
+        update_interval: 重复计数汇总与链路速率的推送间隔 (秒)
+    """
+
+    def __init__(self, window: float = 2.0, update_interval: float = 1.0):
+        self.window = window
+        self.update_interval = update_interval
+        self._seen: Dict[Tuple, _SeenFrame] = {}
+        self._links: Dict[Hashable, _LinkRate] = {}
+        self._pending: List[dict] = []  # 被新帧记录替换前未推送的重复计数，下次 poll 返回
+
+    def clear(self):
+        self._seen.clear()
+        self._links.clear()
+        self._pending.clear()
+
+    @staticmethod
+    def _repeat(key: Tuple, entry: _SeenFrame) -> dict:
+        device_id, cmd_id, seq, crc16 = key
+        return {
+            "device_id": device_id,
+            "cmd_id": cmd_id,
+            "seq": seq,
+            "crc16": crc16,
+            "count": entry.count,
+            "last_seen": entry.last_seen,
+        }
+
+    def feed(self, device_id: Hashable, packets: Sequence[RadarPacket],
+             now: Optional[float] = None) -> List[RadarPacket]:
+        """
+        输入一批数据包，返回窗口内首次出现的数据包 (需要立即推送的)
+        """
+        if now is None:
+            now = time.time()
+        link = self._links.get(device_id)
+        if link is None:
+            link = self._links[device_id] = _LinkRate(now)
+        link.packets += len(packets)
+
+        fresh = []
+        seen = self._seen
+        for pkt in packets:
+            key = (device_id, pkt.cmd_id, pkt.seq, pkt.crc16)
+            entry = seen.get(key)
+            if entry is not None and pkt.timestamp - entry.last_seen <= self.window:
+                entry.count += 1
+                entry.last_seen = pkt.timestamp
+                continue
+            if entry is not None and entry.count > entry.reported:
+                # 窗口已过但上次 poll 之后的重复次数还没推送: 先记下，不随旧记录丢失
+                self._pending.append(self._repeat(key, entry))
+            seen[key] = _SeenFrame(pkt.timestamp)
+            fresh.append(pkt)
+        link.unique += len(fresh)
+        return fresh
+
+    def poll(self, now: Optional[float] = None) -> Tuple[List[dict], List[dict]]:
+        """
+        周期调用: 返回 (重复计数汇总, 链路速率)，并清理过期的帧记录
+        汇总包含 feed 替换记录前留下的未推送计数 (不受 update_interval 限制)
+
+        Returns:
+            repeats: [{"device_id", "cmd_id", "seq", "crc16", "count", "last_seen"}]
+            rates: [{"device_id", "packet_rate", "unique_rate"}] (每个 update_interval 更新一次)
+        """
+        if now is None:
+            now = time.time()
+
+        repeats = self._pending
+        self._pending = []
+        expired = []
+        for key, entry in self._seen.items():
+            if entry.count > entry.reported and now - entry.last_report >= self.update_interval:
+                repeats.append(self._repeat(key, entry))
+                entry.reported = entry.count
+                entry.last_report = now
+            if now - entry.last_seen > self.window and entry.count == entry.reported:
+                expired.append(key)
+        for key in expired:
+            del self._seen[key]
+
+        rates = []
+        for device_id, link in self._links.items():
+            elapsed = now - link.window_start
+            if elapsed >= self.update_interval:
+                link.packet_rate = link.packets / elapsed
+                link.unique_rate = link.unique / elapsed
+                link.packets = link.unique = 0
+                link.window_start = now
+                rates.append({
+                    "device_id": device_id,
+                    "packet_rate": link.packet_rate,
+                    "unique_rate": link.unique_rate,
+                })
+        return repeats, rates
+
+    def rate(self, device_id: Hashable) -> Tuple[float, float]:
+        """最近一个完整窗口的 (原始包速率, 去重后速率)"""
+        link = self._links.get(device_id)
+        if link is None:
+            return 0.0, 0.0
+        return link.packet_rate, link.unique_rate
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,236 @@
+"""
+雷达协议数据包类型
+- RadarPacket: 单帧，只保存原始帧字节与时间戳，字段按需从帧中解析，hex/JSON 编码惰性计算并缓存
+- PacketBatch: 同一缓冲区解出的多帧，NumPy 结构化数组按列存放帧头字段，帧数据拼接为一块
+"""
+
+import json
+import struct
+import numpy as np
+from typing import Iterator, List, Optional, Sequence, Union
+
+# cmd_id -> 数据包类型名
+PACKET_TYPES = {
+    0x0201: "robot_status",
+    0x0301: "realtime_data",
+}
+
+# cmd_id -> 数据段解码器 (由 protocol.decoders 注册)
+PAYLOAD_DECODERS = {}
+
+_U16 = struct.Struct('<H')
+
+
+class RadarPacket:
+    """
+    单个数据包 (不可变)
+    Frame Format:
+    SOF(1) + Len(2) + Seq(1) + CRC8(1) + CmdID(2) + Data(N) + CRC16(2)
+    """
+
+    __slots__ = ('frame_bytes', 'timestamp', 'is_valid', '_hex', '_fields', '_json_key', '_json')
+
+    def __init__(self, frame_bytes: bytes, timestamp: float, is_valid: bool = True):
+        init = object.__setattr__
+        init(self, 'frame_bytes', frame_bytes)
+        init(self, 'timestamp', timestamp)
+        init(self, 'is_valid', is_valid)
+        init(self, '_hex', None)
+        init(self, '_fields', False)
+        init(self, '_json_key', None)
+        init(self, '_json', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"RadarPacket is immutable (cannot set '{name}')")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"RadarPacket is immutable (cannot delete '{name}')")
+
+    def __eq__(self, other):
+        if not isinstance(other, RadarPacket):
+            return NotImplemented
+        return (self.frame_bytes == other.frame_bytes and self.timestamp == other.timestamp
+                and self.is_valid == other.is_valid)
+
+    def __hash__(self):
+        return hash((self.frame_bytes, self.timestamp, self.is_valid))
+
+    def __repr__(self):
+        return (f"RadarPacket(cmd_id=0x{self.cmd_id:04X}, seq={self.seq}, "
+                f"data_length={self.data_length}, timestamp={self.timestamp:.3f})")
+
+    # ---------- 帧头字段 (从 frame_bytes 直接读取) ----------
+
+    @property
+    def data_length(self) -> int:
+        return _U16.unpack_from(self.frame_bytes, 1)[0]
+
+    @property
+    def seq(self) -> int:
+        return self.frame_bytes[3]
+
+    @property
+    def crc8(self) -> int:
+        return self.frame_bytes[4]
+
+    @property
+    def cmd_id(self) -> int:
+        return _U16.unpack_from(self.frame_bytes, 5)[0]
+
+    @property
+    def payload(self) -> memoryview:
+        """frame_bytes 的只读视图，需要独立副本时用 bytes(payload)"""
+        return memoryview(self.frame_bytes)[7:7 + self.data_length]
+
+    @property
+    def crc16(self) -> int:
+        return _U16.unpack_from(self.frame_bytes, len(self.frame_bytes) - 2)[0]
+
+    @property
+    def packet_type(self) -> str:
+        return PACKET_TYPES.get(self.cmd_id, "unknown")
+
+    # ---------- 编码 (惰性缓存) ----------
+
+    @property
+    def hex_string(self) -> str:
+        if self._hex is None:
+            object.__setattr__(self, '_hex', self.frame_bytes.hex().upper())
+        return self._hex
+
+    @property
+    def fields(self) -> Optional[dict]:
+        """已注册命令的解码字段 (未注册或长度不足时为 None)"""
+        if self._fields is False:
+            decoder = PAYLOAD_DECODERS.get(self.cmd_id)
+            object.__setattr__(self, '_fields', decoder.decode(self.payload) if decoder else None)
+        return self._fields
+
+    def to_dict(self, device_id: Optional[str] = None) -> dict:
+        """
+        WebSocket 推送的字段 (每次返回新 dict)
+        已注册命令携带解码后的 fields，其余命令携带原始 hex
+        """
+        data = {"type": "packet"}
+        if device_id is not None:
+            data["device_id"] = device_id
+        data["timestamp"] = self.timestamp
+        data["cmd_id"] = self.cmd_id
+        data["seq"] = self.seq
+        data["packet_type"] = self.packet_type
+        data["is_valid"] = self.is_valid
+        fields = self.fields
+        if fields is not None:
+            data["fields"] = dict(fields)
+        else:
+            data["hex"] = self.hex_string
+        return data
+
+    def to_json(self, device_id: Optional[str] = None) -> str:
+        """to_dict 的 JSON 字符串，按 device_id 缓存"""
+        if self._json is None or self._json_key != device_id:
+            object.__setattr__(self, '_json', json.dumps(self.to_dict(device_id)))
+            object.__setattr__(self, '_json_key', device_id)
+        return self._json
+
+
+# PacketBatch 每帧一条记录
+PACKET_DTYPE = np.dtype([
+    ('timestamp', np.float64),
+    ('cmd_id', np.uint16),
+    ('seq', np.uint8),
+    ('data_length', np.uint16),
+    ('crc16', np.uint16),
+    ('offset', np.uint32),   # 帧在 data 中的起始位置
+    ('length', np.uint16),   # 帧总字节数
+])
+
+
+class PacketBatch:
+    """
+    列式数据包集合
+
+    records 为 PACKET_DTYPE 结构化数组，所有帧字节拼接在 data 中。
+    切片/筛选只生成新的记录数组，共享同一块 data。
+    """
+
+    __slots__ = ('records', 'data')
+
+    def __init__(self, records: np.ndarray, data: bytes):
+        self.records = records
+        self.data = data
+
+    @classmethod
+    def empty(cls) -> 'PacketBatch':
+        return cls(np.zeros(0, dtype=PACKET_DTYPE), b'')
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[bytes], timestamp: Union[float, np.ndarray]) -> 'PacketBatch':
+        """由已校验的帧字节构造 (timestamp 可为标量或逐帧数组)"""
+        if not frames:
+            return cls.empty()
+        data = b''.join(frames)
+        lengths = np.fromiter(map(len, frames), dtype=np.intp, count=len(frames))
+        offsets = np.zeros(len(frames), dtype=np.intp)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+
+        # 帧头字段按列一次性取出
+        raw = np.frombuffer(data, dtype=np.uint8)
+        records = np.empty(len(frames), dtype=PACKET_DTYPE)
+        records['timestamp'] = timestamp
+        records['data_length'] = raw[offsets + 1] | (raw[offsets + 2].astype(np.uint16) << 8)
+        records['seq'] = raw[offsets + 3]
+        records['cmd_id'] = raw[offsets + 5] | (raw[offsets + 6].astype(np.uint16) << 8)
+        end = offsets + lengths
+        records['crc16'] = raw[end - 2] | (raw[end - 1].astype(np.uint16) << 8)
+        records['offset'] = offsets
+        records['length'] = lengths
+        return cls(records, data)
+
+    @classmethod
+    def from_packets(cls, packets: Sequence[RadarPacket]) -> 'PacketBatch':
+        return cls.from_frames([p.frame_bytes for p in packets],
+                               np.array([p.timestamp for p in packets], dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        """整数索引返回 RadarPacket，切片/布尔掩码/索引数组返回 PacketBatch"""
+        if isinstance(index, (int, np.integer)):
+            rec = self.records[index]
+            return RadarPacket(self.frame(index), float(rec['timestamp']))
+        return PacketBatch(self.records[index], self.data)
+
+    def __iter__(self) -> Iterator[RadarPacket]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def frame(self, index: int) -> bytes:
+        offset = int(self.records['offset'][index])
+        return self.data[offset:offset + int(self.records['length'][index])]
+
+    def payload(self, index: int) -> memoryview:
+        offset = int(self.records['offset'][index]) + 7
+        return memoryview(self.data)[offset:offset + int(self.records['data_length'][index])]
+
+    def select(self, cmd_id: int) -> 'PacketBatch':
+        """筛选指定命令的数据包"""
+        return self[self.records['cmd_id'] == cmd_id]
+
+    def payload_matrix(self) -> np.ndarray:
+        """
+        所有 payload 组成的 (N, data_length) uint8 矩阵 (要求长度一致，如同一命令)
+        """
+        if len(self) == 0:
+            return np.zeros((0, 0), dtype=np.uint8)
+        lengths = self.records['data_length']
+        width = int(lengths[0])
+        if np.any(lengths != width):
+            raise ValueError("payload_matrix requires packets with equal data_length")
+        raw = np.frombuffer(self.data, dtype=np.uint8)
+        starts = self.records['offset'].astype(np.intp) + 7
+        return raw[starts[:, np.newaxis] + np.arange(width)]
+
+    def to_packets(self) -> List[RadarPacket]:
+        return list(self)
@@ -1,28 +1,102 @@
 
-import struct
 import numpy as np
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 import time
 
-from .crc import verify_crc8_check_sum, verify_crc16_check_sum
+from .crc import (BATCH_MIN_CANDIDATES, Crc16, crc8_span, crc16_span,
+                  verify_crc8_batch, verify_crc16_batch)
+from .symbol_codec import slice_symbols, symbols_to_bytes
+from .packet import RadarPacket, PacketBatch
 
-@dataclass
-class RadarPacket:
-    timestamp: float
-    data_length: int
-    seq: int
-    crc8: int
-    cmd_id: int
-    payload: bytes
-    crc16: int
-    frame_bytes: bytes
-    packet_type: str = "unknown"
-    is_valid: bool = False
+def _match_pattern(buf: np.ndarray, pattern: np.ndarray) -> np.ndarray:
+    """
+    滑动窗口模式匹配: hit[i] 表示 buf[i:i+4] 每个符号与 pattern 的偏差都小于 1
+    (逐偏移取最大偏差，不生成 N x 4 中间矩阵)
+    """
+    n = len(buf) - len(pattern) + 1
+    if n <= 0:
+        return np.zeros(0, dtype=bool)
+    dev = np.abs(buf[:n] - pattern[0])
+    for k in range(1, len(pattern)):
+        np.maximum(dev, np.abs(buf[k:k + n] - pattern[k]), out=dev)
+    return dev < 1.0
+
+
+class SymbolRingBuffer:
+    """
+    定长 float32 符号环形缓冲区
     
+    存储区为 2 x capacity 的镜像布局 (每个符号同时写入 i 与 i + capacity)，
+    任意不超过 capacity 的连续区间都可以零拷贝地以一维视图读取。
+    写满时丢弃最旧的符号，dropped 记录累计丢弃数。
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=np.float32)
+        self._read = 0    # 最旧符号的逻辑位置
+        self._write = 0   # 下一个写入的逻辑位置
+        self.dropped = 0
+        
+    def __len__(self) -> int:
+        return self._write - self._read
+        
     @property
-    def hex_string(self) -> str:
-        return self.frame_bytes.hex().upper()
+    def position(self) -> int:
+        """最旧符号在整个输入流中的位置"""
+        return self._read
+        
+    def clear(self):
+        self._read = self._write = 0
+        
+    def append(self, symbols: np.ndarray):
+        """写入符号，超出容量时丢弃最旧的部分"""
+        n = len(symbols)
+        if n > self.capacity:
+            # 旧内容与超出部分整体丢弃，逻辑位置仍按全部输入推进
+            skip = n - self.capacity
+            self.dropped += len(self) + skip
+            self._write += skip
+            self._read = self._write
+            symbols = symbols[skip:]
+            n = self.capacity
+        
+        overflow = len(self) + n - self.capacity
+        if overflow > 0:
+            self.dropped += overflow
+            self._read += overflow
+        
+        cap = self.capacity
+        idx = self._write % cap
+        first = min(n, cap - idx)
+        self._data[idx:idx + first] = symbols[:first]
+        self._data[cap + idx:cap + idx + first] = symbols[:first]
+        if first < n:
+            self._data[:n - first] = symbols[first:]
+            self._data[cap:cap + n - first] = symbols[first:]
+        self._write += n
+        
+    def view(self) -> np.ndarray:
+        """当前全部符号的只读连续视图 (下次写入前有效)"""
+        start = self._read % self.capacity
+        out = self._data[start:start + len(self)]
+        out.flags.writeable = False
+        return out
+        
+    def consume(self, n: int):
+        """丢弃最旧的 n 个符号"""
+        self._read += min(int(n), len(self))
+
+
+@dataclass
+class _PartialFrame:
+    """等待剩余数据的帧: 已校验 Header，CRC16 已累计到 absorbed 字节"""
+    position: int      # 帧起点在输入流中的绝对位置
+    total_len: int
+    absorbed: int
+    crc: Crc16
+
 
 class PacketParser:
     """
@@ -34,123 +108,262 @@ class PacketParser:
     SOF = 0xA5
     HEADER_SIZE = 5 # SOF + Len + Seq + CRC8
     MIN_FRAME_SIZE = 9 # Header(5) + Cmd(2) + CRC16(2) (Empty Data)
+    MAX_DATA_LEN = 256
+    # 字节缓冲区达到此长度时改用 NumPy 批量校验
+    BATCH_MIN_BYTES = 16384
+    # 读游标之前的已处理数据累计到此长度才压缩
+    COMPACT_THRESHOLD = 65536
+    
+    # Preamble: [3, 1, -1, -3] (0xE4)
+    PREAMBLE_PATTERN = np.array([3.0, 1.0, -1.0, -3.0], dtype=np.float32)
+    # SOF: 0xA5 (10 10 01 01) -> [1, 1, -1, -1]
+    SOF_PATTERN = np.array([1.0, 1.0, -1.0, -1.0], dtype=np.float32)
+    SYNC_SYMBOLS = 8  # Preamble 字节 + SOF
+    
+    # 符号缓冲区上限 (最长帧 265 字节 = 1060 符号)
+    SYMBOL_BUFFER_CAPACITY = 8192
     
     def __init__(self):
         self._buffer = bytearray()
-        self._symbol_buffer = []  # For symbol stream processing
+        self._read_pos = 0       # _buffer 中下一个未处理字节的位置
+        self._symbol_ring = SymbolRingBuffer(self.SYMBOL_BUFFER_CAPACITY)  # For symbol stream processing
+        self._byte_position = 0  # _buffer[0] 在字节流中的绝对位置
+        # 未完成帧的 CRC 累计状态，新数据到达时只计算新增部分
+        self._byte_partial: Optional[_PartialFrame] = None
+        self._symbol_partial: Optional[_PartialFrame] = None
         
     def clear(self):
         self._buffer.clear()
-        self._symbol_buffer = []
+        self._read_pos = 0
+        self._symbol_ring.clear()
+        self._byte_position = 0
+        self._byte_partial = None
+        self._symbol_partial = None
+        
+    @property
+    def has_pending_frame(self) -> bool:
+        """缓冲区是否以 SOF 开头 (正在等待一帧的剩余字节)"""
+        return len(self._buffer) > self._read_pos and self._buffer[self._read_pos] == self.SOF
         
     def feed_bytes(self, data: bytes) -> List[RadarPacket]:
         """处理字节流，返回解析出的数据包"""
+        frames = self._feed_bytes_frames(data)
+        if not frames:
+            return []
+        timestamp = time.time()
+        return [RadarPacket(frame, timestamp) for frame in frames]
+    
+    def feed_bytes_batch(self, data: bytes) -> PacketBatch:
+        """同 feed_bytes，结果以列式 PacketBatch 返回"""
+        frames = self._feed_bytes_frames(data)
+        if not frames:
+            return PacketBatch.empty()
+        return PacketBatch.from_frames(frames, time.time())
+    
+    def _feed_bytes_frames(self, data: bytes) -> List[bytes]:
+        """处理字节流，返回通过校验的完整帧"""
         if not data:
             return []
             
-        self._buffer.extend(data)
-        packets = []
+        self._buffer += data
+        start = self._read_pos
+        if len(self._buffer) - start < self.MIN_FRAME_SIZE:
+            return []
+        if len(self._buffer) - start < self.BATCH_MIN_BYTES:
+            return self._scan_small()
         
-        while len(self._buffer) >= self.MIN_FRAME_SIZE:
-            # 1. 查找 SOF
-            try:
-                sof_index = self._buffer.index(self.SOF)
-                # 丢弃 SOF 之前的数据
-                if sof_index > 0:
-                    del self._buffer[:sof_index]
-            except ValueError:
-                # 没找到 SOF，保留最后几个字节
-                if len(self._buffer) > self.MIN_FRAME_SIZE:
-                     del self._buffer[:-self.MIN_FRAME_SIZE]
-                break
-                
-            # 再次检查长度
-            if len(self._buffer) < self.HEADER_SIZE:
+        # 1. 大块: 从读游标开始一次性找出全部 SOF 候选，批量查表校验 Header CRC8 / 整帧 CRC16
+        base = self._byte_position + start
+        with memoryview(self._buffer) as buffer_view:
+            view = buffer_view[start:]
+            block = np.frombuffer(view, dtype=np.uint8)
+            candidates = np.flatnonzero(block == self.SOF)
+            frames, waiting, self._byte_partial = self._find_frames(
+                block, candidates, 1, base, self._byte_partial)
+            del block  # 释放缓冲区导出，之后才能修改 bytearray
+            
+            # 每帧只从缓冲区拷贝一次，RadarPacket 的 payload 为该帧的视图
+            frame_list = [view[pos:pos + total_len].tobytes() for pos, total_len in frames]
+            view.release()
+        
+        # 2. 推进读游标 (保留未完成的候选帧)，只在必要时压缩缓冲区
+        self._read_pos = start + waiting if waiting is not None else len(self._buffer)
+        self._compact()
+        return frame_list
+    
+    def _compact(self):
+        """丢弃读游标之前的数据: 全部读完时直接清空，否则累计到阈值再移动"""
+        if self._read_pos == len(self._buffer) or self._read_pos >= self.COMPACT_THRESHOLD:
+            del self._buffer[:self._read_pos]
+            self._byte_position += self._read_pos
+            self._read_pos = 0
+    
+    def _scan_small(self) -> List[bytes]:
+        """
+        小块: 原有的 find + 删除前缀逐帧标量校验 (bytearray 删除前缀不移动数据)，
+        不建 memoryview / 候选数组，每次调用没有额外的固定开销；未完成帧下次整帧重算 CRC16
+        """
+        buf = self._buffer
+        dropped = self._read_pos
+        if dropped:
+            del buf[:dropped]
+            self._read_pos = 0
+        self._byte_partial = None
+        sof = self.SOF
+        frames = []
+        while len(buf) >= self.MIN_FRAME_SIZE:
+            pos = buf.find(sof)
+            if pos < 0:
+                dropped += len(buf)
+                del buf[:]
                 break
-                
-            # 2. 预读 Header
-            header_bytes = self._buffer[:self.HEADER_SIZE]
-            if not verify_crc8_check_sum(header_bytes, self.HEADER_SIZE):
-                # CRC8 失败，跳过这个字节
-                del self._buffer[0]
+            if pos:
+                del buf[:pos]
+                dropped += pos
+                if len(buf) < self.MIN_FRAME_SIZE:
+                    break
+            if crc8_span(buf, 0, self.HEADER_SIZE) != 0:
+                del buf[0]
+                dropped += 1
                 continue
-                
-            # 3. 解析 Length
-            data_len = struct.unpack('<H', header_bytes[1:3])[0]
-            
-            # 合理性检查：最大数据长度检查
-            MAX_DATA_LEN = 256
-            if data_len > MAX_DATA_LEN:
-                del self._buffer[0]
+            data_len = buf[1] | (buf[2] << 8)
+            if data_len > self.MAX_DATA_LEN:
+                del buf[0]
+                dropped += 1
                 continue
-            
-            # Header(5) + Cmd(2) + Data(Len) + CRC16(2)
             total_len = self.HEADER_SIZE + 2 + data_len + 2
-            
-            # 4. 检查缓冲区是否有完整包
-            if len(self._buffer) < total_len:
+            if len(buf) < total_len:
                 break
-                
-            # 5. 校验 CRC16
-            frame_bytes = self._buffer[:total_len]
-            if verify_crc16_check_sum(frame_bytes, total_len):
-                packet = self._parse_frame(frame_bytes)
-                if packet:
-                    packets.append(packet)
-                
-                # 移除已处理的包
-                del self._buffer[:total_len]
+            if crc16_span(buf, 0, total_len) == 0:
+                frames.append(bytes(buf[:total_len]))
+                del buf[:total_len]
+                dropped += total_len
             else:
-                # CRC16 失败 (不打印日志)
-                del self._buffer[0]
+                del buf[0]
+                dropped += 1
+        self._byte_position += dropped
+        return frames
+    
+    def _find_frames(self, block: np.ndarray, candidates: np.ndarray, stride: int,
+                     base: int, partial: Optional[_PartialFrame]
+                     ) -> Tuple[List[Tuple[int, int]], Optional[int], Optional[_PartialFrame]]:
+        """
+        批量校验数据块中的全部 SOF 候选
+        
+        Args:
+            block: uint8 数据块，帧的第 k 字节位于 block[pos + k * stride]
+            candidates: 升序的 SOF 位置
+            stride: 字节间隔 (字节流为 1，逐符号打包的字节为 4)
+            base: block[0] 在输入流中的绝对位置
+            partial: 上次未完成帧的 CRC 状态
+        
+        Returns:
+            (frames, waiting, partial)
+            frames: 通过 CRC16 的帧 [(pos, 字节数)]，互不重叠
+            waiting: 第一个数据不足、需等待后续输入的候选位置 (无则 None)
+            partial: waiting 帧的 CRC 状态 (Header 尚不完整时为 None)
+        """
+        n = len(block)
+        if len(candidates) < BATCH_MIN_CANDIDATES:
+            # 候选很少时逐个校验，避免 NumPy 批量调用的固定开销
+            return self._walk_frames(memoryview(block), candidates.tolist(), stride, base, partial)
+        header_span = (self.HEADER_SIZE - 1) * stride
+        
+        # Header 不完整的候选 (位于末尾)
+        split = int(np.searchsorted(candidates, n - header_span, side='left'))
+        pending = candidates[split:]
+        heads = candidates[:split]
+        
+        # CRC8 只对 Header 完整的候选批量计算
+        heads = heads[verify_crc8_batch(block, heads, self.HEADER_SIZE, stride)]
+        data_len = block[heads + stride].astype(np.intp) | (block[heads + 2 * stride].astype(np.intp) << 8)
+        keep = data_len <= self.MAX_DATA_LEN
+        heads, data_len = heads[keep], data_len[keep]
+        total_len = self.HEADER_SIZE + 2 + data_len + 2
+        
+        # CRC16 只对 Header 通过且整帧已到达的候选计算
+        complete = heads + (total_len - 1) * stride < n
+        crc_ok = np.zeros(len(heads), dtype=bool)
+        crc_ok[complete] = verify_crc16_batch(block, heads[complete], total_len[complete], stride)
+        
+        frames = []
+        waiting = None
+        consumed = 0
+        for pos, length, done, ok in zip(heads.tolist(), total_len.tolist(),
+                                         complete.tolist(), crc_ok.tolist()):
+            if pos < consumed:
                 continue
-                
-        return packets
+            if not done:
+                waiting = pos
+                break
+            if ok:
+                frames.append((pos, length))
+                consumed = pos + length * stride
+        
+        if waiting is None:
+            rest = pending[pending >= consumed]
+            if len(rest):
+                waiting = int(rest[0])
+        return frames, waiting, None
     
-    def _parse_frame(self, frame_bytes: bytes) -> Optional[RadarPacket]:
-        try:
-            # Header
-            data_len = struct.unpack('<H', frame_bytes[1:3])[0]
-            seq = frame_bytes[3]
-            crc8 = frame_bytes[4]
-            
-            # Body
-            cmd_id = struct.unpack('<H', frame_bytes[5:7])[0]
-            payload = frame_bytes[7:7+data_len]
-            
-            # Tail
-            crc16 = struct.unpack('<H', frame_bytes[-2:])[0]
-            
-            # Identify Packet Type
-            packet_type = "unknown"
-            if cmd_id == 0x0201:
-                packet_type = "robot_status"
-            elif cmd_id == 0x0301:
-                packet_type = "realtime_data"
+    def _walk_frames(self, view: memoryview, candidates: Iterable[int], stride: int,
+                     base: int, partial: Optional[_PartialFrame]
+                     ) -> Tuple[List[Tuple[int, int]], Optional[int], Optional[_PartialFrame]]:
+        """
+        _find_frames 的标量版本 (结果相同)，只校验实际访问到的候选
+        未完成帧的 CRC16 边到达边累计，下次从 partial 继续
+        """
+        n = len(view)
+        header_span = (self.HEADER_SIZE - 1) * stride
+        frames = []
+        consumed = 0
+        for pos in candidates:
+            if pos < consumed:
+                continue
+            if partial is not None and partial.position == base + pos:
+                # 上次等待的帧: Header 已校验，CRC16 从已累计处继续
+                total_len, absorbed, crc = partial.total_len, partial.absorbed, partial.crc
+            else:
+                if pos + header_span >= n:
+                    return frames, pos, None
+                if crc8_span(view, pos, self.HEADER_SIZE, stride) != 0:
+                    continue
+                data_len = view[pos + stride] | (view[pos + 2 * stride] << 8)
+                if data_len > self.MAX_DATA_LEN:
+                    continue
+                total_len = self.HEADER_SIZE + 2 + data_len + 2
+                absorbed, crc = 0, Crc16()
             
-            return RadarPacket(
-                timestamp=time.time(),
-                data_length=data_len,
-                seq=seq,
-                crc8=crc8,
-                cmd_id=cmd_id,
-                payload=payload,
-                crc16=crc16,
-                frame_bytes=frame_bytes,
-                packet_type=packet_type,
-                is_valid=True
-            )
-        except Exception as e:
-            print(f"Parse error: {e}")
-            return None
-
+            available = min(total_len, (n - 1 - pos) // stride + 1)
+            crc.update(view[pos + absorbed * stride:pos + available * stride:stride])
+            if available < total_len:
+                return frames, pos, _PartialFrame(base + pos, total_len, available, crc)
+            if crc.value == 0:
+                frames.append((pos, total_len))
+                consumed = pos + total_len * stride
+        return frames, None, None
+    
     _debug_counter = 0  # Class variable for debug frequency control
     
     def feed_symbols(self, symbols: np.ndarray) -> List[RadarPacket]:
         """
         输入解调后的符号数据，返回检测到的数据包
-        包含 Preamble 跳转和 SOF 搜索逻辑
+        符号写入定长环形缓冲区，Preamble + SOF 用滑动窗口一次性找出全部候选帧头
         """
+        frames = self._feed_symbols_frames(symbols)
+        if not frames:
+            return []
+        timestamp = time.time()
+        return [RadarPacket(frame, timestamp) for frame in frames]
+    
+    def feed_symbols_batch(self, symbols: np.ndarray) -> PacketBatch:
+        """同 feed_symbols，结果以列式 PacketBatch 返回"""
+        frames = self._feed_symbols_frames(symbols)
+        if not frames:
+            return PacketBatch.empty()
+        return PacketBatch.from_frames(frames, time.time())
+    
+    def _feed_symbols_frames(self, symbols: np.ndarray) -> List[bytes]:
         if len(symbols) == 0:
             return []
         
@@ -159,144 +372,63 @@ class PacketParser:
         if PacketParser._debug_counter % 500 == 0:
             sample = symbols[:8] if len(symbols) >= 8 else symbols
             print(f"[Parser Debug] Symbol sample (first 8): {[f'{s:.2f}' for s in sample]}")
-            print(f"[Parser Debug] Buffer size: {len(self._symbol_buffer)}")
-            
-        self._symbol_buffer.extend(symbols.tolist())
-        packets = []
+            print(f"[Parser Debug] Buffer size: {len(self._symbol_ring)}")
         
-        # Preamble: [3, 1, -1, -3] (0xE4)
-        PREAMBLE_PATTERN = [3.0, 1.0, -1.0, -3.0]
-        # SOF: 0xA5 (10 10 01 01) -> [1, 1, -1, -1]
-        SOF_PATTERN = [1.0, 1.0, -1.0, -1.0]
+        symbols = np.asarray(symbols, dtype=np.float32)
+        frame_list = []
+        # 按半个缓冲区分批写入，保证等待中的帧不会被新数据挤掉
+        step = self._symbol_ring.capacity // 2
+        for start in range(0, len(symbols), step):
+            self._symbol_ring.append(symbols[start:start + step])
+            frame_list.extend(self._scan_symbols())
+        return frame_list
+
+    def _scan_symbols(self) -> List[bytes]:
+        """在环形缓冲区当前内容中解析所有完整帧，并丢弃不再需要的符号"""
+        buf = self._symbol_ring.view()
+        n = len(buf)
+        frame_list = []
+        if n < self.SYNC_SYMBOLS:
+            return frame_list
         
-        while True:
-            if len(self._symbol_buffer) < 36: 
-                break
-                
-            # 1. 查找 Preamble
-            found_preamble = False
-            preamble_idx = -1
-            
-            search_len = len(self._symbol_buffer) - 20
-            buffer_view = self._symbol_buffer
-            
-            for i in range(search_len):
-                if (abs(buffer_view[i] - PREAMBLE_PATTERN[0]) < 1.0 and
-                    abs(buffer_view[i+1] - PREAMBLE_PATTERN[1]) < 1.0 and
-                    abs(buffer_view[i+2] - PREAMBLE_PATTERN[2]) < 1.0 and
-                    abs(buffer_view[i+3] - PREAMBLE_PATTERN[3]) < 1.0):
-                    preamble_idx = i
-                    found_preamble = True
-                    break
-            
-            if not found_preamble:
-                keep_len = 20 
-                if len(self._symbol_buffer) > keep_len:
-                    self._symbol_buffer = self._symbol_buffer[-keep_len:]
-                break
-            
-            # 2. 跳过 Preamble 序列，找到 SOF
-            pos = preamble_idx
-            while pos + 4 <= len(self._symbol_buffer) - 4:
-                # 检查是否还是 Preamble
-                is_preamble = (
-                    abs(buffer_view[pos] - PREAMBLE_PATTERN[0]) < 1.0 and
-                    abs(buffer_view[pos+1] - PREAMBLE_PATTERN[1]) < 1.0 and
-                    abs(buffer_view[pos+2] - PREAMBLE_PATTERN[2]) < 1.0 and
-                    abs(buffer_view[pos+3] - PREAMBLE_PATTERN[3]) < 1.0
-                )
-                if is_preamble:
-                    pos += 4
-                    continue
-                
-                # 检查是否是 SOF
-                is_sof = (
-                    abs(buffer_view[pos] - SOF_PATTERN[0]) < 1.0 and
-                    abs(buffer_view[pos+1] - SOF_PATTERN[1]) < 1.0 and
-                    abs(buffer_view[pos+2] - SOF_PATTERN[2]) < 1.0 and
-                    abs(buffer_view[pos+3] - SOF_PATTERN[3]) < 1.0
-                )
-                if is_sof:
-                    break
-                else:
-                    pos += 1
-            
-            if pos > 0:
-                self._symbol_buffer = self._symbol_buffer[pos:]
-            
-            # 3. 提取 Header
-            if len(self._symbol_buffer) < 20:
-                break
-                
-            header_symbols = self._symbol_buffer[:20]
-            header_bytes = self._symbols_to_bytes(header_symbols)
-            
-            if not verify_crc8_check_sum(header_bytes, 5):
-                # Debug: 每 500 次 CRC8 失败打印一次 
-                if PacketParser._debug_counter % 500 == 1:
-                    print(f"[Parser Debug] CRC8 failed. Header: {header_bytes.hex().upper()}, symbols: {[f'{s:.1f}' for s in header_symbols[:8]]}")
-                self._symbol_buffer.pop(0)
-                continue
-                
-            data_len = struct.unpack('<H', header_bytes[1:3])[0]
-            
-            # MAX LENGTH CHECK
-            if data_len > 256:
-                self._symbol_buffer.pop(0)
-                continue
-            
-            total_len_bytes = 5 + 2 + data_len + 2
-            total_len_symbols = total_len_bytes * 4
-            
-            if len(self._symbol_buffer) < total_len_symbols:
-                break
-                
-            # 提取整帧
-            frame_symbols = self._symbol_buffer[:total_len_symbols]
-            frame_bytes = self._symbols_to_bytes(frame_symbols)
-            
-            if verify_crc16_check_sum(frame_bytes, total_len_bytes):
-                packet = self._parse_frame(frame_bytes)
-                if packet:
-                    packets.append(packet)
-                self._symbol_buffer = self._symbol_buffer[total_len_symbols:]
-            else:
-                self._symbol_buffer.pop(0)
+        # 帧头候选: Preamble 字节之后紧跟 SOF 的位置 (Header 起点)
+        preamble_hit = _match_pattern(buf, self.PREAMBLE_PATTERN)
+        sof_hit = _match_pattern(buf, self.SOF_PATTERN)
+        candidates = np.flatnonzero(preamble_hit[:-4] & sof_hit[4:]) + 4
+        frames, waiting = [], None
+        if len(candidates):
+            frames, waiting = self._unpack_frames(buf, candidates)
+        consumed = 0
+        for pos, frame_bytes in frames:
+            frame_list.append(frame_bytes)
+            consumed = pos + len(frame_bytes) * 4
         
-        return packets
+        if waiting is not None:
+            # 保留候选前的 Preamble 字节，下次重新检测
+            keep_from = waiting - 4
+        else:
+            # 末尾不足 Preamble + SOF 的符号可能属于下一个帧头
+            keep_from = max(consumed, n - (self.SYNC_SYMBOLS - 1))
+        self._symbol_ring.consume(keep_from)
+        return frame_list
 
-    def _symbols_to_bytes(self, symbols: list) -> bytes:
+    def _unpack_frames(self, buf: np.ndarray, candidates: np.ndarray):
+        """符号缓冲区逐符号打包为字节后批量校验候选帧，返回 ([(pos, frame_bytes)], waiting)"""
+        # packed[i] = 从符号 i 开始的 4 个符号打包成的字节，帧字节间隔为 4
+        indices = slice_symbols(buf)
+        packed = indices[:-3] << 6
+        packed |= indices[1:-2] << 4
+        packed |= indices[2:-1] << 2
+        packed |= indices[3:]
+        
+        frames, waiting, self._symbol_partial = self._find_frames(
+            packed, candidates, 4, self._symbol_ring.position, self._symbol_partial)
+        return ([(pos, packed[pos:pos + total_len * 4:4].tobytes()) for pos, total_len in frames],
+                waiting)
+
+    def _symbols_to_bytes(self, symbols: np.ndarray) -> bytes:
         """
         将符号流转换为字节流
-        Mapping: 3->11, 1->10, -1->01, -3->00
+        Mapping: 3->11, 1->10, -1->01, -3->00 (symbol 0 -> bits 7,6)
         """
-        byte_data = []
-        num_bytes = len(symbols) // 4
-        
-        for i in range(num_bytes):
-            byte_val = 0
-            # Process 4 symbols for 1 byte (2 bits per symbol)
-            # From earlier files, it seems symbols are coming in order:
-            # symbol 0 -> bits 7,6
-            # symbol 1 -> bits 5,4
-            # symbol 2 -> bits 3,2
-            # symbol 3 -> bits 1,0
-            # (Assuming standard packing)
-            
-            for j in range(4):
-                sym = symbols[i * 4 + j]
-                bits = 0
-                if sym > 2.0:   # 3
-                    bits = 0b11
-                elif sym > 0.0: # 1
-                    bits = 0b10
-                elif sym > -2.0: # -1
-                    bits = 0b01
-                else:           # -3
-                    bits = 0b00
-                
-                byte_val = (byte_val << 2) | bits
-                
-            byte_data.append(byte_val)
-            
-        return bytes(byte_data)
+        return symbols_to_bytes(np.asarray(symbols, dtype=np.float32)).tobytes()
@@ -0,0 +1,112 @@
+"""
+4-FSK 符号/字节编解码
+Mapping: 00->-3, 01->-1, 10->1, 11->3，每字节 4 个符号，高位在前
+
+解调器、协议解析器与信号发生器共用，全部为矢量化实现，
+支持写入调用方提供的缓冲区 (ndarray / bytearray / memoryview) 以避免拷贝
+"""
+
+import numpy as np
+from typing import Optional, Union
+
+# 符号索引 -> 频偏电平
+SYMBOL_LEVELS = np.array([-3.0, -1.0, 1.0, 3.0], dtype=np.float32)
+
+# 判决门限 (与原 sym > 2 / > 0 / > -2 判决一致): <= -2 -> 0, (-2, 0] -> 1, (0, 2] -> 2, > 2 -> 3
+_THRESHOLDS = np.array([-2.0, 0.0, 2.0], dtype=np.float32)
+
+# 4 个 2-bit 索引打包为 1 字节的权重 (symbol 0 -> bits 7,6)
+_PACK_WEIGHTS = np.array([64, 16, 4, 1], dtype=np.uint8)
+
+# 字节 -> 4 个符号索引 / 电平查找表
+_BYTE_TO_INDICES = ((np.arange(256, dtype=np.uint8)[:, np.newaxis] >>
+                     np.array([6, 4, 2, 0], dtype=np.uint8)) & 0x03).astype(np.uint8)
+_BYTE_TO_LEVELS = SYMBOL_LEVELS[_BYTE_TO_INDICES]
+
+Buffer = Union[np.ndarray, bytearray, memoryview]
+
+
+def _as_array(out: Buffer, dtype, n: int) -> np.ndarray:
+    """将调用方缓冲区视为指定类型的 ndarray (零拷贝) 并截取前 n 个元素"""
+    arr = out if isinstance(out, np.ndarray) else np.frombuffer(out, dtype=dtype)
+    if arr.dtype != dtype:
+        raise TypeError(f"output buffer must be {np.dtype(dtype).name}, got {arr.dtype}")
+    if len(arr) < n:
+        raise ValueError(f"output buffer too small: need {n}, got {len(arr)}")
+    return arr[:n]
+
+
+def _as_rows(arr: np.ndarray, n_rows: int) -> np.ndarray:
+    """以 (n_rows, 4) 视图访问输出缓冲区 (不允许隐式拷贝，否则写入会丢失)"""
+    rows = arr.view()
+    rows.shape = (n_rows, 4)
+    return rows
+
+
+def slice_symbols(soft: np.ndarray, out: Optional[Buffer] = None) -> np.ndarray:
+    """
+    硬判决为 2-bit 符号索引 (0..3)
+
+    Args:
+        soft: 软符号值 (任意实数类型)
+        out: 可选 uint8 输出缓冲区
+
+    Returns:
+        uint8 索引数组
+    """
+    indices = np.searchsorted(_THRESHOLDS, np.asarray(soft, dtype=np.float32), side='left')
+    if out is None:
+        return indices.astype(np.uint8)
+    result = _as_array(out, np.uint8, len(indices))
+    np.copyto(result, indices, casting='unsafe')
+    return result
+
+
+def decide_symbols(soft: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """硬判决为电平 {-3, -1, 1, 3} (float32)"""
+    indices = np.searchsorted(_THRESHOLDS, np.asarray(soft, dtype=np.float32), side='left')
+    if out is None:
+        return SYMBOL_LEVELS[indices]
+    return np.take(SYMBOL_LEVELS, indices, out=_as_array(out, np.float32, len(indices)))
+
+
+def indices_to_bytes(indices: np.ndarray, out: Optional[Buffer] = None) -> np.ndarray:
+    """
+    符号索引打包为字节 (每 4 个符号 1 字节，不足 4 个的尾部忽略)
+
+    Returns:
+        uint8 数组 (写入 out 时为其视图)
+    """
+    n_bytes = len(indices) // 4
+    quads = np.ascontiguousarray(indices[:n_bytes * 4], dtype=np.uint8).reshape(n_bytes, 4)
+    if out is None:
+        return quads @ _PACK_WEIGHTS
+    return np.dot(quads, _PACK_WEIGHTS, out=_as_array(out, np.uint8, n_bytes))
+
+
+def symbols_to_bytes(soft: np.ndarray, out: Optional[Buffer] = None) -> np.ndarray:
+    """软/硬符号直接判决并打包为字节"""
+    n = (len(soft) // 4) * 4
+    return indices_to_bytes(slice_symbols(soft[:n]), out=out)
+
+
+def bytes_to_indices(data: Union[bytes, bytearray, np.ndarray],
+                     out: Optional[Buffer] = None) -> np.ndarray:
+    """字节拆分为符号索引 (每字节 4 个，高位在前)"""
+    arr = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if out is None:
+        return _BYTE_TO_INDICES[arr].reshape(-1)
+    result = _as_array(out, np.uint8, len(arr) * 4)
+    np.take(_BYTE_TO_INDICES, arr, axis=0, out=_as_rows(result, len(arr)))
+    return result
+
+
+def bytes_to_levels(data: Union[bytes, bytearray, np.ndarray],
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+    """字节查表映射为符号电平 (float32，每字节 4 个)"""
+    arr = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    if out is None:
+        return _BYTE_TO_LEVELS[arr].reshape(-1)
+    result = _as_array(out, np.float32, len(arr) * 4)
+    np.take(_BYTE_TO_LEVELS, arr, axis=0, out=_as_rows(result, len(arr)))
+    return result
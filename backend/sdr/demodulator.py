@@ -8,6 +8,10 @@ import numpy as np
 from typing import Tuple, Optional
 from dataclasses import dataclass
 
+from protocol.symbol_codec import decide_symbols, symbols_to_bytes
+from .fast_filter import OverlapSaveFilter
+from .symbol_sync import GardnerSymbolSync
+
 try:
     from gnuradio import digital, gr
     from gnuradio.filter import firdes
@@ -73,13 +77,40 @@ class Demodulator:
     SYMBOL_VALUES = np.array([-3.0, -1.0, 1.0, 3.0])
     SYMBOL_BITS = [(0, 0), (0, 1), (1, 0), (1, 1)]
     
-    def __init__(self, config: Optional[DemodulatorConfig] = None):
+    def __init__(self, config: Optional[DemodulatorConfig] = None, streaming: bool = False):
+        """
+        Args:
+            config: 解调器配置
+            streaming: 流式模式。开启后在多次 demodulate() 调用之间保留
+                       最后一个 IQ 样本、RRC 滤波器历史、符号定时相位和未成字节的符号，
+                       输出的符号流与缓冲区切分方式无关
+        """
         self.config = config or DemodulatorConfig()
+        self.streaming = streaming
         self._rrc_taps = self._generate_rrc_taps()
         
-        # Streaming state for clock recovery
-        self._last_offset = None  # Persistent optimal offset
-        self._sample_buffer = np.array([], dtype=np.float32)  # Edge samples buffer
+        # Overlap-Save 匹配滤波，同一信号类型的所有实例共享缓存的滤波器频谱
+        self._rrc_filter = OverlapSaveFilter(
+            self._rrc_taps,
+            cache_key=(self.config.samples_per_symbol, self.config.rrc_alpha, len(self._rrc_taps))
+        )
+        
+        # 流式模式使用固定增益: FM 鉴频输出已按灵敏度归一化到符号单位，
+        # 只需抵消 RRC 滤波器的直流增益，无需依赖逐块峰值 AGC
+        taps_sum = float(np.sum(self._rrc_taps))
+        self._stream_gain = 1.0 / taps_sum if abs(taps_sum) > 1e-9 else 1.0
+        
+        # 闭环符号定时 (Gardner + Farrow 分数插值)，使用精确的分数 SPS
+        self._symbol_sync = GardnerSymbolSync(self.config.sample_rate / self.config.symbol_rate)
+        
+        self.reset()
+        
+    def reset(self):
+        """清空流式状态 (重新开始采集或切换频点时调用)"""
+        self._last_iq: Optional[np.complex64] = None              # 上一块最后一个 IQ 样本
+        self._rrc_filter.reset()                                  # RRC 滤波器输入历史
+        self._symbol_carry = np.zeros(0, dtype=np.float32)       # 未凑满一个字节的符号
+        self._symbol_sync.reset()                                 # 定时相位与周期估计
         
     def _generate_rrc_taps(self) -> np.ndarray:
         """生成 RRC 匹配滤波器系数
@@ -101,25 +132,39 @@ class Demodulator:
             )
         else:
             # Fallback implementation
-            t = np.arange(-ntaps//2, ntaps//2 + 1) / self.config.sample_rate
-            ts = 1 / self.config.symbol_rate
+            # t 以符号周期为单位; t=0 与 t=±1/(4*alpha) 处取解析极限，避免奇点
+            t = np.arange(-ntaps//2, ntaps//2 + 1) * self.config.symbol_rate / self.config.sample_rate
             
-            # Avoid division by zero
-            t = t + 1e-9
+            val = np.empty_like(t)
+            at_zero = np.abs(t) < 1e-9
+            at_pole = np.abs(np.abs(t) - 1 / (4 * alpha)) < 1e-9
+            regular = ~(at_zero | at_pole)
             
-            val = (np.sin(np.pi * t / ts * (1 - alpha)) + 
-                   4 * alpha * t / ts * np.cos(np.pi * t / ts * (1 + alpha))) / \
-                  (np.pi * t / ts * (1 - (4 * alpha * t / ts)**2))
+            tr = t[regular]
+            val[regular] = (np.sin(np.pi * tr * (1 - alpha)) +
+                            4 * alpha * tr * np.cos(np.pi * tr * (1 + alpha))) / \
+                           (np.pi * tr * (1 - (4 * alpha * tr)**2))
+            val[at_zero] = 1 - alpha + 4 * alpha / np.pi
+            val[at_pole] = (alpha / np.sqrt(2)) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * alpha)) +
+                                                   (1 - 2 / np.pi) * np.cos(np.pi / (4 * alpha)))
             
-            taps = val / np.sqrt(np.sum(val**2))  # Normalize for RX
+            # 与 firdes 一致: 系数和归一化为 gain (= sps)
+            taps = val / np.sum(val) * sps
             
-        return np.array(taps)
+        # float32 系数，避免 float32 鉴频输出在滤波时被提升为 float64
+        return np.asarray(taps, dtype=np.float32)
     
     def fm_demodulate(self, samples: np.ndarray) -> np.ndarray:
         """
         FM 解调: 计算相位差
         Output = angle(sample[n] * conj(sample[n-1]))
         """
+        # 流式模式: 拼接上一块的最后一个样本，保证块边界处不丢相位差
+        if self.streaming and len(samples) > 0:
+            if self._last_iq is not None:
+                samples = np.concatenate(([self._last_iq], samples))
+            self._last_iq = samples[-1]
+        
         # 相位差分
         phase_diff = np.angle(samples[1:] * np.conj(samples[:-1]))
         
@@ -135,66 +180,34 @@ class Demodulator:
 
     def apply_rrc_filter(self, signal: np.ndarray) -> np.ndarray:
         """应用 RRC 匹配滤波"""
+        if self.streaming:
+            # 流式: 保留末尾 ntaps-1 个输入样本作为历史，首块之后每个输入产生一个输出
+            return self._rrc_filter.process(signal)
         if len(signal) < len(self._rrc_taps):
             return signal
-        return np.convolve(signal, self._rrc_taps, mode='valid')
+        return self._rrc_filter.filter_valid(signal)
 
     def symbol_decision(self, symbols: np.ndarray) -> np.ndarray:
         """
         硬判决: 将连续值映射到 {-3, -1, 1, 3}
+        门限 -2 / 0 / 2，单次矢量化查表 (见 protocol.symbol_codec)
         """
-        # 简单阈值判决
-        # -3: < -2
-        # -1: -2 ~ 0
-        #  1: 0 ~ 2
-        #  3: > 2
-        
-        decisions = np.zeros_like(symbols)
-        
-        decisions[symbols < -2.0] = -3.0
-        decisions[(symbols >= -2.0) & (symbols < 0.0)] = -1.0
-        decisions[(symbols >= 0.0) & (symbols < 2.0)] = 1.0
-        decisions[symbols >= 2.0] = 3.0
-        
-        return decisions
+        return decide_symbols(symbols)
 
     def symbols_to_bytes(self, symbols: np.ndarray) -> bytes:
         """
         将符号序列转换为字节流
-        Mapping depends on protocol. 
-        Usually 4 symbols = 1 byte (2 bits/symbol)
+        4 symbols = 1 byte (2 bits/symbol): 3->11, 1->10, -1->01, -3->00
+        不足 4 个的尾部符号忽略
         """
-        # 假设:
-        # 3 -> 11
-        # 1 -> 10
-        # -1 -> 01
-        # -3 -> 00
-        
-        # Verify length
-        n_bytes = len(symbols) // 4
-        byte_data = bytearray()
-        
-        for i in range(n_bytes):
-            val = 0
-            for j in range(4):
-                sym = symbols[i*4 + j]
-                bits = 0
-                if sym > 2.0: bits = 0b11
-                elif sym > 0.0: bits = 0b10
-                elif sym > -2.0: bits = 0b01
-                else: bits = 0b00
-                
-                val = (val << 2) | bits
-            byte_data.append(val)
-            
-        return bytes(byte_data)
+        return symbols_to_bytes(symbols).tobytes()
 
     def clock_recovery_gnuradio(self, signal: np.ndarray) -> np.ndarray:
         """
-        快速矢量化时钟恢复 (支持流式处理)
+        单块时钟恢复 (非流式)
         
-        使用最小 MSE 法找到最佳采样偏移 (相对于理想符号电平)
-        对于流式处理，使用上一次的偏移作为初始值
+        每块独立捕获定时，再由 Gardner 环在块内跟踪分数采样点，
+        块尾不足一个环路更新块的符号也会输出
         
         Args:
             signal: RRC 滤波后的信号 (float32)
@@ -203,49 +216,27 @@ class Demodulator:
             符号采样值数组
         """
         sps = self.config.samples_per_symbol
-        n_samples = len(signal)
-        
-        if n_samples < sps * 4:
-            offset = self._last_offset if self._last_offset is not None else sps // 2
-            return signal[offset::sps]
-        
-        # 理想符号电平
-        ideal_levels = np.array([-3.0, -1.0, 1.0, 3.0])
-        
-        # 如果有之前的偏移，先测试它是否仍然有效
-        if self._last_offset is not None:
-            samples = signal[self._last_offset::sps]
-            if len(samples) >= 10:
-                distances = np.abs(samples[:, np.newaxis] - ideal_levels)
-                min_distances = np.min(distances, axis=1)
-                current_mse = np.mean(min_distances ** 2)
-                
-                # 如果 MSE 足够小 (< 0.5)，继续使用上次的偏移
-                if current_mse < 0.5:
-                    return samples
-        
-        # 需要重新搜索最佳偏移
-        best_offset = self._last_offset if self._last_offset is not None else 0
-        best_mse = float('inf')
-        
-        for offset in range(sps):
-            samples = signal[offset::sps]
-            if len(samples) < 10:
-                continue
-            
-            distances = np.abs(samples[:, np.newaxis] - ideal_levels)
-            min_distances = np.min(distances, axis=1)
-            mse = np.mean(min_distances ** 2)
-            
-            if mse < best_mse:
-                best_mse = mse
-                best_offset = offset
+        if len(signal) < sps * 4:
+            return signal[sps // 2::sps]
         
-        # 保存偏移供下次使用
-        self._last_offset = best_offset
-        
-        symbols = signal[best_offset::sps]
-        return symbols
+        self._symbol_sync.reset()
+        return self._symbol_sync.process(signal, flush=True)
+
+    def _symbols_to_bytes_stream(self, symbols: np.ndarray) -> bytes:
+        """流式字节打包: 不足 4 个的尾部符号留到下一次调用"""
+        data = np.concatenate((self._symbol_carry, symbols))
+        n_used = (len(data) // 4) * 4
+        self._symbol_carry = data[n_used:]
+        return self.symbols_to_bytes(data[:n_used])
+
+    def _demodulate_stream(self, iq_samples: np.ndarray) -> Tuple[np.ndarray, bytes]:
+        """流式解调: 各级状态跨调用保留，输出符号流无间隙"""
+        fm_demod = self.fm_demodulate(iq_samples)
+        filtered = self.apply_rrc_filter(fm_demod)
+        filtered *= np.float32(self._stream_gain)
+        symbols = self._symbol_sync.process(filtered)
+        decisions = self.symbol_decision(symbols)
+        return decisions, self._symbols_to_bytes_stream(decisions)
 
     def demodulate(self, iq_samples: np.ndarray) -> Tuple[np.ndarray, bytes]:
         """
@@ -254,6 +245,9 @@ class Demodulator:
         Returns:
             (symbols, decoded_bytes)
         """
+        if self.streaming:
+            return self._demodulate_stream(iq_samples)
+        
         # 1. FM Demodulation
         fm_demod = self.fm_demodulate(iq_samples)
         
@@ -286,10 +280,11 @@ class Demodulator:
 
 # 便捷函数
 def create_demodulator(sample_rate: int = 2_000_000, 
-                       symbol_rate: int = 250_000) -> Demodulator:
+                       symbol_rate: int = 250_000,
+                       streaming: bool = False) -> Demodulator:
     """创建解调器实例"""
     config = DemodulatorConfig(
         sample_rate=sample_rate,
         symbol_rate=symbol_rate
     )
-    return Demodulator(config)
+    return Demodulator(config, streaming=streaming)
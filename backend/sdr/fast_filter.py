@@ -0,0 +1,134 @@
+"""
+快速卷积模块
+Overlap-Save FFT 滤波，滤波器频谱按参数缓存并在所有实例间共享
+"""
+
+import threading
+import numpy as np
+from typing import Dict, Hashable, Optional
+
+try:
+    # scipy.fft 支持单精度变换，全程保持 float32/complex64
+    import scipy.fft as _fft
+    SCIPY_FFT_AVAILABLE = True
+except ImportError:
+    import numpy.fft as _fft
+    SCIPY_FFT_AVAILABLE = False
+
+
+# 滤波器频谱缓存: key -> complex64 rfft(taps, fft_size)
+_spectrum_cache: Dict[Hashable, np.ndarray] = {}
+_cache_lock = threading.Lock()
+
+
+def get_taps_spectrum(taps: np.ndarray, fft_size: int, key: Optional[Hashable] = None) -> np.ndarray:
+    """
+    获取 (缓存的) 滤波器频谱
+
+    Args:
+        taps: 滤波器系数
+        fft_size: FFT 长度
+        key: 缓存键 (如 (sps, alpha, ntaps))，为 None 时不缓存
+
+    Returns:
+        只读 complex64 频谱 (长度 fft_size // 2 + 1)
+    """
+    if key is not None:
+        cache_key = (key, fft_size)
+        spectrum = _spectrum_cache.get(cache_key)
+        if spectrum is not None:
+            return spectrum
+
+    spectrum = _fft.rfft(np.asarray(taps, dtype=np.float32), fft_size).astype(np.complex64)
+    spectrum.setflags(write=False)
+
+    if key is not None:
+        with _cache_lock:
+            spectrum = _spectrum_cache.setdefault(cache_key, spectrum)
+    return spectrum
+
+
+def clear_spectrum_cache():
+    """清空滤波器频谱缓存"""
+    with _cache_lock:
+        _spectrum_cache.clear()
+
+
+class OverlapSaveFilter:
+    """
+    Overlap-Save 快速卷积 FIR 滤波器 (实数, float32)
+
+    输出与 np.convolve(x, taps, mode='valid') 一致。
+    所有分段一次性组成矩阵做批量 rfft/irfft，避免逐段 Python 循环。
+    流式调用时保留末尾 ntaps-1 个输入样本作为历史。
+    """
+
+    def __init__(self, taps: np.ndarray, fft_size: Optional[int] = None,
+                 cache_key: Optional[Hashable] = None):
+        """
+        Args:
+            taps: 滤波器系数
+            fft_size: FFT 长度 (默认取 >= 8*ntaps 的 2 的幂，至少 1024)
+            cache_key: 频谱缓存键，相同键的实例共享同一份频谱
+        """
+        self.taps = np.asarray(taps, dtype=np.float32)
+        self.ntaps = len(self.taps)
+
+        if fft_size is None:
+            fft_size = max(1024, 1 << int(np.ceil(np.log2(8 * self.ntaps))))
+        if fft_size < self.ntaps:
+            raise ValueError(f"fft_size ({fft_size}) must be >= number of taps ({self.ntaps})")
+
+        self.fft_size = fft_size
+        # 每段产生的有效输出数
+        self.step = fft_size - self.ntaps + 1
+        self._spectrum = get_taps_spectrum(self.taps, fft_size, cache_key)
+
+        self.reset()
+
+    def reset(self):
+        """清空流式历史"""
+        self._history = np.zeros(0, dtype=np.float32)
+
+    def filter_valid(self, data: np.ndarray) -> np.ndarray:
+        """
+        无状态滤波，等价于 np.convolve(data, taps, mode='valid')
+
+        Returns:
+            float32 数组，长度 len(data) - ntaps + 1 (不足时为空)
+        """
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        n_out = len(data) - self.ntaps + 1
+        if n_out <= 0:
+            return np.zeros(0, dtype=np.float32)
+
+        n_seg = -(-n_out // self.step)
+        padded_len = (n_seg - 1) * self.step + self.fft_size
+        if padded_len > len(data):
+            data = np.concatenate((data, np.zeros(padded_len - len(data), dtype=np.float32)))
+
+        # 零拷贝分段视图: 每行一个 FFT 段，相邻段重叠 ntaps-1 个样本
+        segments = np.lib.stride_tricks.as_strided(
+            data, shape=(n_seg, self.fft_size),
+            strides=(self.step * data.strides[0], data.strides[0]),
+            writeable=False)
+
+        spectra = _fft.rfft(segments, axis=1)
+        spectra *= self._spectrum
+        blocks = _fft.irfft(spectra, n=self.fft_size, axis=1)
+
+        # 丢弃每段前 ntaps-1 个循环卷积混叠样本
+        out = blocks[:, self.ntaps - 1:].reshape(-1)[:n_out]
+        return out.astype(np.float32, copy=False)
+
+    def process(self, signal: np.ndarray) -> np.ndarray:
+        """
+        流式滤波: 拼接历史后做有效卷积，首块之后每个输入样本产生一个输出
+        """
+        data = np.concatenate((self._history, np.asarray(signal, dtype=np.float32)))
+        if len(data) < self.ntaps:
+            self._history = data
+            return np.zeros(0, dtype=np.float32)
+
+        self._history = data[len(data) - (self.ntaps - 1):].copy()
+        return self.filter_valid(data)
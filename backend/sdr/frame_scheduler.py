@@ -0,0 +1,166 @@
+"""
+多命令发射调度
+雷达链路 (SDR.md 3.2) 的 0x0A01/0x0A02/0x0A04/0x0A05 各有自己的发送频率。
+调度器按发射时间 (airtime) 轮转: 到期的命令中截止时间最早者先发 (EDF)，
+帧与帧背靠背并只带短 Preamble，序号逐帧递增；没有到期命令时发送短 Preamble 填充。
+作为 TxStreamEngine 的帧源使用，或用 build_schedule() 生成一段帧序列。
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .signal_generator import _construct_frame
+
+PREAMBLE_BYTE = 0xE4
+
+
+class _Command:
+    __slots__ = ('cmd_id', 'rate_hz', 'producer', 'next_due', 'sent', 'skipped', 'history')
+
+    def __init__(self, cmd_id: int, rate_hz: float, producer: Callable[[], Optional[bytes]], now: float):
+        self.cmd_id = cmd_id
+        self.rate_hz = rate_hz
+        self.producer = producer
+        self.next_due = now
+        self.sent = 0
+        self.skipped = 0         # 链路饱和而放弃的发送时隙
+        self.history = deque()   # 最近 RATE_WINDOW 内各帧的发送时刻 (airtime)
+
+
+class FrameScheduler:
+    """
+    Args:
+        symbol_rate: 符号率 (Baud)，用于换算每帧占用的发射时间
+        preamble_len: 每帧 Preamble 字节数 (接收端帧同步至少需要 1 字节)
+        idle_bytes: 空闲时单次填充的最大 Preamble 字节数
+    """
+
+    PREAMBLE_LEN = 4
+    IDLE_BYTES = 8
+    RATE_WINDOW = 1.0  # 实际帧率统计窗口 (秒)
+
+    def __init__(self, symbol_rate: int, preamble_len: int = PREAMBLE_LEN, idle_bytes: int = IDLE_BYTES):
+        self.symbol_rate = symbol_rate
+        self.preamble_len = preamble_len
+        self.idle_bytes = idle_bytes
+        self._commands: Dict[int, _Command] = {}
+        self._lock = threading.Lock()
+        self._airtime = 0.0       # 已调度的发射时间 (秒)
+        self._frame_airtime = 0.0  # 其中用于数据帧的时间
+        self._seq = 0
+
+    @property
+    def airtime(self) -> float:
+        return self._airtime
+
+    def byte_time(self, n_bytes: int) -> float:
+        """n 字节的发射时间 (每字节 4 个符号)"""
+        return n_bytes * 4 / self.symbol_rate
+
+    # ---------- 命令管理 ----------
+
+    def add_command(self, cmd_id: int, rate_hz: float, producer: Callable[[], Optional[bytes]]):
+        """
+        注册命令: producer() 返回当前载荷，返回 None 表示本时隙不发送
+        """
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive, got {rate_hz}")
+        with self._lock:
+            self._commands[cmd_id] = _Command(cmd_id, rate_hz, producer, self._airtime)
+
+    def set_payload(self, cmd_id: int, payload: bytes, rate_hz: Optional[float] = None):
+        """以固定载荷注册/更新命令 (总是发送最新载荷)，新命令必须给出 rate_hz"""
+        with self._lock:
+            command = self._commands.get(cmd_id)
+            if command is not None:
+                command.producer = lambda: payload
+                if rate_hz is not None:
+                    command.rate_hz = rate_hz
+                return
+        if rate_hz is None:
+            raise ValueError(f"rate_hz required for new command 0x{cmd_id:04X}")
+        self.add_command(cmd_id, rate_hz, lambda: payload)
+
+    def has_command(self, cmd_id: int) -> bool:
+        with self._lock:
+            return cmd_id in self._commands
+
+    def remove_command(self, cmd_id: int):
+        with self._lock:
+            self._commands.pop(cmd_id, None)
+
+    def trigger(self, cmd_id: int):
+        """命令立即到期 (有新数据时调用)，在下一个帧边界发送"""
+        with self._lock:
+            command = self._commands.get(cmd_id)
+            if command is not None:
+                command.next_due = min(command.next_due, self._airtime)
+
+    # ---------- 调度 ----------
+
+    def next_frame(self) -> bytes:
+        """下一段发射字节 (一个数据帧或一段 Preamble 填充)，推进发射时间"""
+        with self._lock:
+            now = self._airtime
+            due = sorted((c for c in self._commands.values() if c.next_due <= now),
+                         key=lambda c: (c.next_due, c.cmd_id))
+            for command in due:
+                period = 1.0 / command.rate_hz
+                command.next_due += period
+                if command.next_due < now:
+                    # 链路饱和: 不补发积压的时隙，从当前时刻重新计时
+                    missed = int((now - command.next_due) / period) + 1
+                    command.skipped += missed
+                    command.next_due += missed * period
+                payload = command.producer()
+                if payload is None:
+                    continue
+                frame = _construct_frame(payload, cmd_id=command.cmd_id, seq=self._seq,
+                                         preamble_len=self.preamble_len)
+                self._seq = (self._seq + 1) & 0xFF
+                command.sent += 1
+                command.history.append(now)
+                while command.history[0] < now - self.RATE_WINDOW:
+                    command.history.popleft()
+                duration = self.byte_time(len(frame))
+                self._airtime += duration
+                self._frame_airtime += duration
+                return frame
+
+            # 空闲: 填充到最近的到期时刻 (至少 1 字节，至多 idle_bytes)
+            upcoming = min((c.next_due for c in self._commands.values()), default=now + 1.0)
+            n = min(self.idle_bytes, max(1, math.ceil((upcoming - now) * self.symbol_rate / 4)))
+            self._airtime += self.byte_time(n)
+            return bytes([PREAMBLE_BYTE]) * n
+
+    def build_schedule(self, duration: float) -> List[bytes]:
+        """连续调度 duration 秒发射时间，返回帧/填充序列"""
+        end = self._airtime + duration
+        frames = []
+        while self._airtime < end:
+            frames.append(self.next_frame())
+        return frames
+
+    def get_stats(self) -> dict:
+        """各命令目标/实际帧率 (最近 RATE_WINDOW 秒发射时间) 与链路占用率"""
+        with self._lock:
+            now = self._airtime
+            window = min(self.RATE_WINDOW, now) or 1.0
+            commands = {}
+            for cmd_id, c in self._commands.items():
+                while c.history and c.history[0] < now - self.RATE_WINDOW:
+                    c.history.popleft()
+                commands[cmd_id] = {
+                    "target_rate": c.rate_hz,
+                    "achieved_rate": len(c.history) / window,
+                    "sent": c.sent,
+                    "skipped": c.skipped,
+                }
+            return {
+                "airtime": now,
+                "utilization": self._frame_airtime / now if now > 0 else 0.0,
+                "seq": self._seq,
+                "commands": commands,
+            }
@@ -0,0 +1,161 @@
+"""
+多载波发射合成
+一台 PLUTO 的 2 MHz 基带内同时发送多个信号 (如 433.20 MHz 广播 + 432.60 MHz 干扰):
+各信号按 SIGNAL_SPECS 调制、搬移到相对公共本振的频偏、按功率加权后求和。
+
+循环缓冲区首尾相接处保持相位连续:
+- 每路按符号电平循环调制 (首帧的脉冲上下文来自末尾符号)
+- 每路总相位补一个微小频偏 (|df| <= fs / 2N) 凑整到 2pi 的整数倍
+- 缓冲区长度取各路 SPS 与频偏周期的公倍数，频偏正弦在缓冲区内转整数圈
+"""
+
+import math
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .signal_generator import get_pulse_table, get_signal_params, parse_payload, _construct_frame
+from protocol.symbol_codec import bytes_to_levels
+
+# 帧之间用 Preamble 电平 (0xE4 -> 3, 1, -1, -3) 填充到缓冲区长度
+_FILL_LEVELS = np.array([3.0, 1.0, -1.0, -3.0], dtype=np.float32)
+
+
+@dataclass
+class Carrier:
+    """单路载波的合成结果"""
+    signal_type: str
+    freq: float          # 射频频率 (Hz)
+    offset: float        # 相对本振的频偏 (Hz)
+    amplitude: float     # 合成缓冲区中的幅度 (0-1)
+    power: float         # SIGNAL_SPECS 目标功率 (dBm)
+    frames: int          # 缓冲区内的完整帧数 (随机干扰为 0)
+
+
+@dataclass
+class MultiCarrierSignal:
+    """多载波合成结果"""
+    samples: np.ndarray              # complex64，峰值不超过 full_scale
+    center_freq: float               # 公共本振频率 (Hz)
+    tx_gain: float                   # 使最大功率载波达到目标功率的 TX 增益 (dB)
+    rf_bandwidth: int                # 覆盖所有载波的 RF 带宽 (Hz)
+    carriers: List[Carrier] = field(default_factory=list)
+
+
+def _cyclic_length(sample_rate: int, sps_list: Sequence[int], offsets: Sequence[float],
+                   min_samples: int) -> int:
+    """各路 SPS 与频偏周期 (fs / gcd) 的最小公倍数，再取整到不小于 min_samples"""
+    period = 1
+    for sps in sps_list:
+        period = period * sps // math.gcd(period, sps)
+    for offset in offsets:
+        # 频偏在 period 个样本内转整数圈: offset * N / fs 为整数
+        denominator = Fraction(int(round(offset)), int(sample_rate)).denominator
+        period = period * denominator // math.gcd(period, denominator)
+    return period * max(1, -(-min_samples // period))
+
+
+def _carrier_levels(frame: Optional[bytes], n_symbols: int, rng: np.random.Generator) -> Tuple[np.ndarray, int]:
+    """
+    一路载波在缓冲区内的符号电平: 完整帧重复 + Preamble 填充；无载荷时为随机电平
+    """
+    if frame is None:
+        return rng.choice(_FILL_LEVELS, n_symbols).astype(np.float32), 0
+    frame_levels = bytes_to_levels(frame)
+    count = n_symbols // len(frame_levels)
+    if count == 0:
+        raise ValueError(f"frame of {len(frame)} bytes does not fit in {n_symbols} symbols")
+    levels = np.empty(n_symbols, dtype=np.float32)
+    levels[:count * len(frame_levels)] = np.tile(frame_levels, count)
+    fill = n_symbols - count * len(frame_levels)
+    levels[count * len(frame_levels):] = np.resize(_FILL_LEVELS, fill)
+    return levels, count
+
+
+def _cyclic_fsk(levels: np.ndarray, sample_rate: int, symbol_rate: int) -> np.ndarray:
+    """循环 4-RRC-FSK 调制 (单位幅度 complex64)，输出首尾相接时滤波器状态与相位连续"""
+    table = get_pulse_table(sample_rate, symbol_rate)
+    ctx = table.span - 1
+    extended = np.concatenate((levels[len(levels) - ctx:], levels))
+    inc = table.increments(extended)
+    # 总相位凑整到 2pi 的整数倍，差值均摊为一个微小频偏
+    total = inc.sum(dtype=np.float64)
+    inc -= np.float32((total - 2 * np.pi * round(total / (2 * np.pi))) / inc.size)
+    return table.render(inc, table.symbol_phases(inc), 1.0)
+
+
+def generate_multicarrier(signals: Sequence[Tuple[str, Optional[str]]], sample_rate: int = 2_000_000,
+                          center_freq: Optional[float] = None, full_scale: float = 0.9,
+                          min_samples: int = 32768, max_samples: int = 1 << 21,
+                          seed: Optional[int] = None) -> MultiCarrierSignal:
+    """
+    合成多载波循环发射缓冲区
+
+    Args:
+        signals: [(signal_type, payload)]，payload 为 None 时发送随机数据 (干扰)
+        sample_rate: 采样率 (Hz)
+        center_freq: 公共本振，None 时取各载波频率范围的中点
+        full_scale: 合成后峰值上限 (DAC 满幅为 1.0)
+        min_samples / max_samples: 缓冲区长度范围
+        seed: 随机干扰数据种子
+
+    Returns:
+        MultiCarrierSignal
+
+    Raises:
+        ValueError: 载波超出基带范围、缓冲区过长或帧放不下
+    """
+    if not signals:
+        raise ValueError("no signals to synthesize")
+    specs = [get_signal_params(signal_type) for signal_type, _ in signals]
+    freqs = [spec['freq'] for spec in specs]
+    if center_freq is None:
+        center_freq = (min(freqs) + max(freqs)) / 2
+
+    # 每路占用带宽必须落在 +-fs/2 内
+    offsets = [freq - center_freq for freq in freqs]
+    edge = 0.0
+    for (signal_type, _), spec, offset in zip(signals, specs, offsets):
+        half_bw = spec.get('bandwidth', 540000) / 2
+        edge = max(edge, abs(offset) + half_bw)
+        if abs(offset) + half_bw > sample_rate / 2:
+            raise ValueError(f"{signal_type} at {offset / 1e3:+.1f} kHz exceeds the "
+                             f"{sample_rate / 1e6:.1f} MHz baseband")
+
+    sps_list = [max(2, int(sample_rate / spec['baud'])) for spec in specs]
+    frames = [_construct_frame(parse_payload(payload)) if payload else None for _, payload in signals]
+    # 至少容纳每路一个完整帧
+    longest = max([len(f) * 4 * sps for f, sps in zip(frames, sps_list) if f is not None], default=0)
+    n = _cyclic_length(sample_rate, sps_list, offsets, max(min_samples, longest))
+    if n > max_samples:
+        raise ValueError(f"cyclic buffer of {n} samples exceeds max_samples={max_samples}")
+
+    # 按目标功率的相对幅度分配，幅度之和 = full_scale 保证恒包络分量求和后不削顶
+    powers = [spec.get('power', -10) for spec in specs]
+    p_max = max(powers)
+    ratios = [10 ** ((p - p_max) / 20) for p in powers]
+    amplitudes = [full_scale * r / sum(ratios) for r in ratios]
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(n, dtype=np.float64) / sample_rate
+    samples = np.zeros(n, dtype=np.complex64)
+    carriers = []
+    for (signal_type, _), spec, frame, sps, offset, amplitude, power in zip(
+            signals, specs, frames, sps_list, offsets, amplitudes, powers):
+        levels, count = _carrier_levels(frame, n // sps, rng)
+        component = _cyclic_fsk(levels, sample_rate, spec['baud'])
+        if offset:
+            # 频偏正弦用 float64 相位计算后转 complex64，避免长缓冲区的相位误差
+            component *= np.exp(2j * np.pi * offset * t).astype(np.complex64)
+        samples += np.complex64(amplitude) * component
+        carriers.append(Carrier(signal_type, spec['freq'], offset, amplitude, power, count))
+
+    return MultiCarrierSignal(
+        samples=samples,
+        center_freq=center_freq,
+        tx_gain=p_max + 20 * math.log10(sum(ratios)),
+        rf_bandwidth=int(math.ceil(2 * edge)),
+        carriers=carriers,
+    )
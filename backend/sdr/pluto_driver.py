@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import threading
 import time
 import queue
+from collections import deque
 
 try:
     import adi
@@ -61,6 +62,9 @@ class PlutoDriver:
         self._last_rx_time = 0
         self._rx_overflow = False
         self._tx_underflow = False
+        # 相邻两次 rx() 之间的间隔 (上一次返回到下一次调用，即回调耗时，秒)
+        self._rx_gaps = deque(maxlen=2000)
+        self._rx_gap_max = 0.0
 
     @property
     def is_connected(self) -> bool:
@@ -182,12 +186,16 @@ class PlutoDriver:
             except Exception as e:
                 print(f"Error setting TX RF bandwidth: {e}")
 
-    def configure_tx(self):
-        """配置发射参数 (Lazy init when needed)"""
+    def configure_tx(self, cyclic: bool = True):
+        """配置发射参数 (Lazy init when needed)
+        
+        Args:
+            cyclic: True 为循环缓冲区 (transmit_samples)，False 为流式写入 (write_tx_samples)
+        """
         if not self._sdr: return
         try:
             self._sdr.tx_lo = int(self.config.tx_freq)
-            self._sdr.tx_cyclic_buffer = True # Default to cyclic for continuous transmission
+            self._sdr.tx_cyclic_buffer = cyclic
             self._sdr.tx_hardwaregain_chan0 = int(self.config.tx_gain)
             self._sdr.tx_rf_bandwidth = int(self.config.tx_rf_bandwidth)
             print(f"TX configured: {self.config.tx_freq/1e6} MHz, {self.config.tx_gain} dB gain")
@@ -222,6 +230,22 @@ class PlutoDriver:
             print(f"Error during transmission: {e}")
             self._tx_underflow = True
 
+    def start_tx_stream(self):
+        """进入流式发射模式: 销毁已有的 (循环) 缓冲区，之后由 write_tx_samples 持续写入"""
+        if not self._sdr: return
+        self.stop_transmission()
+        self.configure_tx(cyclic=False)
+
+    def write_tx_samples(self, samples: np.ndarray):
+        """
+        流式写入一块样本 (非循环模式)
+        首次写入按块长创建 IIO 缓冲区，之后每块必须等长；设备缓冲区满时阻塞，
+        由此与 DAC 速率同步。出错时抛出异常交给调用方处理。
+        """
+        if not self._sdr:
+            raise RuntimeError("PLUTO SDR not connected")
+        self._sdr.tx(samples * (2**14))
+
     def stop_transmission(self):
         if not self._sdr: return
         try:
@@ -230,13 +254,24 @@ class PlutoDriver:
         except:
             pass
 
-    def receive_samples(self) -> Optional[np.ndarray]:
+    def receive_samples(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        接收一个缓冲区 (complex64)
+        
+        Args:
+            out: 预分配的 complex64 数组 (如 RX 流水线的空闲槽)，样本转换后直接写入，
+                 返回 out 或其前缀视图；为 None 或长度不足时分配新数组
+        """
         if not self._is_connected or self._sdr is None:
             return None
             
         try:
             now = time.time()
             expected_duration = self.config.buffer_size / self.config.sample_rate
+            if self._last_rx_time > 0:
+                gap = now - self._last_rx_time
+                self._rx_gaps.append(gap)
+                self._rx_gap_max = max(self._rx_gap_max, gap)
             
             # Basic Overflow Detection
             # 使用较宽松的阈值，考虑解调处理时间
@@ -248,22 +283,39 @@ class PlutoDriver:
             samples = self._sdr.rx()
             
             self._last_rx_time = time.time()
+            if out is not None and len(samples) <= len(out):
+                if len(samples) < len(out):
+                    out = out[:len(samples)]
+                np.copyto(out, samples, casting='unsafe')
+                return out
             return np.array(samples, dtype=np.complex64)
             
         except Exception as e:
             # print(f"Error receiving samples: {e}")
             return None
 
-    def start_streaming(self, callback: Callable[[np.ndarray], None]):
+    def start_streaming(self, callback: Callable[[np.ndarray], None], buffer_pool=None):
+        """
+        启动采集线程
+        
+        Args:
+            callback: 每个缓冲区调用一次 (在采集线程中，应保持轻量)
+            buffer_pool: 可选缓冲池 (提供 acquire() -> 可写 complex64 数组或 None)，
+                         样本直接写入池中的槽，采集循环不分配数组
+        """
         if self._is_streaming: return
         
         self._is_streaming = True
         self._stop_event.clear()
+        self._last_rx_time = 0
+        self._rx_gaps.clear()
+        self._rx_gap_max = 0.0
         
         def stream_loop():
             print("Streaming started")
             while not self._stop_event.is_set():
-                samples = self.receive_samples()
+                out = buffer_pool.acquire() if buffer_pool is not None else None
+                samples = self.receive_samples(out)
                 if samples is not None and len(samples) > 0:
                     try:
                         callback(samples)
@@ -283,6 +335,15 @@ class PlutoDriver:
             self._stream_thread.join(timeout=1.0)
         self._is_streaming = False
 
+    def get_rx_gap_stats(self) -> Optional[dict]:
+        """rx() 调用间隔统计 (ms): 采集线程在 rx() 之外花费的时间"""
+        gaps = list(self._rx_gaps)
+        if not gaps:
+            return None
+        ms = np.asarray(gaps) * 1e3
+        return {"p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99)),
+                "max": float(self._rx_gap_max * 1e3), "count": len(gaps)}
+
     def get_status(self) -> dict:
         return {
             "connected": self._is_connected,
@@ -294,5 +355,6 @@ class PlutoDriver:
             "buffer_size": self.config.buffer_size,
             "uri": self.config.uri,
             "overflow": self._rx_overflow,
-            "underflow": self._tx_underflow
+            "underflow": self._tx_underflow,
+            "rx_gap_ms": self.get_rx_gap_stats()
         }
@@ -0,0 +1,317 @@
+"""
+RX 流水线
+采集线程 (PlutoDriver.start_streaming) 只负责 rx() 与 publish，频谱、解调等处理在各消费者线程中进行，
+互不阻塞，也不拖慢下一次 rx()。
+
+样本存放在预分配的 complex64 槽环 (IQRing) 中:
+- 驱动直接把 rx() 结果转换写入空闲槽 (PlutoDriver.receive_samples(out=...))，不另分配数组
+- 提交后槽带序号，引用计数为消费者数，各消费者拿到同一个只读视图，全部释放后槽才可重用
+- 槽数 = 各消费者队列容量之和 + 消费者数 + 1，正常运行时总有空闲槽
+消费者队列满时丢弃本消费者最旧的缓冲区，按消费者记录溢出 (overruns) 与最近一次丢失的序号，
+其他消费者不受影响。
+"""
+
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class RxBuffer:
+    """一个 RX 缓冲区及采集时的状态 (各消费者共享，samples 只读；槽重用时对象随之重用)"""
+    __slots__ = ('seq', 'samples', 'center_freq', 'overflow', 'underflow', 'timestamp', 'ring', 'slot')
+
+    def __init__(self, seq: int, samples: np.ndarray, center_freq: float = 0.0,
+                 overflow: bool = False, underflow: bool = False, timestamp: Optional[float] = None,
+                 ring: Optional['IQRing'] = None, slot: int = -1):
+        self.seq = seq
+        self.samples = samples
+        self.center_freq = center_freq
+        self.overflow = overflow
+        self.underflow = underflow
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+        self.ring = ring  # 所属槽环 (缓冲区长度变化后旧槽环由在途缓冲区引用直到释放)
+        self.slot = slot
+
+
+class IQRing:
+    """
+    预分配 complex64 槽环
+
+    Args:
+        slots: 槽数
+        slot_size: 每槽样本数 (RX 缓冲区长度)
+    """
+
+    def __init__(self, slots: int, slot_size: int):
+        self.slots = slots
+        self.slot_size = slot_size
+        self._data = np.zeros((slots, slot_size), dtype=np.complex64)
+        self._rows: List[np.ndarray] = list(self._data)  # 可写整槽视图 (生产者)
+        self._views: List[np.ndarray] = []               # 只读整槽视图 (消费者)
+        for row in self._rows:
+            view = row.view()
+            view.flags.writeable = False
+            self._views.append(view)
+        self._buffers = [RxBuffer(0, self._views[i], ring=self, slot=i) for i in range(slots)]
+        self._refs = [0] * slots
+        self._next = 0
+        self._writing: Optional[int] = None
+        self._lock = threading.Lock()
+        self.exhausted = 0  # 无空闲槽的次数 (消费者占用超过容量)
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def in_use(self) -> int:
+        with self._lock:
+            return sum(1 for r in self._refs if r) + (self._writing is not None)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """取一个空闲槽的可写视图 (上次取出未提交时返回同一槽)，没有空闲槽返回 None"""
+        with self._lock:
+            if self._writing is not None:
+                return self._rows[self._writing]
+            for k in range(self.slots):
+                i = (self._next + k) % self.slots
+                if self._refs[i] == 0:
+                    self._writing = i
+                    self._next = (i + 1) % self.slots
+                    return self._rows[i]
+            self.exhausted += 1
+            return None
+
+    def owns(self, samples: np.ndarray) -> bool:
+        """samples 是否为正在写入的槽 (驱动已直接写入，无需拷贝)"""
+        return self._writing is not None and samples.base is self._data
+
+    def commit(self, length: int, refs: int, seq: int, center_freq: float = 0.0,
+               overflow: bool = False, underflow: bool = False) -> RxBuffer:
+        """提交正在写入的槽: 设置序号与引用计数，返回该槽的只读缓冲区"""
+        with self._lock:
+            i = self._writing
+            self._writing = None
+            self._refs[i] = refs
+        buffer = self._buffers[i]
+        buffer.seq = seq
+        buffer.samples = self._views[i] if length == self.slot_size else self._views[i][:length]
+        buffer.center_freq = center_freq
+        buffer.overflow = overflow
+        buffer.underflow = underflow
+        buffer.timestamp = time.perf_counter()
+        return buffer
+
+    def release(self, buffer: RxBuffer):
+        with self._lock:
+            self._refs[buffer.slot] -= 1
+
+
+class RxConsumer:
+    """
+    独立消费者线程
+
+    Args:
+        name: 名称 (统计与线程名)
+        handler: 处理函数 handler(RxBuffer)，返回后缓冲区即被释放，不得保留 samples 的视图
+        maxsize: 队列容量 (缓冲区个数)，满时丢弃本消费者最旧的并计为溢出
+        release: 缓冲区处理完或被丢弃时的回调 (归还槽引用)
+    """
+
+    def __init__(self, name: str, handler: Callable[[RxBuffer], None], maxsize: int = 10,
+                 release: Optional[Callable[[RxBuffer], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.release = release
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.processed = 0
+        self.overruns = 0             # 本消费者丢失的缓冲区数
+        self.last_overrun_seq = 0     # 最近一次丢失的序号
+        self.errors = 0
+        self._busy = deque(maxlen=1000)   # 处理耗时 (秒)
+        self._delay = deque(maxlen=1000)  # 采集到开始处理的延迟 (秒)
+
+    def offer(self, buffer: RxBuffer):
+        """采集线程调用: 入队不阻塞"""
+        dropped = None
+        with self._cond:
+            if len(self._queue) >= self.maxsize:
+                dropped = self._queue.popleft()
+                self.overruns += 1
+                self.last_overrun_seq = dropped.seq
+            self._queue.append(buffer)
+            self.received += 1
+            self._cond.notify()
+        if dropped is not None and self.release is not None:
+            self.release(dropped)
+
+    def overrun(self, seq: int):
+        """缓冲区未能交给本消费者 (槽环无空闲槽)"""
+        with self._cond:
+            self.overruns += 1
+            self.last_overrun_seq = seq
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"rx-{self.name}")
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        with self._cond:
+            pending = list(self._queue)
+            self._queue.clear()
+        if self.release is not None:
+            for buffer in pending:
+                self.release(buffer)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                if not self._queue:
+                    self._cond.wait(0.5)
+                    continue
+                buffer = self._queue.popleft()
+            t0 = time.perf_counter()
+            try:
+                self.handler(buffer)
+            except Exception as e:
+                self.errors += 1
+                print(f"RX consumer {self.name} error: {e}")
+                traceback.print_exc()
+            t1 = time.perf_counter()
+            self._busy.append(t1 - t0)
+            self._delay.append(t0 - buffer.timestamp)
+            self.processed += 1
+            if self.release is not None:
+                self.release(buffer)
+
+    @staticmethod
+    def _percentiles(values) -> Optional[dict]:
+        if not values:
+            return None
+        ms = np.asarray(values) * 1e3
+        return {"p50": float(np.percentile(ms, 50)), "p99": float(np.percentile(ms, 99)),
+                "max": float(ms.max())}
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            busy = list(self._busy)
+            delay = list(self._delay)
+            depth = len(self._queue)
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "overruns": self.overruns,
+            "last_overrun_seq": self.last_overrun_seq,
+            "errors": self.errors,
+            "queue_depth": depth,
+            "busy_ms": self._percentiles(busy),
+            "delay_ms": self._percentiles(delay),
+        }
+
+
+class RxPipeline:
+    """
+    RX 分发器: 实例本身即为 start_streaming 的回调，acquire 作为驱动的缓冲池
+    center_freq_fn / status_fn 在采集线程中读取采集时的中心频率与溢出标志 (应为轻量读取)
+
+    Args:
+        slot_size: RX 缓冲区长度，None 时按首个缓冲区长度分配槽环
+    """
+
+    def __init__(self, center_freq_fn: Optional[Callable[[], float]] = None,
+                 status_fn: Optional[Callable[[], tuple]] = None, slot_size: Optional[int] = None):
+        self.center_freq_fn = center_freq_fn
+        self.status_fn = status_fn
+        self.slot_size = slot_size
+        self.consumers: Dict[str, RxConsumer] = {}
+        self.ring: Optional[IQRing] = None
+        self.published = 0
+        self.copied = 0  # 不是由驱动直接写入槽、需要拷贝的缓冲区数
+        self._running = False
+
+    def add_consumer(self, name: str, handler: Callable[[RxBuffer], None], maxsize: int = 10) -> RxConsumer:
+        if self._running:
+            raise RuntimeError("流水线运行中不能添加消费者")
+        consumer = RxConsumer(name, handler, maxsize, self._release)
+        self.consumers[name] = consumer
+        return consumer
+
+    @staticmethod
+    def _release(buffer: RxBuffer):
+        if buffer.ring is not None:
+            buffer.ring.release(buffer)
+
+    def _allocate_ring(self, slot_size: int):
+        """槽数保证所有消费者队列满且各处理一个缓冲区时仍有空闲槽"""
+        slots = sum(c.maxsize for c in self.consumers.values()) + len(self.consumers) + 1
+        self.ring = IQRing(slots, slot_size)
+
+    def start(self):
+        if self.slot_size and self.ring is None:
+            self._allocate_ring(self.slot_size)
+        self._running = True
+        for consumer in self.consumers.values():
+            consumer.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._running = False
+        for consumer in self.consumers.values():
+            consumer.stop(timeout)
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """采集线程: 取可写空闲槽，驱动把样本直接写入 (None 时驱动自行分配)"""
+        if not self._running or self.ring is None:
+            return None
+        return self.ring.acquire()
+
+    def publish(self, samples: np.ndarray):
+        """采集线程: 提交缓冲区，各消费者得到同一只读视图 (驱动已写入槽时不拷贝、不分配)"""
+        if not self._running:
+            return
+        self.published += 1
+        n = len(samples)
+        if self.ring is None or n > self.ring.slot_size:
+            self._allocate_ring(n)
+        ring = self.ring
+        if not ring.owns(samples):
+            row = ring.acquire()
+            if row is None:
+                for consumer in self.consumers.values():
+                    consumer.overrun(self.published)
+                return
+            row[:n] = samples
+            self.copied += 1
+        center_freq = self.center_freq_fn() if self.center_freq_fn else 0.0
+        overflow, underflow = self.status_fn() if self.status_fn else (False, False)
+        buffer = ring.commit(n, len(self.consumers), self.published, center_freq, overflow, underflow)
+        for consumer in self.consumers.values():
+            consumer.offer(buffer)
+
+    __call__ = publish
+
+    def get_stats(self) -> dict:
+        ring = self.ring
+        return {
+            "published": self.published,
+            "copied": self.copied,
+            "ring": {"slots": ring.slots, "slot_size": ring.slot_size, "in_use": ring.in_use(),
+                     "exhausted": ring.exhausted, "bytes": ring.nbytes} if ring else None,
+            "consumers": {name: c.get_stats() for name, c in self.consumers.items()},
+        }
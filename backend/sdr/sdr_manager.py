@@ -4,12 +4,13 @@ SDR 设备管理器
 """
 
 import threading
-from typing import Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 import iio
 import numpy as np
 
 from .pluto_driver import PlutoDriver, PlutoConfig
+from .waveform_cache import CachedWaveform, WaveformCache, compute_tx_preview
 
 
 @dataclass
@@ -32,6 +33,9 @@ class SDRInstance:
     mode: str = "rx"  # rx, tx, txrx
     is_active: bool = False
     is_streaming: bool = False
+    tx_engine: Optional[Any] = None  # 流式发射引擎 (TxStreamEngine)
+    tx_scheduler: Optional[Any] = None  # 多命令帧调度 (FrameScheduler)
+    telemetry_ingest: Optional[Any] = None  # 遥测接入 (TelemetryIngest)
 
 
 class SDRManager:
@@ -48,6 +52,8 @@ class SDRManager:
         self._devices: Dict[str, SDRInstance] = {}
         self._active_device_id: Optional[str] = None
         self._lock = threading.Lock()
+        # 发射波形与预览缓存 (按内容哈希，LRU + 内存上限)
+        self._waveform_cache = WaveformCache()
     
     def _get_mac_from_arp(self, ip_addr: str) -> str:
         """从 ARP 表获取 MAC 地址"""
@@ -198,6 +204,7 @@ class SDRManager:
         with self._lock:
             # 如果已存在，先断开
             if device_id in self._devices:
+                self._stop_tx_engine(self._devices[device_id])
                 self._devices[device_id].driver.disconnect()
             
             # 创建配置
@@ -233,6 +240,7 @@ class SDRManager:
         """
         with self._lock:
             if device_id in self._devices:
+                self._stop_tx_engine(self._devices[device_id])
                 self._devices[device_id].driver.disconnect()
                 del self._devices[device_id]
                 
@@ -326,112 +334,340 @@ class SDRManager:
             (是否成功启动, 预览频谱数据)
         """
         with self._lock:
-            if device_id not in self._devices:
-                return False
+            instance = self._devices.get(device_id)
+            if instance is None:
+                return False, None
+            sample_rate = instance.driver.config.sample_rate
+        
+        print(f"Starting TX signal '{signal_type}' on device {device_id} (Payload: {payload})")
+        
+        try:
+            from sdr.signal_generator import get_signal_params
             
-            # 这里简化实现：目前仅打印日志，实际需要生成对应波形并循环发送
-            # 将来可以在这里启动一个后台线程持续发送 samples
-            print(f"Starting TX signal '{signal_type}' on device {device_id} (Payload: {payload})")
+            # 获取信号参数
+            params = get_signal_params(signal_type)
+            target_freq = params.get('freq')
             
+            # 波形与预览优先从缓存获取，未命中时在管理器锁外生成
             try:
-                from sdr.signal_generator import generate_signal, get_signal_params
-                
-                # 获取信号参数
-                params = get_signal_params(signal_type)
-                target_freq = params.get('freq')
-                target_bandwidth = params.get('bandwidth', 540000)  # 默认 540kHz
-                target_power = params.get('power', -10)  # 默认 -10 dBm
-                
-                driver = self._devices[device_id].driver
-                
-                # 自动配置发射参数 (带详细错误处理)
-                try:
-                    if target_freq and hasattr(driver, 'set_tx_frequency'):
-                        driver.set_tx_frequency(target_freq)
-                except Exception as e:
-                    print(f"Error setting TX frequency: {e}")
-                    raise
-                
-                try:
-                    if hasattr(driver, 'set_tx_gain'):
-                        driver.set_tx_gain(target_power)
-                except Exception as e:
-                    print(f"Error setting TX gain: {e}")
-                    raise
+                waveform = self._get_waveform(signal_type, payload, sample_rate, params['baud'])
+            except Exception as e:
+                print(f"Error generating signal: {e}")
+                raise
+            
+            with self._lock:
+                instance = self._devices.get(device_id)
+                if instance is None:
+                    return False, None
+                driver = instance.driver
                 
-                try:
-                    if hasattr(driver, 'set_tx_rf_bandwidth'):
-                        driver.set_tx_rf_bandwidth(target_bandwidth)
-                except Exception as e:
-                    print(f"Error setting TX bandwidth: {e}")
-                    raise
+                # 循环发射与流式发射互斥
+                self._stop_tx_engine(instance)
                 
-                try:
-                    samples = generate_signal(signal_type, payload, self._devices[device_id].driver.config.sample_rate)
-                except Exception as e:
-                    print(f"Error generating signal: {e}")
-                    raise
+                # 自动配置发射参数
+                self._apply_tx_params(driver, params)
                 
                 try:
                     # 设置 cyclic buffer 以持续发送
-                    self._devices[device_id].driver.transmit_samples(samples)
-                    print(f"Transmitting {len(samples)} samples (Cyclic) at {target_freq/1e6:.2f} MHz")
+                    driver.transmit_samples(waveform.samples)
+                    print(f"Transmitting {len(waveform.samples)} samples (Cyclic) at {target_freq/1e6:.2f} MHz")
                 except Exception as e:
                     print(f"Error transmitting samples: {e}")
                     raise
+            
+            preview_data = dict(waveform.preview)
+            preview_data["center_freq"] = target_freq
+            return True, preview_data
+            
+        except Exception as e:
+            print(f"Failed to start TX signal: {e}")
+            return False, None
+
+    def start_multi_tx_signal(self, device_id: str, signals: List[Tuple[str, Optional[str]]],
+                              center_freq: Optional[float] = None):
+        """
+        一台设备同时发射多个信号 (多载波合成到同一循环缓冲区)
+        
+        Args:
+            device_id: 设备 ID
+            signals: [(signal_type, payload)]，payload 为 None 时发送随机数据
+            center_freq: 公共本振 (Hz)，None 时取各信号频率范围的中点
+            
+        Returns:
+            (是否成功启动, 预览频谱数据 (含各载波频偏/幅度))
+        """
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if instance is None:
+                return False, None
+            sample_rate = instance.driver.config.sample_rate
+        
+        print(f"Starting multi-carrier TX {[s for s, _ in signals]} on device {device_id}")
+        
+        try:
+            from sdr.multicarrier import generate_multicarrier
+            
+            key = WaveformCache.make_multi_key(sample_rate, signals, center_freq)
+            waveform = self._waveform_cache.get(key)
+            if waveform is None:
+                multi = generate_multicarrier(signals, sample_rate, center_freq)
+                preview = compute_tx_preview(multi.samples, sample_rate)
+                preview.update({
+                    "center_freq": multi.center_freq,
+                    "tx_gain": multi.tx_gain,
+                    "rf_bandwidth": multi.rf_bandwidth,
+                    "carriers": [{"signal_type": c.signal_type, "freq": c.freq, "offset": c.offset,
+                                  "amplitude": c.amplitude, "power": c.power, "frames": c.frames}
+                                 for c in multi.carriers],
+                })
+                waveform = self._waveform_cache.put(key, multi.samples, preview)
+            preview = waveform.preview
+            
+            with self._lock:
+                instance = self._devices.get(device_id)
+                if instance is None:
+                    return False, None
+                driver = instance.driver
+                self._stop_tx_engine(instance)
+                self._apply_tx_params(driver, {
+                    'freq': preview["center_freq"],
+                    'power': preview["tx_gain"],
+                    'bandwidth': preview["rf_bandwidth"],
+                })
+                driver.transmit_samples(waveform.samples)
+                print(f"Transmitting {len(waveform.samples)} samples (Cyclic, {len(signals)} carriers) "
+                      f"at {preview['center_freq']/1e6:.2f} MHz")
+            
+            return True, dict(preview)
+            
+        except Exception as e:
+            print(f"Failed to start multi-carrier TX: {e}")
+            return False, None
+
+    def _get_waveform(self, signal_type: str, payload: Optional[str], sample_rate: int,
+                      symbol_rate: int) -> CachedWaveform:
+        """
+        缓存的发射波形与预览频谱
+        无载荷的干扰信号 (随机数据) 同样缓存，重复发射复用同一段随机序列
+        """
+        from sdr.signal_generator import generate_signal
+        
+        key = WaveformCache.make_key(sample_rate, symbol_rate, payload)
+        entry = self._waveform_cache.get(key)
+        if entry is None:
+            samples = generate_signal(signal_type, payload, sample_rate)
+            entry = self._waveform_cache.put(key, samples, compute_tx_preview(samples, sample_rate))
+        return entry
+
+    def _apply_tx_params(self, driver: PlutoDriver, params: dict):
+        """按信号规格设置发射频率、功率与带宽 (带详细错误处理)"""
+        target_freq = params.get('freq')
+        try:
+            if target_freq and hasattr(driver, 'set_tx_frequency'):
+                driver.set_tx_frequency(target_freq)
+        except Exception as e:
+            print(f"Error setting TX frequency: {e}")
+            raise
+        
+        try:
+            if hasattr(driver, 'set_tx_gain'):
+                driver.set_tx_gain(params.get('power', -10))  # 默认 -10 dBm
+        except Exception as e:
+            print(f"Error setting TX gain: {e}")
+            raise
+        
+        try:
+            if hasattr(driver, 'set_tx_rf_bandwidth'):
+                driver.set_tx_rf_bandwidth(params.get('bandwidth', 540000))  # 默认 540kHz
+        except Exception as e:
+            print(f"Error setting TX bandwidth: {e}")
+            raise
+
+    def _stop_tx_engine(self, instance: SDRInstance):
+        self._drop_scheduler(instance)
+        if instance.tx_engine is not None:
+            instance.tx_engine.stop()
+            instance.tx_engine = None
+
+    def _drop_scheduler(self, instance: SDRInstance):
+        """停止遥测接入并丢弃帧调度器 (引擎帧源随之失效)"""
+        if instance.telemetry_ingest is not None:
+            instance.telemetry_ingest.stop()
+            instance.telemetry_ingest = None
+        instance.tx_scheduler = None
+
+    def start_tx_stream(self, device_id: str, signal_type: str, payload: Optional[str] = None,
+                        cmd_id: int = 0x0201, block_size: Optional[int] = None) -> bool:
+        """
+        开始流式 (非循环) 发射: 只配置一次射频参数，后续载荷通过 update_tx_payload 更新
+        
+        Args:
+            device_id: 设备 ID
+            signal_type: 信号类型 (决定频率/波特率/带宽/功率)
+            payload: 初始载荷 (Hex 或 ASCII，可选)
+            cmd_id: 命令码
+            block_size: 每次写入的样本数，默认 buffer_size；
+                新数据最多排在约 (NUM_BUFFERS + 1) 块之后，遥测接入要求 <= 4096 (TelemetryIngest.MAX_BLOCK_SIZE)
+            
+        Returns:
+            是否成功启动
+        """
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance:
+                return False
+            
+            try:
+                from sdr.signal_generator import get_signal_params, parse_payload
+                from sdr.tx_engine import TxStreamEngine
                 
-                # Generate Packet Preview Spectrum
-                # Use FFT with windowing for consistent dBFS scaling with RX spectrum
-                
-                # Use a reasonable segment for FFT
-                fft_size = 2048
-                preview_len = min(len(samples), fft_size * 8)  # Average over 8 segments
-                preview_samples = samples[:preview_len]
-                
-                sample_rate = self._devices[device_id].driver.config.sample_rate
-                
-                # Average multiple FFTs for smoother spectrum
-                num_segments = preview_len // fft_size
-                if num_segments < 1:
-                    num_segments = 1
-                    fft_size = len(preview_samples)
-                
-                window = np.hamming(fft_size)
-                window_sum = np.sum(window)
-                
-                avg_power = np.zeros(fft_size)
-                for i in range(num_segments):
-                    segment = preview_samples[i*fft_size : (i+1)*fft_size]
-                    if len(segment) < fft_size:
-                        continue
-                    fft_vals = np.fft.fft(segment * window)
-                    # Amplitude normalization for dBFS
-                    magnitude = np.abs(fft_vals) / window_sum
-                    avg_power += magnitude ** 2
-                
-                avg_power /= num_segments
-                power_db = 10 * np.log10(avg_power + 1e-12)
-                
-                # Shift to center
-                freqs = np.fft.fftfreq(fft_size, 1/sample_rate)
-                freqs = np.fft.fftshift(freqs)
-                power_db = np.fft.fftshift(power_db)
+                params = get_signal_params(signal_type)
+                driver = instance.driver
                 
-                # Downsample for UI
-                step = max(1, len(freqs) // 256)
-                preview_data = {
-                    "frequencies": freqs[::step].tolist(), 
-                    "power": power_db[::step].tolist(),
-                    "center_freq": target_freq
-                }
+                self._stop_tx_engine(instance)
+                self._apply_tx_params(driver, params)
+                driver.start_tx_stream()
                 
-                return True, preview_data
+                def on_underrun():
+                    driver._tx_underflow = True
                 
+                engine = TxStreamEngine(driver.write_tx_samples,
+                                        sample_rate=driver.config.sample_rate,
+                                        symbol_rate=params['baud'],
+                                        block_size=block_size or driver.config.buffer_size,
+                                        on_underrun=on_underrun)
+                engine.set_payload(parse_payload(payload) if payload else b'', cmd_id=cmd_id)
+                engine.start()
+                instance.tx_engine = engine
+                print(f"TX stream '{signal_type}' started on device {device_id}")
+                return True
             except Exception as e:
-                print(f"Failed to start TX signal: {e}")
-                return False, None
+                print(f"Failed to start TX stream: {e}")
+                return False
+
+    def update_tx_payload(self, device_id: str, payload: str, cmd_id: int = 0x0201) -> bool:
+        """
+        更新流式发射的载荷 (下一帧边界生效，不重新配置射频与缓冲区)
+        引擎回到循环发送单帧: 多命令调度与遥测接入一并结束，之后的 set_tx_command 重新建立调度
+        """
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.tx_engine is None:
+                return False
+            from sdr.signal_generator import parse_payload
+            self._drop_scheduler(instance)
+            instance.tx_engine.set_payload(parse_payload(payload), cmd_id=cmd_id)
+            return True
+
+    def set_tx_command(self, device_id: str, cmd_id: int, payload: str,
+                       rate_hz: Optional[float] = None) -> bool:
+        """
+        流式发射中按命令调度: 注册/更新命令的载荷与目标帧率
+        首次调用时把引擎切换为多命令调度 (短 Preamble，序号递增)
+        
+        Args:
+            device_id: 设备 ID
+            cmd_id: 命令码 (如 0x0A01)
+            payload: 载荷 (Hex 或 ASCII)
+            rate_hz: 目标帧率，新命令必须给出
+        """
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.tx_engine is None:
+                return False
+            from sdr.signal_generator import parse_payload
+            from sdr.telemetry_ingest import POSITION_CMD_ID
             
-            return True, None
+            if instance.telemetry_ingest is not None and cmd_id == POSITION_CMD_ID:
+                print(f"Command 0x{cmd_id:04X} is fed by telemetry ingest, stop it first")
+                return False
+            try:
+                self._get_scheduler(instance).set_payload(cmd_id, parse_payload(payload), rate_hz)
+            except ValueError as e:
+                print(f"Error scheduling command 0x{cmd_id:04X}: {e}")
+                return False
+            return True
+
+    def _get_scheduler(self, instance: SDRInstance):
+        """取得 (首次时创建) 流式发射引擎的帧调度器，并设为引擎帧源"""
+        if instance.tx_scheduler is None:
+            from sdr.frame_scheduler import FrameScheduler
+            instance.tx_scheduler = FrameScheduler(instance.tx_engine.symbol_rate)
+            instance.tx_engine.set_frame_source(instance.tx_scheduler.next_frame)
+        return instance.tx_scheduler
+
+    def start_telemetry_ingest(self, device_id: str, port: Optional[int] = 9100,
+                               unix_path: Optional[str] = None) -> Optional[dict]:
+        """
+        流式发射中开启遥测接入: 本地 UDP 端口 / Unix 数据报套接字收到的坐标
+        直接编码为 0x0A01 帧，在下一个帧边界发送
+        流式发射须以小块启动 (start_tx_stream block_size <= TelemetryIngest.MAX_BLOCK_SIZE)，
+        且 0x0A01 未经 set_tx_command 调度
+        
+        Returns:
+            接入统计 (含实际监听地址)，失败返回 None
+        """
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.tx_engine is None:
+                return None
+            from sdr.telemetry_ingest import TelemetryIngest
+            
+            if instance.telemetry_ingest is not None:
+                instance.telemetry_ingest.stop()
+                instance.telemetry_ingest = None
+            udp_addr = ('127.0.0.1', port) if port is not None else None
+            try:
+                # 先检查块大小，拒绝时不把引擎切换为调度模式
+                TelemetryIngest.check_engine(instance.tx_engine)
+                ingest = TelemetryIngest(self._get_scheduler(instance), udp_addr=udp_addr, unix_path=unix_path)
+                ingest.attach(instance.tx_engine)
+            except ValueError as e:
+                print(f"Failed to start telemetry ingest: {e}")
+                return None
+            try:
+                ingest.start()
+            except OSError as e:
+                print(f"Failed to start telemetry ingest: {e}")
+                ingest.stop()
+                return None
+            instance.telemetry_ingest = ingest
+            print(f"Telemetry ingest on {ingest.udp_addr or unix_path} for device {device_id}")
+            return ingest.get_stats()
+
+    def stop_telemetry_ingest(self, device_id: str) -> bool:
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.telemetry_ingest is None:
+                return False
+            instance.telemetry_ingest.stop()
+            instance.telemetry_ingest = None
+            return True
+
+    def remove_tx_command(self, device_id: str, cmd_id: int) -> bool:
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.tx_scheduler is None:
+                return False
+            from sdr.telemetry_ingest import POSITION_CMD_ID
+            if instance.telemetry_ingest is not None and cmd_id == POSITION_CMD_ID:
+                print(f"Command 0x{cmd_id:04X} is fed by telemetry ingest, stop it first")
+                return False
+            instance.tx_scheduler.remove_command(cmd_id)
+            return True
+
+    def get_tx_stats(self, device_id: str) -> Optional[dict]:
+        """流式发射统计 (未在流式发射时返回 None)，调度模式下含各命令目标/实际帧率"""
+        with self._lock:
+            instance = self._devices.get(device_id)
+            if not instance or instance.tx_engine is None:
+                return None
+            stats = instance.tx_engine.get_stats()
+            if instance.tx_scheduler is not None:
+                stats["schedule"] = instance.tx_scheduler.get_stats()
+            if instance.telemetry_ingest is not None:
+                stats["telemetry"] = instance.telemetry_ingest.get_stats()
+            return stats
 
     def stop_tx_signal(self, device_id: str) -> bool:
         """停止信号发射"""
@@ -440,6 +676,8 @@ class SDRManager:
                 return False
             print(f"Stopping TX signal on device {device_id}")
             
+            self._stop_tx_engine(self._devices[device_id])
+            
             try:
                 self._devices[device_id].driver.stop_transmission()
             except:
@@ -447,13 +685,15 @@ class SDRManager:
                 
             return True
 
-    def start_streaming(self, device_id: str, callback: Callable[[np.ndarray], None]) -> bool:
+    def start_streaming(self, device_id: str, callback: Callable[[np.ndarray], None],
+                        buffer_pool=None) -> bool:
         """
         启动指定设备的数据流
         
         Args:
             device_id: 设备 ID
             callback: 数据处理回调函数
+            buffer_pool: 可选缓冲池 (如 RxPipeline)，驱动把样本直接写入池中的槽
             
         Returns:
             是否成功
@@ -468,7 +708,7 @@ class SDRManager:
                 
             try:
                 if hasattr(instance.driver, 'start_streaming'):
-                    instance.driver.start_streaming(callback)
+                    instance.driver.start_streaming(callback, buffer_pool)
                     instance.is_streaming = True
                     return True
             except Exception as e:
@@ -509,6 +749,7 @@ class SDRManager:
         with self._lock:
             for device_id in list(self._devices.keys()):
                 try:
+                    self._stop_tx_engine(self._devices[device_id])
                     self._devices[device_id].driver.disconnect()
                 except:
                     pass
@@ -4,10 +4,14 @@ import math
 import struct
 import sys
 import os
+import threading
+from functools import lru_cache
+from typing import Optional
 
 # Ensure we can import from protocol
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
-from protocol.crc import append_crc8_check_sum, append_crc16_check_sum
+from protocol.crc import Crc8, Crc16
+from protocol.symbol_codec import bytes_to_levels
 
 # 信号规格定义 (频率, 波特率, 带宽, 功率dBm)
 # Ref: Implementation Plan - RoboMaster 2026 规则
@@ -70,35 +74,197 @@ def generate_rrc_coeffs(alpha, samples_per_symbol, span, fs, symbol_rate):
         # Normalize to unit energy, then scale by samples_per_symbol
         return (coeffs / np.sum(coeffs)) * samples_per_symbol
 
-def _construct_frame(payload: bytes, cmd_id: int = 0x0201) -> bytes:
+@lru_cache(maxsize=32)
+def get_rrc_taps(alpha: float, sps: int, fs: int, symbol_rate: int) -> np.ndarray:
+    """缓存的 RRC 系数 (float32 只读)，避免每次生成信号都重新导入 firdes 并设计滤波器"""
+    taps = np.asarray(generate_rrc_coeffs(alpha, sps, span=6, fs=fs, symbol_rate=symbol_rate),
+                      dtype=np.float32)
+    taps.setflags(write=False)
+    return taps
+
+class PulseShapeTable:
     """
-    构造 RoboMaster 协议帧
-    Preamble (4B) + SOF (1B) + Len (2B) + Seq (1B) + CRC8 (1B) + CmdID (2B) + Data (N) + CRC16 (2B)
+    多相脉冲表: 频率轨迹是各符号电平乘以平移后的 RRC 脉冲之和，
+    按符号周期分行后第 m 行 = sum_i level[m-i] * poly[i]，poly[i] = taps[i*sps:(i+1)*sps] * 灵敏度。
+    直接给出每个采样的相位增量 (rad/sample)，一次矩阵乘法代替补零冲激序列卷积。
+
+    Args:
+        taps: RRC 系数
+        sps: 每符号采样数
+        sensitivity: FM 调制灵敏度
+    """
+
+    def __init__(self, taps: np.ndarray, sps: int, sensitivity: float):
+        self.sps = sps
+        self.ntaps = len(taps)
+        self.span = -(-len(taps) // sps)  # 每个符号影响的符号周期数
+        padded = np.zeros(self.span * sps, dtype=np.float32)
+        padded[:len(taps)] = np.asarray(taps, dtype=np.float32) * np.float32(sensitivity)
+        # 反转行序: 滑动窗口 [level[m-span+1] ... level[m]] 直接与之相乘
+        self.poly = np.ascontiguousarray(padded.reshape(self.span, sps)[::-1])
+        # 单位电平符号对总相位的贡献
+        self.pulse_phase = float(padded.sum(dtype=np.float64))
+
+    def increments(self, levels: np.ndarray) -> np.ndarray:
+        """
+        levels 前面带 span-1 个上下文电平，返回 (len(levels)-span+1, sps) 的 float32 相位增量
+        """
+        windows = np.lib.stride_tricks.sliding_window_view(levels, self.span)
+        return windows @ self.poly
+
+    def symbol_phases(self, increments: np.ndarray, start: float = 0.0) -> np.ndarray:
+        """每个符号周期起始相位 (按 2pi 回绕的 float32)，start 为第一个符号周期之前的相位"""
+        row_sums = increments.sum(axis=1, dtype=np.float64)
+        phases = np.empty(len(row_sums), dtype=np.float64)
+        phases[0] = start
+        np.cumsum(row_sums[:-1], out=phases[1:])
+        phases[1:] += start
+        return np.mod(phases, 2 * np.pi).astype(np.float32)
+
+    def render(self, increments: np.ndarray, starts: np.ndarray, amplitude: float,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """相位增量 -> complex64 IQ (行内 float32 累加，行首相位已回绕)"""
+        phase = np.cumsum(increments, axis=1, dtype=np.float32)
+        phase += starts[:, np.newaxis]
+        if out is None:
+            out = np.empty(phase.size, dtype=np.complex64)
+        iq = out.view(np.float32).reshape(-1, 2)
+        phase = phase.ravel()
+        np.cos(phase, out=iq[:, 0])
+        np.sin(phase, out=iq[:, 1])
+        iq *= np.float32(amplitude)
+        return out
+
+@lru_cache(maxsize=32)
+def get_pulse_table(fs: int, symbol_rate: int, alpha: float = 0.25,
+                    sensitivity: float = 0.54) -> PulseShapeTable:
+    """按 (sps, alpha, 灵敏度) 缓存的脉冲表"""
+    sps = max(2, int(fs / symbol_rate))
+    return PulseShapeTable(get_rrc_taps(alpha, sps, fs, symbol_rate), sps, sensitivity)
+
+class FskWaveform:
+    """
+    一段字节流的 4-RRC-FSK 波形 (等同于补零冲激序列 'full' 卷积后 FM 调制)
+    set_data() 只重算改动字节影响的符号区间，其后的样本整体旋转相位差。
+
+    Args:
+        table: 脉冲表
+        data: 字节流 (含 Preamble 的完整帧)
+        amplitude: 输出幅度
+    """
+
+    # 两处改动相隔不超过该字节数时合并为一个区间重算
+    MERGE_GAP = 4
+    # 短于该字节数时整段重建更快 (增量更新每个区间有固定开销)
+    INCREMENTAL_MIN_BYTES = 160
+
+    def __init__(self, table: PulseShapeTable, data: bytes, amplitude: float = 0.9):
+        self.table = table
+        self.amplitude = amplitude
+        self._build(data)
+
+    def _build(self, data: bytes):
+        table = self.table
+        ctx = table.span - 1
+        self.data = bytes(data)
+        # 开头补 span-1 个零电平 (零初始状态)，结尾补 span 个: 滤波器拖尾，外加 'full' 卷积末尾
+        # 最后一个冲激之后的 sps-1 个零样本 (taps 恰为 sps 整数倍时如 firdes 的 11*sps，拖尾少一行)
+        self._levels = np.zeros(len(data) * 4 + 2 * ctx + 1, dtype=np.float32)
+        bytes_to_levels(self.data, out=self._levels[ctx:ctx + len(data) * 4])
+        self._inc = table.increments(self._levels)
+        self._starts = table.symbol_phases(self._inc)
+        self._iq = table.render(self._inc, self._starts, self.amplitude)
+
+    @property
+    def samples(self) -> np.ndarray:
+        """complex64 样本 (长度同 np.convolve(upsampled, taps, 'full'))，只读视图"""
+        n = len(self.data) * 4 * self.table.sps + self.table.ntaps - 1
+        view = self._iq[:n]
+        view.flags.writeable = False
+        return view
+
+    def set_data(self, data: bytes):
+        """替换字节流: 长度相同时增量更新，否则重建"""
+        if len(data) != len(self.data) or len(data) < self.INCREMENTAL_MIN_BYTES:
+            self._build(data)
+            return
+        old = np.frombuffer(self.data, dtype=np.uint8)
+        new = np.frombuffer(data, dtype=np.uint8)
+        changed = np.flatnonzero(old != new)
+        if len(changed) == 0:
+            return
+        if len(changed) * 2 > len(new):
+            self._build(data)
+            return
+        # 按间隔切分成若干改动区间
+        breaks = np.flatnonzero(np.diff(changed) > self.MERGE_GAP)
+        starts = np.concatenate(([changed[0]], changed[breaks + 1]))
+        ends = np.concatenate((changed[breaks], [changed[-1]])) + 1
+        self.data = bytes(data)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            self._update_span(start, end)
+
+    def _update_span(self, start: int, end: int):
+        table = self.table
+        ctx = table.span - 1
+        sps = table.sps
+        bytes_to_levels(self.data[start:end], out=self._levels[ctx + start * 4:ctx + end * 4])
+
+        # 受影响的符号周期: 改动符号起到其脉冲拖尾结束 (_inc 共 4N+span 行，末行之后无样本)
+        a = start * 4
+        b = min(len(self._inc), end * 4 + ctx)
+        old_sum = self._inc[a:b].sum(dtype=np.float64)
+        self._inc[a:b] = table.increments(self._levels[a:b + ctx])
+        delta = self._inc[a:b].sum(dtype=np.float64) - old_sum
+
+        self._starts[a:b] = table.symbol_phases(self._inc[a:b], float(self._starts[a]))
+        table.render(self._inc[a:b], self._starts[a:b], self.amplitude, out=self._iq[a * sps:b * sps])
+        # 之后的样本只差一个常数相位
+        if b < len(self._inc) and delta != 0.0:
+            self._starts[b:] = np.mod(self._starts[b:] + delta, 2 * np.pi)
+            self._iq[b * sps:] *= np.complex64(np.exp(1j * delta))
+
+@lru_cache(maxsize=2048)
+def _frame_prefix(data_len: int, seq: int, cmd_id: int):
+    """
+    固定帧头前缀及其 CRC16 中间状态 (按 长度/序号/命令 缓存)
+    Header: SOF + Len(2, LE) + Seq + CRC8，CRC8 覆盖 [SOF, Len, Seq]
     """
-    # Preamble: [3,1,-1,-3] repeated 32 times -> 0xE4 repeated 32 times
-    # Increased from 4 to 32 to allow RX AGC/Clock Recovery to lock before SOF
-    PREAMBLE = bytes([0xE4] * 32)
     SOF = 0xA5
-    
-    data_len = len(payload)
-    seq = 0x00 # Sequence number (fixed for broadcast)
-    
-    # Header: SOF + Len(2, LE) + Seq + CRC8
-    # CRC8 covers [SOF, Len, Seq]
     header_data = struct.pack('<BHB', SOF, data_len, seq)
-    header_with_crc = append_crc8_check_sum(header_data)
+    header_with_crc = header_data + Crc8(header_data).digest()
     
-    # Body: CmdID(2, LE) + Data
-    body = struct.pack('<H', cmd_id) + payload
+    # Body 前缀: CmdID(2, LE)
+    # 标准 RM 协议: CRC16 覆盖从 SOF 到 Data 末尾的整帧 (含 CRC8)
+    prefix = header_with_crc + struct.pack('<H', cmd_id)
+    return prefix, Crc16(prefix)
+
+def _construct_frame(payload: bytes, cmd_id: int = 0x0201, seq: int = 0,
+                     preamble_len: int = 32) -> bytes:
+    """
+    构造 RoboMaster 协议帧
+    Preamble (4B) + SOF (1B) + Len (2B) + Seq (1B) + CRC8 (1B) + CmdID (2B) + Data (N) + CRC16 (2B)
     
-    # Frame for CRC16: Header(with CRC8) + Body
-    # Note: CRC8 is INCLUDED in CRC16 calculation (per some RM implementations)
-    # Actually standard RM protocol: CRC16 covers whole frame from SOF to end of Data
+    Args:
+        preamble_len: Preamble 字节数。单帧循环发射用 32；连续背靠背发送时接收端
+                      已锁定，只需满足帧同步 (至少 1 字节)
+    """
+    # Preamble: [3,1,-1,-3] repeated 32 times -> 0xE4 repeated 32 times
+    # Increased from 4 to 32 to allow RX AGC/Clock Recovery to lock before SOF
+    PREAMBLE = bytes([0xE4] * preamble_len)
     
-    frame_content = header_with_crc + body
-    frame_with_crc16 = append_crc16_check_sum(frame_content)
+    # 帧头 CRC 状态复用缓存，只对 payload 继续计算 CRC16
+    prefix, prefix_crc = _frame_prefix(len(payload), seq & 0xFF, cmd_id)
+    crc16 = prefix_crc.copy().update(payload)
     
-    return PREAMBLE + frame_with_crc16
+    return PREAMBLE + prefix + payload + crc16.digest()
+
+def parse_payload(payload: str) -> bytes:
+    """用户载荷: 优先按 Hex 解析，否则按 UTF-8 文本"""
+    try:
+        return bytes.fromhex(payload)
+    except ValueError:
+        return payload.encode('utf-8')
 
 def generate_signal(signal_type: str, payload: str = None, sample_rate: int = 2000000) -> np.ndarray:
     """
@@ -109,14 +275,25 @@ def generate_signal(signal_type: str, payload: str = None, sample_rate: int = 20
     baud_rate = params['baud']
     return _generate_4rrc_fsk(payload, sample_rate, baud_rate)
 
+# 每组 (采样率, 符号率) 保留最近一次的波形，载荷只改动少量字节时增量更新
+_waveforms = {}
+_waveforms_lock = threading.Lock()
+
+def _synthesize(frame_bytes: bytes, fs: int, symbol_rate: int) -> np.ndarray:
+    """合成一帧的 IQ 样本 (返回独立副本)"""
+    key = (fs, symbol_rate)
+    with _waveforms_lock:
+        waveform = _waveforms.get(key)
+        if waveform is None:
+            waveform = _waveforms[key] = FskWaveform(get_pulse_table(fs, symbol_rate), frame_bytes)
+        else:
+            waveform.set_data(frame_bytes)
+        return waveform.samples.copy()
+
 def _generate_4rrc_fsk(payload: str, fs: int, symbol_rate: int) -> np.ndarray:
     """
     生成 4-RRC-FSK 调制信号 
     """
-    alpha = 0.25
-    sps = int(fs / symbol_rate) 
-    if sps < 2: sps = 2 
-    
     # 1. Payload to Bytes
     if not payload:
         # 无载荷时使用随机数据 (但仍封装为帧?)
@@ -127,50 +304,12 @@ def _generate_4rrc_fsk(payload: str, fs: int, symbol_rate: int) -> np.ndarray:
         payload_bytes = np.random.randint(0, 256, size=num_symbols//4, dtype=np.uint8).tobytes()
         frame_bytes = payload_bytes # Raw random data
     else:
-        # 解析用户提供的载荷
-        try:
-            user_data = bytes.fromhex(payload)
-        except:
-            user_data = payload.encode('utf-8')
-            
-        # 构造完整协议帧
-        frame_bytes = _construct_frame(user_data)
+        # 解析用户提供的载荷并构造完整协议帧
+        frame_bytes = _construct_frame(parse_payload(payload))
         
     # Mapping: 00->-3, 01->-1, 10->1, 11->3
-    # Bytes to 2-bit chunks
-    sym_val_map = {
-        0: -3.0, # 00
-        1: -1.0, # 01
-        2:  1.0, # 10
-        3:  3.0  # 11
-    }
-    
-    symbols = []
-    for b in frame_bytes:
-        symbols.append(sym_val_map[(b >> 6) & 0x03])
-        symbols.append(sym_val_map[(b >> 4) & 0x03])
-        symbols.append(sym_val_map[(b >> 2) & 0x03])
-        symbols.append(sym_val_map[(b) & 0x03])
-        
-    # 2. Upsample (Impulse Train)
-    upsampled = np.zeros(len(symbols) * sps)
-    upsampled[::sps] = symbols
-    
-    # 3. RRC Filtering (Interpolation)
-    rrc_coeffs = generate_rrc_coeffs(alpha, sps, span=6, fs=fs, symbol_rate=symbol_rate)
-    
-    # Apply interpolation filter (convolve with upsampled signal)
-    freq_trajectory = np.convolve(upsampled, rrc_coeffs, mode='full')
-    
-    # 4. FM Modulation
-    sensitivity = 0.54
-    phase = np.cumsum(sensitivity * freq_trajectory)
-    
-    # 5. IQ Generation
-    iq = np.exp(1j * phase).astype(np.complex64)
-    
-    # Amplitude Control
-    iq = iq * 0.9 
+    # 2-5. 多相脉冲表合成 (RRC 成形 + FM 调制)，float32/complex64
+    iq = _synthesize(frame_bytes, fs, symbol_rate)
     
     # Cyclic Buffer Logic (Ensure min size)
     MIN_SAMPLES = 32768
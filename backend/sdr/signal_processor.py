@@ -1,59 +1,209 @@
 """
 Signal Processor Module - GNU Radio Implementation
+频谱计算:
+- single: 只对缓冲区最后 fft_size 个样本做一次 FFT (旧行为)
+- welch: 整个缓冲区按步长切成重叠分段 (零拷贝跨步视图)，批量加窗 FFT 后取平均
+两种模式都可在缓冲区之间做指数平均与峰值保持
+显示前用 pool_spectrum 把 N 个频点合并为客户端需要的 M 个点 (max 保峰值，mean 看噪声底)
 """
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from gnuradio import fft
 from gnuradio.fft import window
 import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+try:
+    # scipy.fft 支持单精度批量变换
+    import scipy.fft as _fft
+    SCIPY_FFT_AVAILABLE = True
+except ImportError:
+    import numpy.fft as _fft
+    SCIPY_FFT_AVAILABLE = False
+
+
+class SpectrumData:
+    """
+    频谱结果
+    freqs / power 为 NumPy 数组 (Hz / dB)，peak 为峰值保持 (dB，未开启时为 None)
+    frequencies / power_db 为列表 (兼容旧接口)
+    """
+    __slots__ = ('freqs', 'power', 'peak', 'segments')
+
+    def __init__(self, freqs: np.ndarray, power: np.ndarray, peak: Optional[np.ndarray] = None,
+                 segments: int = 1):
+        self.freqs = freqs
+        self.power = power
+        self.peak = peak
+        self.segments = segments
+
+    @property
+    def frequencies(self) -> list:
+        return self.freqs.tolist()
+
+    @property
+    def power_db(self) -> list:
+        return self.power.tolist()
+
+
+POOLING_MODES = ('max', 'mean')
+
+
+@lru_cache(maxsize=64)
+def _pool_plan(n: int, bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """N 个频点分成 bins 组 (组长相差不超过 1): 各组起点、长度与中心位置 (只读)"""
+    starts = np.linspace(0, n, bins + 1).round().astype(np.intp)
+    counts = np.diff(starts).astype(np.float32)
+    starts = starts[:-1]
+    centers = starts + (counts - 1) / 2.0
+    for array in (starts, counts, centers):
+        array.setflags(write=False)
+    return starts, counts, centers
+
+
+def pool_spectrum(spectrum: SpectrumData, bins: int, pooling: str = 'max') -> SpectrumData:
+    """
+    频谱降点: 每组相邻频点合并为一个输出点 (reduceat 一次完成)
+
+    Args:
+        spectrum: compute_spectrum 的结果
+        bins: 输出点数 M，不小于输入点数时原样返回
+        pooling: 'max' 取组内最大值 (窄带信号不会落在保留点之间而丢失)，
+            'mean' 取组内线性功率平均 (噪声底)；峰值保持总是取最大值
+
+    Returns:
+        SpectrumData，频率为各组中心 (等间隔频率轴上即组内频点的平均值)
+    """
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling: {pooling}")
+    n = len(spectrum.power)
+    if bins >= n:
+        return spectrum
+    starts, counts, centers = _pool_plan(n, max(1, bins))
+    freqs = spectrum.freqs[0] + (spectrum.freqs[1] - spectrum.freqs[0]) * centers
+    if pooling == 'max':
+        power = np.maximum.reduceat(spectrum.power, starts)
+    else:
+        linear = np.power(np.float32(10.0), spectrum.power * np.float32(0.1))
+        power = 10 * np.log10(np.add.reduceat(linear, starts) / counts)
+    peak = np.maximum.reduceat(spectrum.peak, starts) if spectrum.peak is not None else None
+    return SpectrumData(freqs, power, peak, spectrum.segments)
+
 
 class SignalProcessor:
-    """信号处理器: 使用 GNU Radio FFT"""
-    
-    def __init__(self, sample_rate: int, fft_size: int = 1024):
+    """
+    信号处理器: 使用 GNU Radio 窗函数与 FFT
+
+    Args:
+        sample_rate: 采样率 (Hz)
+        fft_size: FFT 点数 (频率分辨率 sample_rate / fft_size)
+        mode: 'welch' 使用整个缓冲区平均，'single' 只用最后 fft_size 个样本
+        overlap: welch 分段重叠比例 (0 为不重叠的 Bartlett 平均，0.5 为经典 Welch)
+        avg_alpha: 缓冲区间指数平均系数 (0-1，越小越平滑)，None 不平均
+        peak_hold: 是否在缓冲区间保持各频点最大值
+    """
+
+    MODES = ('single', 'welch')
+
+    def __init__(self, sample_rate: int, fft_size: int = 1024, mode: str = 'welch',
+                 overlap: float = 0.0, avg_alpha: Optional[float] = None, peak_hold: bool = False):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown spectrum mode: {mode}")
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError(f"overlap must be in [0, 1), got {overlap}")
         self.sample_rate = sample_rate
         self.fft_size = fft_size
-        
+        self.mode = mode
+        self.overlap = overlap
+        self.avg_alpha = avg_alpha
+        self.peak_hold = peak_hold
+        self._step = max(1, int(round(fft_size * (1 - overlap))))
+
         # Windows
         self.win = window.hanning(fft_size)
-    
-    def compute_spectrum(self, samples: np.ndarray, center_freq: float = 0.0):
+        # 归一化合并进窗: ADC 满幅 (12-bit, +/- 2048) 与窗函数和 (0 dBFS 正弦 -> 0 dB)；
+        # 乘 (-1)^n 使 FFT 输出直接按 fftshift 顺序排列
+        win = np.asarray(self.win, dtype=np.float64)
+        shift = np.where(np.arange(fft_size) % 2, -1.0, 1.0)
+        self._window = (win * shift / (2048.0 * win.sum())).astype(np.float32)
+
+        self._buf: Optional[np.ndarray] = None   # 加窗分段 (segments, fft_size) complex64
+        self._avg: Optional[np.ndarray] = None   # 指数平均 (线性功率)
+        self._peak: Optional[np.ndarray] = None  # 峰值保持 (线性功率)
+        self._freqs: Optional[np.ndarray] = None
+        self._freqs_center: Optional[float] = None
+
+    def reset(self):
+        """清除指数平均与峰值保持"""
+        self._avg = None
+        self._peak = None
+
+    def _frequencies(self, center_freq: float) -> np.ndarray:
+        """计算相对频率并加上中心频率偏移 (按中心频率缓存)"""
+        if self._freqs is None or self._freqs_center != center_freq:
+            freqs_relative = np.fft.fftshift(np.fft.fftfreq(self.fft_size, 1.0 / self.sample_rate))
+            self._freqs = freqs_relative + center_freq
+            self._freqs.setflags(write=False)
+            self._freqs_center = center_freq
+        return self._freqs
+
+    def _segments(self, samples: np.ndarray) -> np.ndarray:
+        """待变换的分段 (跨步视图，不拷贝)"""
+        n = self.fft_size
+        if len(samples) < n:
+            samples = np.pad(samples, (0, n - len(samples)), 'constant')
+        if self.mode == 'single':
+            return samples[-n:].reshape(1, n)
+        # 对齐到缓冲区末尾，保证最新样本总在最后一段中
+        step = self._step
+        start = (len(samples) - n) % step
+        count = (len(samples) - start - n) // step + 1
+        stride = samples.strides[0]
+        # 只读跨步视图 (sliding_window_view 的开销约为整个变换的 1/7)
+        return as_strided(samples[start:], shape=(count, n), strides=(step * stride, stride),
+                          writeable=False)
+
+    def _power(self, segments: np.ndarray) -> np.ndarray:
+        """各分段加窗 FFT 后的平均功率 (线性，已 fftshift)"""
+        count = len(segments)
+        if self._buf is None or len(self._buf) != count:
+            self._buf = np.empty((count, self.fft_size), dtype=np.complex64)
+        # 加窗同时完成拷贝与单精度转换
+        np.multiply(segments, self._window, out=self._buf)
+        if SCIPY_FFT_AVAILABLE:
+            spectrum = _fft.fft(self._buf, axis=1, overwrite_x=True, workers=1)
+        else:
+            spectrum = _fft.fft(self._buf, axis=1).astype(np.complex64)
+        # |X|^2 按分段求和: 实部/虚部展开为 float32 后一次 einsum
+        flat = spectrum.view(np.float32)
+        sums = np.einsum('ij,ij->j', flat, flat)
+        power = sums[0::2] + sums[1::2]
+        power /= count
+        return power
+
+    def compute_spectrum(self, samples: np.ndarray, center_freq: float = 0.0) -> SpectrumData:
         """
         计算频谱 (PSD)
         """
-        if len(samples) < self.fft_size:
-            if len(samples) == 0:
-                pass # return empty
-            pad_len = self.fft_size - len(samples)
-            samples = np.pad(samples, (0, pad_len), 'constant')
-        else:
-            samples = samples[-self.fft_size:]
-            
-        # Normalize samples to [-1, 1] range (ADC is 12-bit, +/- 2048)
-        # This converts ADC counts to Volts/Float reference
-        samples_norm = samples / 2048.0
-        
-        # 使用 numpy，等效于 GR 的 FFT 模块逻辑
-        windowed = samples_norm * self.win
-        
-        # Normalize by Window Sum (Standard Amplitude/Power Normalization)
-        # 0 dBFS sine wave -> 0 dB Power
-        window_sum = np.sum(self.win)
-        fft_result = np.fft.fft(windowed) / window_sum
-        fft_result = np.fft.fftshift(fft_result)
-        
-        power = np.abs(fft_result)**2
+        power = self._power(self._segments(samples))
+
+        if self.avg_alpha is not None:
+            if self._avg is None:
+                self._avg = power.copy()
+            else:
+                self._avg += self.avg_alpha * (power - self._avg)
+            power = self._avg
+
+        peak_db = None
+        if self.peak_hold:
+            if self._peak is None:
+                self._peak = power.copy()
+            else:
+                np.maximum(self._peak, power, out=self._peak)
+            peak_db = 10 * np.log10(self._peak + 1e-20)
+
         power_db = 10 * np.log10(power + 1e-20)
-        
-        # 计算相对频率并加上中心频率偏移
-        freqs_relative = np.fft.fftshift(np.fft.fftfreq(self.fft_size, 1.0/self.sample_rate))
-        freqs = freqs_relative + center_freq
-        
-        # 兼容 SpectrumData 接口
-        # 为了避免循环引用，我们返回简单的对象或 dict
-        class SpectrumDataStub:
-            def __init__(self, f, p):
-                self.frequencies = f.tolist()
-                self.power_db = p.tolist()
-                
-        return SpectrumDataStub(freqs, power_db)
+        return SpectrumData(self._frequencies(center_freq), power_db, peak_db,
+                            segments=1 if self.mode == 'single' else len(self._buf))
@@ -0,0 +1,141 @@
+"""
+二进制频谱帧
+替代每个 RX 缓冲区一条的 JSON 频谱消息 (频率轴与功率都是浮点列表)，
+功率量化为 uint8 / int16，频率轴只在变化时单独发送一次。
+
+帧格式 (小端，版本 1):
+    头部 44 字节:
+        magic 'SP' (2) + version (1) + kind (1) + flags (1) + dtype (1) + id_len (1) + 保留 (1)
+        + bins (2) + axis_id (2) + center_freq f64 + bin_width f64 + timestamp f64
+        + offset f32 + step f32
+    设备 ID (UTF-8，id_len 字节)
+    kind = KIND_POWER: bins 个量化值 (dB = offset + step * q)，flags & FLAG_PEAK 时再跟 bins 个峰值保持
+    kind = KIND_AXIS: bins 个 float64 频率 (Hz)，axis_id 标识本轴，功率帧按 axis_id 引用
+flags: FLAG_OVERFLOW / FLAG_UNDERFLOW / FLAG_PEAK
+"""
+
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+SPECTRUM_MAGIC = b'SP'
+SPECTRUM_VERSION = 1
+HEADER = struct.Struct('<2sBBBBBxHHdddff')
+
+KIND_POWER = 0
+KIND_AXIS = 1
+
+FLAG_OVERFLOW = 0x01
+FLAG_UNDERFLOW = 0x02
+FLAG_PEAK = 0x04
+
+# 量化格式: 名称 -> (dtype 码, NumPy 类型, offset, step)
+# uint8: -127.5 ~ 0 dBFS，0.5 dB 步进；int16: +/-327 dB，0.01 dB 步进
+QUANTIZATION = {
+    'uint8': (0, np.dtype('u1'), -127.5, 0.5),
+    'int16': (1, np.dtype('<i2'), 0.0, 0.01),
+}
+_DTYPE_BY_CODE = {code: np_type for code, np_type, _, _ in QUANTIZATION.values()}
+AXIS_DTYPE = 2  # float64 频率轴
+
+
+class SpectrumFrame:
+    """一次频谱更新的二进制编码 (同一设备所有二进制客户端共用)"""
+    __slots__ = ('axis_id', 'axis', 'data')
+
+    def __init__(self, axis_id: int, axis: bytes, data: bytes):
+        self.axis_id = axis_id
+        self.axis = axis
+        self.data = data
+
+
+def quantize(power_db: np.ndarray, dtype: str) -> np.ndarray:
+    """dB -> 量化值 (超出范围的截断)"""
+    _, np_type, offset, step = QUANTIZATION[dtype]
+    info = np.iinfo(np_type)
+    q = np.rint((np.asarray(power_db, dtype=np.float32) - offset) * (1.0 / step))
+    return np.clip(q, info.min, info.max).astype(np_type)
+
+
+def decode_frame(data: bytes) -> dict:
+    """解析一帧 (测试与调试用，前端有等价的 TypeScript 实现)"""
+    (magic, version, kind, flags, dtype_code, id_len, bins, axis_id,
+     center_freq, bin_width, timestamp, offset, step) = HEADER.unpack_from(data)
+    if magic != SPECTRUM_MAGIC or version != SPECTRUM_VERSION:
+        raise ValueError(f"not a spectrum frame (magic={magic!r}, version={version})")
+    pos = HEADER.size
+    device_id = data[pos:pos + id_len].decode('utf-8')
+    pos += id_len
+    frame = {
+        "kind": kind, "flags": flags, "device_id": device_id, "axis_id": axis_id,
+        "center_freq": center_freq, "bin_width": bin_width, "timestamp": timestamp,
+    }
+    if kind == KIND_AXIS:
+        frame["frequencies"] = np.frombuffer(data, dtype='<f8', count=bins, offset=pos)
+        return frame
+    np_type = _DTYPE_BY_CODE[dtype_code]
+    values = np.frombuffer(data, dtype=np_type, count=bins, offset=pos)
+    frame["power"] = offset + step * values.astype(np.float32)
+    if flags & FLAG_PEAK:
+        peak = np.frombuffer(data, dtype=np_type, count=bins, offset=pos + values.nbytes)
+        frame["peak"] = offset + step * peak.astype(np.float32)
+    return frame
+
+
+class SpectrumEncoder:
+    """
+    频谱帧编码器: 按 (设备, 点数) 记录当前频率轴，轴变化 (中心频率/间隔) 时分配新的 axis_id
+    不同点数的订阅各自保持频率轴，互不打断
+    """
+
+    def __init__(self):
+        self._axes: Dict[Tuple[str, int], Tuple[Tuple, int, bytes]] = {}  # (device_id, 点数) -> (轴特征, axis_id, 轴帧)
+        self._next_axis_id = 1
+        self._lock = threading.Lock()
+
+    def _axis(self, device_id: str, id_bytes: bytes, freqs: np.ndarray,
+              center_freq: float, timestamp: float) -> Tuple[int, bytes, float]:
+        bin_width = float(freqs[1] - freqs[0]) if len(freqs) > 1 else 0.0
+        key = (len(freqs), float(freqs[0]), bin_width, center_freq)
+        with self._lock:
+            entry = self._axes.get((device_id, len(freqs)))
+            if entry is None or entry[0] != key:
+                axis_id = self._next_axis_id
+                self._next_axis_id = self._next_axis_id % 0xFFFF + 1
+                header = HEADER.pack(SPECTRUM_MAGIC, SPECTRUM_VERSION, KIND_AXIS, 0, AXIS_DTYPE,
+                                     len(id_bytes), len(freqs), axis_id, center_freq, bin_width,
+                                     timestamp, 0.0, 0.0)
+                entry = (key, axis_id, header + id_bytes + np.asarray(freqs, dtype='<f8').tobytes())
+                self._axes[(device_id, len(freqs))] = entry
+        return entry[1], entry[2], bin_width
+
+    def encode(self, device_id: str, freqs: np.ndarray, power_db: np.ndarray, center_freq: float,
+               dtype: str = 'uint8', peak_db: Optional[np.ndarray] = None, overflow: bool = False,
+               underflow: bool = False, timestamp: Optional[float] = None) -> SpectrumFrame:
+        """
+        编码一次频谱更新
+
+        Args:
+            device_id: 设备 ID
+            freqs: 发送的频率点 (Hz，等间隔)
+            power_db: 与 freqs 等长的功率 (dB)
+            center_freq: 中心频率 (Hz)
+            dtype: 'uint8' 或 'int16'
+            peak_db: 峰值保持 (可选)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        id_bytes = device_id.encode('utf-8')
+        axis_id, axis, bin_width = self._axis(device_id, id_bytes, freqs, center_freq, timestamp)
+        code, _, offset, step = QUANTIZATION[dtype]
+        flags = (FLAG_OVERFLOW if overflow else 0) | (FLAG_UNDERFLOW if underflow else 0)
+        parts = [None, id_bytes, quantize(power_db, dtype).tobytes()]
+        if peak_db is not None:
+            flags |= FLAG_PEAK
+            parts.append(quantize(peak_db, dtype).tobytes())
+        parts[0] = HEADER.pack(SPECTRUM_MAGIC, SPECTRUM_VERSION, KIND_POWER, flags, code,
+                               len(id_bytes), len(power_db), axis_id, center_freq, bin_width,
+                               timestamp, offset, step)
+        return SpectrumFrame(axis_id, axis, b''.join(parts))
@@ -0,0 +1,225 @@
+"""
+遥测数据低延迟接入
+视觉/定位进程以 30+ Hz 通过本地 UDP 或 Unix 数据报套接字发送固定布局的二进制坐标，
+接收线程把最新坐标放入单槽 (只保留最新一条，未发出的旧数据被覆盖)，
+并让帧调度器在下一个帧边界发送 0x0A01 帧，不经过 WebSocket 命令与 SDRManager 锁。
+
+数据报布局 (小端，28 字节):
+    magic 'SR' (2) + version (1) + 保留 (1) + 6 台机器人 (x, y) uint16 cm (24)
+坐标顺序与 0x0A01 数据段相同 (hero, engineer, infantry_3, infantry_4, aerial, sentry)
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+TELEMETRY_MAGIC = b'SR'
+TELEMETRY_VERSION = 1
+TELEMETRY_STRUCT = struct.Struct('<2sBx12H')
+POSITION_CMD_ID = 0x0A01
+
+
+def pack_positions(positions: Sequence[Tuple[int, int]]) -> bytes:
+    """[(x, y)] * 6 (cm) -> 遥测数据报 (发送端使用)"""
+    coords = [int(v) & 0xFFFF for xy in positions for v in xy]
+    return TELEMETRY_STRUCT.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION, *coords)
+
+
+class TelemetryIngest:
+    """
+    遥测接入端点
+
+    Args:
+        scheduler: FrameScheduler，0x0A01 注册为按需触发的命令
+        udp_addr: UDP 监听地址 (host, port)，None 不监听
+        unix_path: Unix 数据报套接字路径，None 不监听
+        keepalive_hz: 无新数据时重发最新坐标的帧率
+        latency_window: 延迟分位数统计的样本数
+        max_block_size: 引擎每次写入的样本数上限，None 不检查
+            (新帧最多排在约 NUM_BUFFERS + 1 块之后，16384 样本块时 p50 约 12 ms)
+    """
+
+    KEEPALIVE_HZ = 2.0
+    LATENCY_WINDOW = 1000
+    MAX_BLOCK_SIZE = 4096  # 2 MSPS 下 2.05 ms/块
+
+    def __init__(self, scheduler, udp_addr: Optional[Tuple[str, int]] = ('127.0.0.1', 9100),
+                 unix_path: Optional[str] = None, keepalive_hz: float = KEEPALIVE_HZ,
+                 latency_window: int = LATENCY_WINDOW, max_block_size: Optional[int] = MAX_BLOCK_SIZE):
+        self.scheduler = scheduler
+        self.udp_addr = udp_addr
+        self.unix_path = unix_path
+        self.keepalive_hz = keepalive_hz
+        self.max_block_size = max_block_size
+        self._attached = False
+
+        self._lock = threading.Lock()
+        # 单槽: (载荷, 接收时刻, 更新号)，新数据直接覆盖
+        self._slot: Optional[Tuple[bytes, float, int]] = None
+        self._sent_id = 0          # 已调度发送的最新更新号
+        self._in_flight = {}       # 帧序号 -> 接收时刻
+        self._engine = None
+        self._sockets = []
+        self._threads = []
+        self._stop_event = threading.Event()
+
+        # 统计
+        self.received = 0
+        self.rejected = 0
+        self.coalesced = 0         # 发送前被更新覆盖的数据
+        self.sent = 0
+        self._latency = deque(maxlen=latency_window)     # 接收 -> 送入设备
+        self._build_delay = deque(maxlen=latency_window)  # 接收 -> 组帧
+
+    # ---------- 接入 ----------
+
+    @staticmethod
+    def check_engine(engine, max_block_size: Optional[int] = MAX_BLOCK_SIZE):
+        """引擎块过大时 (遥测排队超过几毫秒) 抛出 ValueError"""
+        if engine is not None and max_block_size is not None and engine.block_size > max_block_size:
+            raise ValueError(f"TX block_size {engine.block_size} too large for telemetry "
+                             f"(max {max_block_size}, {engine.block_duration * 1e3:.1f} ms per block)")
+
+    def attach(self, engine):
+        """
+        注册到帧调度器，engine (TxStreamEngine) 非空时统计接收到送入设备的延迟
+        引擎的帧源应为 scheduler.next_frame
+        调度器中已有 0x0A01 命令 (如 set_tx_command 设置的) 或引擎块过大时抛出 ValueError
+        """
+        self.check_engine(engine, self.max_block_size)
+        if self.scheduler.has_command(POSITION_CMD_ID):
+            raise ValueError(f"command 0x{POSITION_CMD_ID:04X} already scheduled")
+        self._engine = engine
+        if engine is not None:
+            engine.on_frame_air = self._on_frame_air
+        self.scheduler.add_command(POSITION_CMD_ID, self.keepalive_hz, self._produce)
+        self._attached = True
+
+    def submit(self, payload: bytes, received_at: Optional[float] = None):
+        """放入一条 0x0A01 载荷 (覆盖尚未发出的旧数据) 并触发调度"""
+        now = time.perf_counter() if received_at is None else received_at
+        with self._lock:
+            update_id = self._slot[2] + 1 if self._slot else 1
+            if self._slot is not None and self._slot[2] != self._sent_id:
+                self.coalesced += 1
+            self._slot = (payload, now, update_id)
+            self.received += 1
+        self.scheduler.trigger(POSITION_CMD_ID)
+
+    def handle_datagram(self, data, received_at: Optional[float] = None) -> bool:
+        """校验并接入一个数据报，布局不符时丢弃"""
+        if len(data) != TELEMETRY_STRUCT.size or bytes(data[:2]) != TELEMETRY_MAGIC \
+                or data[2] != TELEMETRY_VERSION:
+            self.rejected += 1
+            return False
+        # 坐标段与 0x0A01 数据段字节布局相同，直接切片
+        self.submit(bytes(data[4:]), received_at)
+        return True
+
+    def _produce(self) -> Optional[bytes]:
+        """调度器回调 (帧边界): 返回最新载荷，无数据时返回 None"""
+        with self._lock:
+            slot = self._slot
+            if slot is None:
+                return None
+            payload, received_at, update_id = slot
+            if update_id != self._sent_id:
+                self._sent_id = update_id
+                self.sent += 1
+                built_at = time.perf_counter()
+                self._build_delay.append(built_at - received_at)
+                if self._engine is not None:
+                    # 在引擎取帧时调用，frames_sent 即将发送帧的序号
+                    self._in_flight[self._engine.frames_sent] = received_at
+            return payload
+
+    def _on_frame_air(self, frame_index: int, air_time: float):
+        with self._lock:
+            received_at = self._in_flight.pop(frame_index, None)
+            if received_at is not None:
+                self._latency.append(air_time - received_at)
+
+    # ---------- 套接字 ----------
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop_event.clear()
+        if self.udp_addr is not None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(self.udp_addr)
+            self.udp_addr = sock.getsockname()
+            self._sockets.append(sock)
+        if self.unix_path is not None:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(self.unix_path)
+            self._sockets.append(sock)
+        for sock in self._sockets:
+            sock.settimeout(0.1)
+            thread = threading.Thread(target=self._recv_loop, args=(sock,), daemon=True,
+                                      name="telemetry-ingest")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        if self._engine is not None and self._engine.on_frame_air == self._on_frame_air:
+            self._engine.on_frame_air = None
+        if self._attached:
+            self.scheduler.remove_command(POSITION_CMD_ID)
+            self._attached = False
+        with self._lock:
+            self._in_flight.clear()
+
+    def _recv_loop(self, sock: socket.socket):
+        buf = bytearray(TELEMETRY_STRUCT.size + 1)  # 多 1 字节以识别超长数据报
+        view = memoryview(buf)
+        while not self._stop_event.is_set():
+            try:
+                n = sock.recv_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.handle_datagram(view[:n], time.perf_counter())
+
+    # ---------- 统计 ----------
+
+    @staticmethod
+    def _percentiles(samples) -> Optional[dict]:
+        if not samples:
+            return None
+        values = np.fromiter(samples, dtype=np.float64) * 1e3
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {"p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": values.max()}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            latency = list(self._latency)
+            build_delay = list(self._build_delay)
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "udp_addr": list(self.udp_addr) if self.udp_addr else None,
+            "unix_path": self.unix_path,
+            "ingest_to_air": self._percentiles(latency),
+            "ingest_to_frame": self._percentiles(build_delay),
+        }
@@ -0,0 +1,289 @@
+"""
+流式 TX 引擎
+非循环 (tx_cyclic_buffer=False) 连续发射: 后台线程按帧调制、切块写入设备，
+更新载荷只替换待发帧，在帧边界切换，不重建 IIO 缓冲区。
+
+- StreamingFskModulator: 逐帧 4-RRC-FSK 调制，脉冲拖尾与 FM 相位跨帧连续
+- TxStreamEngine: 双缓冲 (生产线程调制填块，写线程阻塞写入)，统计欠载次数
+"""
+
+import threading
+import time
+import queue
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+from .signal_generator import get_pulse_table, _construct_frame
+from protocol.symbol_codec import bytes_to_levels
+
+
+class StreamingFskModulator:
+    """
+    4-RRC-FSK 流式调制器 (共用 signal_generator 的多相脉冲表)
+    逐帧调用 modulate() 的输出拼接后，等同于对拼接后的字节流一次性调制。
+
+    Args:
+        sample_rate: 采样率 (Hz)
+        symbol_rate: 符号率 (Baud)
+        alpha: RRC 滚降系数
+        sensitivity: FM 调制灵敏度 (rad/sample/level)
+        amplitude: 输出幅度
+    """
+
+    # 重复帧的调制结果缓存条数
+    CACHE_SIZE = 8
+
+    def __init__(self, sample_rate: int = 2_000_000, symbol_rate: int = 250000,
+                 alpha: float = 0.25, sensitivity: float = 0.54, amplitude: float = 0.9):
+        self.table = get_pulse_table(sample_rate, symbol_rate, alpha, sensitivity)
+        self.sps = self.table.sps
+        self.amplitude = amplitude
+        # 按 (前一帧, 当前帧) 缓存: 前一帧的末尾符号是脉冲拖尾的上下文
+        self._cache: Dict[Tuple[Optional[bytes], bytes], Tuple[np.ndarray, float, np.ndarray]] = {}
+        self.reset()
+
+    def reset(self):
+        self._context = np.zeros(self.table.span - 1, dtype=np.float32)
+        self._phase = 0.0
+        self._prev: Optional[bytes] = None
+
+    @property
+    def phase(self) -> float:
+        """当前 FM 相位 (rad)"""
+        return self._phase
+
+    def frame_samples(self, frame: bytes) -> int:
+        return len(frame) * 4 * self.sps
+
+    def modulate(self, frame: bytes) -> np.ndarray:
+        """调制一帧，返回 complex64 样本 (长度 frame_samples(frame))"""
+        key = (self._prev, frame)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._modulate_unit(frame)
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = cached
+        unit, delta, context = cached
+
+        # 相同帧只需旋转到当前起始相位
+        out = unit * np.complex64(self.amplitude * np.exp(1j * self._phase))
+        self._phase = (self._phase + delta) % (2 * np.pi)
+        self._context = context
+        self._prev = frame
+        return out
+
+    def _modulate_unit(self, frame: bytes) -> Tuple[np.ndarray, float, np.ndarray]:
+        """起始相位为 0 的单位幅度样本、帧内相位增量、留给下一帧的电平上下文"""
+        ctx = len(self._context)
+        levels = np.empty(ctx + len(frame) * 4, dtype=np.float32)
+        levels[:ctx] = self._context
+        bytes_to_levels(frame, out=levels[ctx:])
+        inc = self.table.increments(levels)
+        starts = self.table.symbol_phases(inc)
+        delta = float(starts[-1]) + float(inc[-1].sum(dtype=np.float64))
+        unit = self.table.render(inc, starts, 1.0)
+        return unit, delta, levels[len(levels) - ctx:].copy()
+
+
+class TxStreamEngine:
+    """
+    连续流式发射引擎
+
+    Args:
+        write: 阻塞写入函数 (如 PlutoDriver.write_tx_samples)，每次写入 block_size 个样本
+        sample_rate: 采样率 (Hz)
+        symbol_rate: 符号率 (Baud)
+        block_size: 每次写入的样本数 (非循环 IIO 缓冲区大小)
+        on_underrun: 发生欠载 (写入间隙超过一个块时长，每次间隙一次) 时的回调 (可选)
+        on_frame_air: 帧开始送入设备时的回调 on_frame_air(帧序号, 时刻)，
+            时刻 = 所在块开始写入的 time.perf_counter() + 块内偏移 / 采样率 (可选)
+    """
+
+    NUM_BUFFERS = 2  # 双缓冲: 一块写入设备的同时填充另一块
+
+    def __init__(self, write: Callable[[np.ndarray], None], sample_rate: int = 2_000_000,
+                 symbol_rate: int = 250000, block_size: int = 16384,
+                 on_underrun: Optional[Callable[[], None]] = None,
+                 on_frame_air: Optional[Callable[[int, float], None]] = None):
+        self.write = write
+        self.sample_rate = sample_rate
+        self.symbol_rate = symbol_rate
+        self.block_size = block_size
+        self.on_underrun = on_underrun
+        self.on_frame_air = on_frame_air
+        self.modulator = StreamingFskModulator(sample_rate, symbol_rate)
+
+        self._lock = threading.Lock()
+        self._frame: Optional[bytes] = None      # 正在循环发送的帧
+        self._pending: Optional[bytes] = None    # 下一帧边界切换的帧
+        self._source: Optional[Callable[[], bytes]] = None  # 帧源 (如 FrameScheduler.next_frame)
+        self._carry = np.zeros(0, dtype=np.complex64)  # 上一块未写完的帧样本
+
+        self._blocks = [np.zeros(block_size, dtype=np.complex64) for _ in range(self.NUM_BUFFERS)]
+        self._block_starts = [[] for _ in range(self.NUM_BUFFERS)]  # 各块内新帧的 (偏移, 帧序号)
+        self._free: queue.Queue = queue.Queue()
+        self._ready: queue.Queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+        # 统计
+        self.blocks_written = 0
+        self.frames_sent = 0
+        self.frame_updates = 0
+        self.underruns = 0
+        self.max_write_gap = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    @property
+    def block_duration(self) -> float:
+        return self.block_size / self.sample_rate
+
+    def set_frame(self, frame: bytes):
+        """替换待发帧 (含 Preamble 的完整帧字节)，在当前帧发送结束后生效 (取消帧源)"""
+        with self._lock:
+            self._pending = bytes(frame)
+            self._source = None
+
+    def set_frame_source(self, source: Optional[Callable[[], bytes]]):
+        """
+        每个帧边界调用 source() 取下一段发射字节 (如 FrameScheduler.next_frame)，
+        设为 None 时恢复循环发送 set_frame() 的帧
+        """
+        with self._lock:
+            self._source = source
+
+    def set_payload(self, payload: bytes, cmd_id: int = 0x0201, seq: int = 0):
+        """按协议封装载荷并替换待发帧"""
+        self.set_frame(_construct_frame(payload, cmd_id=cmd_id, seq=seq))
+
+    def _next_frame(self) -> Optional[bytes]:
+        with self._lock:
+            source = self._source
+        if source is not None:
+            return source()
+        with self._lock:
+            if self._pending is not None:
+                self._frame, self._pending = self._pending, None
+                self.frame_updates += 1
+            return self._frame
+
+    def fill_block(self, block: np.ndarray, starts: Optional[list] = None) -> bool:
+        """
+        用帧流填满一个块 (帧可跨块)，尚无帧可发时返回 False
+        只在帧边界取新帧，保证切换前后的帧都完整发出
+        starts 非空时追加块内每个新帧的 (起始偏移, 帧序号)
+        """
+        pos = 0
+        carry = self._carry
+        while pos < len(block):
+            if len(carry) == 0:
+                frame = self._next_frame()
+                if frame is None:
+                    return False
+                carry = self.modulator.modulate(frame)
+                if starts is not None:
+                    starts.append((pos, self.frames_sent))
+                self.frames_sent += 1
+            n = min(len(carry), len(block) - pos)
+            block[pos:pos + n] = carry[:n]
+            carry = carry[n:]
+            pos += n
+        self._carry = carry
+        return True
+
+    def produce_block(self) -> Optional[np.ndarray]:
+        """生成下一块样本 (新数组，供同步测试使用)"""
+        block = np.empty(self.block_size, dtype=np.complex64)
+        return block if self.fill_block(block) else None
+
+    # ---------- 线程 ----------
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        for i in range(self.NUM_BUFFERS):
+            self._free.put(i)
+        self._threads = [
+            threading.Thread(target=self._produce_loop, daemon=True, name="tx-produce"),
+            threading.Thread(target=self._write_loop, daemon=True, name="tx-write"),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def _produce_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                index = self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            starts = self._block_starts[index]
+            starts.clear()
+            while not self.fill_block(self._blocks[index], starts):
+                # 尚未设置载荷
+                if self._stop_event.wait(0.01):
+                    return
+            self._ready.put(index)
+
+    def _underrun(self):
+        self.underruns += 1
+        if self.on_underrun:
+            self.on_underrun()
+
+    def _write_loop(self):
+        last_write = None
+        starved = False  # 本次间隙已计为欠载
+        while not self._stop_event.is_set():
+            # 已开始发送后按块时长等待，以便间隙超过一个块时及时置欠载
+            timeout = 0.1 if last_write is None or starved else self.block_duration
+            try:
+                index = self._ready.get(timeout=timeout)
+            except queue.Empty:
+                # 距上次写完超过一个块时长仍无待写块: 设备侧欠载，每次间隙只计一次
+                if last_write is not None and not starved \
+                        and time.perf_counter() - last_write > self.block_duration:
+                    starved = True
+                    self._underrun()
+                continue
+
+            start = time.perf_counter()
+            if last_write is not None:
+                gap = start - last_write
+                self.max_write_gap = max(self.max_write_gap, gap)
+                if gap > self.block_duration and not starved:
+                    self._underrun()
+            starved = False
+            if self.on_frame_air is not None:
+                for offset, frame_index in self._block_starts[index]:
+                    self.on_frame_air(frame_index, start + offset / self.sample_rate)
+            try:
+                self.write(self._blocks[index])
+            except Exception as e:
+                print(f"TX stream write error: {e}")
+                self._stop_event.set()
+            finally:
+                self._free.put(index)
+            self.blocks_written += 1
+            last_write = time.perf_counter()
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.is_running,
+            "blocks_written": self.blocks_written,
+            "frames_sent": self.frames_sent,
+            "frame_updates": self.frame_updates,
+            "underruns": self.underruns,
+            "max_write_gap": self.max_write_gap,
+        }
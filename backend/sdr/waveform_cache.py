@@ -0,0 +1,138 @@
+"""
+发射波形缓存
+start_tx_signal 对同一 (采样率, 波特率, 载荷) 重复发射时直接复用已生成的
+complex64 波形与预览频谱，按内容哈希为键，LRU 淘汰并限制总内存。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def compute_tx_preview(samples: np.ndarray, sample_rate: int, fft_size: int = 2048,
+                       num_segments: int = 8, points: int = 256) -> dict:
+    """
+    发射波形预览频谱 (Hamming 窗，多段平均，dBFS 与 RX 频谱一致)
+    各段一次性 reshape 后批量 FFT
+
+    Returns:
+        {"frequencies": [...], "power": [...]} (已 fftshift 并降采样到约 points 点)
+    """
+    preview_len = min(len(samples), fft_size * num_segments)
+    segments = preview_len // fft_size
+    if segments < 1:
+        segments = 1
+        fft_size = preview_len
+
+    window = np.hamming(fft_size).astype(np.float32)
+    frames = samples[:segments * fft_size].reshape(segments, fft_size) * window
+    spectrum = np.fft.fft(frames, axis=1)
+    # 幅度按窗函数和归一化 (dBFS)
+    magnitude_sq = (spectrum.real ** 2 + spectrum.imag ** 2) / float(np.sum(window)) ** 2
+    power_db = 10 * np.log10(magnitude_sq.mean(axis=0) + 1e-12)
+
+    freqs = np.fft.fftshift(np.fft.fftfreq(fft_size, 1 / sample_rate))
+    power_db = np.fft.fftshift(power_db)
+
+    step = max(1, len(freqs) // points)
+    return {
+        "frequencies": freqs[::step].tolist(),
+        "power": power_db[::step].tolist(),
+    }
+
+
+class CachedWaveform:
+    """缓存项: 只读 complex64 样本与预览频谱 (单载波预览不含中心频率)"""
+    __slots__ = ('samples', 'preview', 'nbytes')
+
+    def __init__(self, samples: np.ndarray, preview: dict):
+        samples = np.ascontiguousarray(samples, dtype=np.complex64)
+        samples.setflags(write=False)
+        self.samples = samples
+        self.preview = preview
+        self.nbytes = samples.nbytes
+
+
+class WaveformCache:
+    """
+    LRU 波形缓存
+
+    Args:
+        max_bytes: 样本总内存上限 (字节)，超出时淘汰最久未使用的项
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, CachedWaveform]' = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(sample_rate: int, symbol_rate: int, payload: Optional[str]) -> Tuple:
+        """内容哈希键: 不同信号类型只要采样率/波特率/载荷相同即共用波形"""
+        digest = None
+        if payload:
+            digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+        return (int(sample_rate), int(symbol_rate), digest)
+
+    @staticmethod
+    def make_multi_key(sample_rate: int, signals: Sequence[Tuple[str, Optional[str]]],
+                       center_freq: Optional[float]) -> Tuple:
+        """多载波合成的内容哈希键"""
+        content = repr((list(signals), center_freq)).encode('utf-8')
+        return (int(sample_rate), 'multi', hashlib.blake2b(content, digest_size=16).digest())
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[CachedWaveform]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, samples: np.ndarray, preview: dict) -> CachedWaveform:
+        """加入缓存并返回缓存项 (超过内存上限的单个波形不缓存)"""
+        entry = CachedWaveform(samples, preview)
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[key] = entry
+            self._nbytes += entry.nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
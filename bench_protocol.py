@@ -0,0 +1,238 @@
+
+"""
+协议解析性能基准
+- 批量 CRC 与逐字节 verify_*/append_* 的一致性检查
+- 噪声随机数据 (干扰信道最坏情况) 中夹带有效帧时的解析吞吐 (frames/s, MB/s)
+"""
+import sys
+import time
+import struct
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from protocol.crc import (append_crc8_check_sum, append_crc16_check_sum,
+                          verify_crc8_check_sum, verify_crc16_check_sum,
+                          crc8_batch, crc16_batch, get_crc16_check_sum)
+from protocol.packet_parser import PacketParser
+from protocol.packet import RadarPacket, PacketBatch
+from protocol.decoders import decode_batch, decode_packet
+from protocol.symbol_codec import bytes_to_levels
+
+CHUNK = 4096
+
+
+def make_frame(seq, payload, cmd_id=0x0A01):
+    header = append_crc8_check_sum(bytes([0xA5]) + struct.pack('<H', len(payload)) + bytes([seq]))
+    return append_crc16_check_sum(header + struct.pack('<H', cmd_id) + payload)
+
+
+def make_stream(n_bytes, frame_every, seed=0):
+    """随机噪声字节流，每 frame_every 字节插入一帧"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    n_frames = 0
+    total = 0
+    while total < n_bytes:
+        noise = rng.integers(0, 256, frame_every, dtype=np.uint8).tobytes()
+        frame = make_frame(n_frames & 0xFF, rng.integers(0, 256, 24, dtype=np.uint8).tobytes())
+        parts += [noise, frame]
+        n_frames += 1
+        total += len(noise) + len(frame)
+    return b''.join(parts), n_frames
+
+
+class LegacyByteParser:
+    """旧实现: 逐个 SOF 候选标量 CRC，失败后 del self._buffer[0] (同样返回 RadarPacket，只比较查找与校验)"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed_bytes(self, data):
+        self._buffer.extend(data)
+        packets = []
+        while len(self._buffer) >= 9:
+            try:
+                sof_index = self._buffer.index(0xA5)
+                if sof_index > 0:
+                    del self._buffer[:sof_index]
+            except ValueError:
+                del self._buffer[:-9]
+                break
+            if len(self._buffer) < 5:
+                break
+            if not verify_crc8_check_sum(self._buffer[:5], 5):
+                del self._buffer[0]
+                continue
+            data_len = struct.unpack('<H', self._buffer[1:3])[0]
+            if data_len > 256:
+                del self._buffer[0]
+                continue
+            total_len = 9 + data_len
+            if len(self._buffer) < total_len:
+                break
+            if verify_crc16_check_sum(self._buffer[:total_len], total_len):
+                packets.append(RadarPacket(bytes(self._buffer[:total_len]), time.time()))
+                del self._buffer[:total_len]
+            else:
+                del self._buffer[0]
+        return packets
+
+
+def check_bit_exact(n=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    block = rng.integers(0, 256, 4096, dtype=np.uint8)
+    offsets = rng.integers(0, 4096 - 300, n)
+    lengths = rng.integers(0, 280, n)
+
+    # 大批量走 NumPy 查表，小批量走标量回退，两条路径都要与逐字节实现一致
+    crc8 = np.concatenate([crc8_batch(block, offsets[:10], 5), crc8_batch(block, offsets[10:], 5)])
+    crc16 = np.concatenate([crc16_batch(block, offsets[:10], lengths[:10]),
+                            crc16_batch(block, offsets[10:], lengths[10:])])
+    raw = block.tobytes()
+    ok = True
+    for off, length, c8, c16 in zip(offsets, lengths, crc8, crc16):
+        if append_crc8_check_sum(raw[off:off + 5])[-1] != c8:
+            ok = False
+        if get_crc16_check_sum(raw[off:off + length], length) != c16:
+            ok = False
+    # stride=4: 交织数据中的帧
+    frame = make_frame(7, b'stride test')
+    woven = np.zeros(len(frame) * 4, dtype=np.uint8)
+    woven[1::4] = np.frombuffer(frame, dtype=np.uint8)
+    if crc8_batch(woven, [1], 5, stride=4)[0] != 0 or crc16_batch(woven, [1], [len(frame)], stride=4)[0] != 0:
+        ok = False
+    print(f"{'[PASS]' if ok else '[FAIL]'} batch CRC8/CRC16 match scalar implementation ({n} random spans)")
+    return ok
+
+
+def bench_bytes(stream, n_frames, label, chunk=CHUNK):
+    chunks = [stream[i:i + chunk] for i in range(0, len(stream), chunk)]
+    results = []
+    for name, parser in (("legacy", LegacyByteParser()), ("batched", PacketParser())):
+        t0 = time.perf_counter()
+        found = sum(len(parser.feed_bytes(c)) for c in chunks)
+        dt = time.perf_counter() - t0
+        results.append(found)
+        print(f"  {label:22s} {name:8s}: {found:5d}/{n_frames} frames | "
+              f"{found / dt:9.0f} frames/s | {len(stream) / dt / 1e6:6.2f} MB/s")
+    return results[0] == results[1] == n_frames
+
+
+def bench_symbols(stream, n_frames, label):
+    # 每帧前补 4 字节 Preamble，符号流 (判决电平 + 噪声)
+    rng = np.random.default_rng(2)
+    levels = bytes_to_levels(stream)
+    levels += rng.normal(0, 0.3, len(levels)).astype(np.float32)
+    parser = PacketParser()
+    t0 = time.perf_counter()
+    found = 0
+    for i in range(0, len(levels), CHUNK * 4):
+        found += len(parser.feed_symbols(levels[i:i + CHUNK * 4]))
+    dt = time.perf_counter() - t0
+    print(f"  {label:22s} symbols : {found:5d}/{n_frames} frames | "
+          f"{found / dt:9.0f} frames/s | {len(levels) / dt / 1e6:6.2f} Msym/s")
+
+
+def bench_packet_objects(n=20000, dup=4):
+    """每帧被广播 dup 次 (循环发射的重复帧): 旧 dataclass 每次重新 hex + json.dumps"""
+    import json
+    from dataclasses import dataclass
+
+    @dataclass
+    class LegacyPacket:
+        timestamp: float
+        data_length: int
+        seq: int
+        crc8: int
+        cmd_id: int
+        payload: bytes
+        crc16: int
+        frame_bytes: bytes
+        packet_type: str = "unknown"
+        is_valid: bool = False
+
+        @property
+        def hex_string(self):
+            return self.frame_bytes.hex().upper()
+
+    frames = [make_frame(i & 0xFF, bytes(24)) for i in range(n)]
+
+    t0 = time.perf_counter()
+    for f in frames:
+        pkt = LegacyPacket(time.time(), struct.unpack('<H', f[1:3])[0], f[3], f[4],
+                           struct.unpack('<H', f[5:7])[0], f[7:-2], struct.unpack('<H', f[-2:])[0], f,
+                           "unknown", True)
+        for _ in range(dup):
+            json.dumps({"type": "packet", "device_id": "dev", "timestamp": pkt.timestamp,
+                        "hex": pkt.hex_string, "packet_type": pkt.packet_type, "is_valid": pkt.is_valid})
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ts = time.time()
+    for f in frames:
+        pkt = RadarPacket(f, ts)
+        for _ in range(dup):
+            pkt.to_json("dev")
+    t_new = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = PacketBatch.from_frames(frames, time.time())
+    t_batch = time.perf_counter() - t0
+    print(f"  dataclass + json x{dup}: {n / t_legacy:9.0f} packets/s | "
+          f"RadarPacket cached json: {n / t_new:9.0f} packets/s | "
+          f"PacketBatch columns: {n / t_batch:9.0f} packets/s ({batch.records.nbytes // n} B/record)")
+
+
+def bench_decoders(n=20000):
+    """0x0A01-0x0A05 数据段解码: 逐包 struct 解码 vs 同命令批量 NumPy 解码"""
+    rng = np.random.default_rng(4)
+    sizes = {0x0A01: 24, 0x0A02: 12, 0x0A04: 6, 0x0A05: 36}
+    cmds = list(sizes)
+    frames = []
+    for i in range(n):
+        cmd = cmds[i % len(cmds)]
+        frames.append(make_frame(i & 0xFF, rng.integers(0, 256, sizes[cmd], dtype=np.uint8).tobytes(), cmd))
+    ts = time.time()
+    packets = [RadarPacket(f, ts) for f in frames]
+    batch = PacketBatch.from_frames(frames, ts)
+
+    t0 = time.perf_counter()
+    singles = [decode_packet(p) for p in packets]
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    columns = decode_batch(batch)
+    t_batch = time.perf_counter() - t0
+
+    ok = all(int(columns[0x0A01]['sentry_y'][k]) == singles[k * 4]['sentry_y'] for k in range(n // 4))
+    print(f"  per-packet struct: {n / t_single:10.0f} packets/s | "
+          f"batched columns: {n / t_batch:10.0f} packets/s | "
+          f"{'[PASS]' if ok else '[FAIL]'} batch matches per-packet decode")
+    return ok
+
+
+if __name__ == "__main__":
+    ok = check_bit_exact()
+    print("\n=== Byte parser on noisy random data ===")
+    for chunk in (512, CHUNK, 1 << 20):
+        print(f"--- {chunk}-byte feed_bytes calls ---")
+        for every in (64, 1024, 16384):
+            stream, n_frames = make_stream(4_000_000, every)
+            ok &= bench_bytes(stream, n_frames, f"frame every {every} B", chunk)
+
+    print("\n=== Symbol parser (preamble-framed) ===")
+    rng = np.random.default_rng(3)
+    parts = []
+    for i in range(2000):
+        parts += [rng.integers(0, 256, 256, dtype=np.uint8).tobytes(),
+                  bytes([0xE4] * 4), make_frame(i & 0xFF, b'\x00' * 24)]
+    bench_symbols(b''.join(parts), 2000, "frame every 256 B")
+
+    print("\n=== Packet materialization ===")
+    bench_packet_objects()
+
+    print("\n=== Payload decoders (0x0A01/02/04/05 mix) ===")
+    ok &= bench_decoders()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,156 @@
+"""
+RX 采集间隔基准
+PlutoDriver 采集线程两次 rx() 之间的间隔 (回调耗时) 决定了内核缓冲区能否及时取走:
+- 旧实现: 回调内计算频谱 + JSON 编码，样本拷贝后入解调队列
+- 上一版本: 回调内计算频谱 + 瀑布图 + 写频谱槽，样本拷贝后入解调队列
+- RX 流水线: 驱动把样本直接写入预分配槽，回调只 publish，频谱与解调在各自的消费者线程中
+模拟设备按 2 MSPS 节拍产出 16384 样本缓冲区，内核缓冲 4 个，超出即计为溢出
+"""
+import sys
+import json
+import time
+import queue
+import threading
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.pluto_driver import PlutoDriver, PlutoConfig
+from sdr.signal_processor import SignalProcessor, pool_spectrum
+from sdr.waterfall import WaterfallHistory
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from sdr.rx_pipeline import RxPipeline
+
+FS = 2_000_000
+N = 16384
+KERNEL_BUFFERS = 4
+SECONDS = 3.0
+
+
+class FakePluto:
+    """按采样节拍产出缓冲区的 adi.Pluto 替身 (rx() 返回 complex128，与 pyadi 相同)"""
+
+    def __init__(self):
+        rng = np.random.default_rng(11)
+        self._buffers = [100.0 * (rng.standard_normal(N) + 1j * rng.standard_normal(N)) for _ in range(8)]
+        self._duration = N / FS
+        self._t0 = None
+        self._k = 0
+        self.overflows = 0
+
+    def rx(self):
+        now = time.perf_counter()
+        if self._t0 is None:
+            self._t0 = now
+        ready = self._t0 + (self._k + 1) * self._duration
+        if now > ready + KERNEL_BUFFERS * self._duration:
+            # 内核缓冲区已满，丢样本后重新对齐
+            self.overflows += 1
+            self._t0 = now - self._duration
+            self._k = 0
+            ready = now
+        if ready > now:
+            time.sleep(ready - now)
+        self._k += 1
+        return self._buffers[self._k % len(self._buffers)]
+
+
+def make_driver():
+    driver = PlutoDriver(PlutoConfig(sample_rate=FS, buffer_size=N))
+    driver._sdr = FakePluto()
+    driver._is_connected = True
+    return driver
+
+
+def make_demod():
+    return Demodulator(DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS), streaming=True)
+
+
+def demod_thread(sample_queue, demodulator, stop):
+    while not stop.is_set():
+        try:
+            samples, _ = sample_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        demodulator.demodulate(samples)
+
+
+def inline_callback(json_output):
+    """旧结构: 频谱在采集线程中计算，解调线程从队列取拷贝"""
+    processor = SignalProcessor(FS)
+    waterfall = WaterfallHistory(processor.fft_size)
+    sample_queue = queue.Queue(maxsize=10)
+    stop = threading.Event()
+    thread = threading.Thread(target=demod_thread, args=(sample_queue, make_demod(), stop), daemon=True)
+    thread.start()
+    drops = [0]
+
+    def callback(samples):
+        spectrum = processor.compute_spectrum(samples, center_freq=433.2e6)
+        if json_output:
+            reduced = pool_spectrum(spectrum, len(spectrum.power) // 10)
+            json.dumps({"type": "spectrum", "device_id": "pluto-1", "frequencies": reduced.freqs.tolist(),
+                        "power": reduced.power.tolist(), "overflow": False, "underflow": False})
+        else:
+            waterfall.append(spectrum, 433.2e6)
+        try:
+            sample_queue.put_nowait((samples.copy(), 433.2e6))
+        except queue.Full:
+            drops[0] += 1
+            try:
+                sample_queue.get_nowait()
+                sample_queue.put_nowait((samples.copy(), 433.2e6))
+            except Exception:
+                pass
+
+    def stats():
+        stop.set()
+        thread.join()
+        return f"demod drops {drops[0]}"
+    return callback, stats
+
+
+def pipeline_callback():
+    processor = SignalProcessor(FS)
+    waterfall = WaterfallHistory(processor.fft_size)
+    demodulator = make_demod()
+    pipeline = RxPipeline(lambda: 433.2e6, slot_size=N)
+
+    def spectrum_consumer(buffer):
+        spectrum = processor.compute_spectrum(buffer.samples, center_freq=buffer.center_freq)
+        waterfall.append(spectrum, buffer.center_freq)
+
+    pipeline.add_consumer("spectrum", spectrum_consumer, maxsize=4)
+    pipeline.add_consumer("demod", lambda buffer: demodulator.demodulate(buffer.samples), maxsize=10)
+    pipeline.start()
+
+    def stats():
+        pipeline.stop()
+        consumers = pipeline.get_stats()["consumers"]
+        return ", ".join(f"{name} {c['processed']}/{c['received']} (overruns {c['overruns']})"
+                         for name, c in consumers.items())
+    return pipeline, stats, pipeline
+
+
+def run(label, callback, stats, buffer_pool=None):
+    driver = make_driver()
+    driver.start_streaming(callback, buffer_pool)
+    time.sleep(SECONDS)
+    driver.stop_streaming()
+    gaps = driver.get_rx_gap_stats()
+    print(f"  {label:34s} rx() gap p50 {gaps['p50']:6.3f} ms  p99 {gaps['p99']:6.3f} ms  "
+          f"max {gaps['max']:6.3f} ms | overflows {driver._sdr.overflows} | {stats()}")
+    return gaps, driver._sdr.overflows
+
+
+if __name__ == "__main__":
+    print(f"=== rx() gap over {SECONDS:.0f} s ({N} samples per buffer, {N / FS * 1e3:.2f} ms each, "
+          f"demodulation running) ===")
+    legacy, _ = run("inline FFT + JSON (original)", *inline_callback(True))
+    inline, _ = run("inline FFT + waterfall (previous)", *inline_callback(False))
+    piped, overflows = run("RX pipeline (publish only)", *pipeline_callback())
+    ok = piped['p99'] < inline['p99'] and piped['p99'] < legacy['p99'] and overflows == 0
+    print(f"{'[PASS]' if ok else '[FAIL]'} pipeline p99 gap {piped['p99']:.3f} ms vs "
+          f"{legacy['p99']:.3f} ms original / {inline['p99']:.3f} ms previous, max {piped['max']:.3f} ms")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,134 @@
+"""
+发射波形合成性能基准
+- 旧实现: 补零冲激序列 + np.convolve + cumsum + exp (每次重新设计 RRC)
+- 多相脉冲表整帧合成 (float32/complex64)
+- 长字节流只改动少量字节时: 整段重建 vs 增量更新
+- 脉冲表分别用回退 RRC (2*6*sps+1 抽头) 与 GNU Radio firdes 的抽头数 (11*sps，强制为奇数)
+"""
+import sys
+import time
+import struct
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_generator import (generate_rrc_coeffs, get_pulse_table, FskWaveform,
+                                  PulseShapeTable, _construct_frame)
+from protocol.symbol_codec import bytes_to_levels
+
+FS = 2_000_000
+
+
+def legacy_fsk(frame_bytes, fs, symbol_rate, rrc_coeffs=None):
+    sps = max(2, int(fs / symbol_rate))
+    upsampled = np.zeros(len(frame_bytes) * 4 * sps, dtype=np.float32)
+    bytes_to_levels(frame_bytes, out=upsampled[::sps])
+    if rrc_coeffs is None:
+        rrc_coeffs = generate_rrc_coeffs(0.25, sps, span=6, fs=fs, symbol_rate=symbol_rate)
+    freq_trajectory = np.convolve(upsampled, rrc_coeffs, mode='full')
+    phase = np.cumsum(0.54 * freq_trajectory)
+    return (np.exp(1j * phase).astype(np.complex64)) * 0.9
+
+
+def firdes_length_taps(sps, alpha=0.25):
+    """与 firdes.root_raised_cosine(sps, fs, baud, alpha, 11*sps) 等长的 RRC 抽头 (ntaps |= 1)"""
+    ntaps = (11 * sps) | 1
+    t = (np.arange(ntaps) - (ntaps - 1) / 2) / sps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taps = (np.sin(np.pi * t * (1 - alpha)) + 4 * alpha * t * np.cos(np.pi * t * (1 + alpha))) \
+            / (np.pi * t * (1 - (4 * alpha * t) ** 2))
+    taps[t == 0] = 1 - alpha + 4 * alpha / np.pi
+    singular = np.isclose(np.abs(t), 1 / (4 * alpha))
+    taps[singular] = (alpha / np.sqrt(2)) * ((1 + 2 / np.pi) * np.sin(np.pi / (4 * alpha))
+                                            + (1 - 2 / np.pi) * np.cos(np.pi / (4 * alpha)))
+    return taps / taps.sum() * sps
+
+
+def position_frame(k):
+    coords = [(100 * k + i) & 0xFFFF for i in range(12)]
+    return _construct_frame(struct.pack('<12H', *coords), cmd_id=0x0A01)
+
+
+def time_call(fn, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        out = fn()
+    return (time.perf_counter() - t0) / repeats, out
+
+
+def bench_synth(symbol_rate, firdes_taps=False, repeats=200):
+    frames = [position_frame(k) for k in range(repeats)]
+    table, taps = make_table(symbol_rate, firdes_taps)
+
+    t0 = time.perf_counter()
+    for f in frames:
+        legacy = legacy_fsk(f, FS, symbol_rate, taps)
+    t_legacy = (time.perf_counter() - t0) / repeats
+
+    t0 = time.perf_counter()
+    for f in frames:
+        full = FskWaveform(table, f).samples
+    t_table = (time.perf_counter() - t0) / repeats
+
+    ok = len(full) == len(legacy) and full.dtype == np.complex64
+    err_full = np.max(np.abs(full - legacy)) if ok else float('inf')
+    ok = ok and err_full < 1e-3
+    print(f"  {symbol_rate / 1e3:5.0f} kBd, {table.ntaps:3d} taps ({len(full):5d}/{len(legacy):5d} samples) | "
+          f"legacy: {t_legacy * 1e6:7.1f} us | table: {t_table * 1e6:7.1f} us | "
+          f"{'[PASS]' if ok else '[FAIL]'} max err {err_full:.1e}")
+    return ok
+
+
+def make_table(symbol_rate, firdes_taps):
+    sps = max(2, int(FS / symbol_rate))
+    if firdes_taps:
+        taps = firdes_length_taps(sps)
+        return PulseShapeTable(taps, sps, 0.54), taps
+    return get_pulse_table(FS, symbol_rate), None
+
+
+def bench_incremental(n_bytes, repeats=50, symbol_rate=250000, firdes_taps=False):
+    """每次改动中间 4 字节与末尾 2 字节 (类似坐标 + CRC16)"""
+    rng = np.random.default_rng(n_bytes)
+    table, taps = make_table(symbol_rate, firdes_taps)
+    data = bytearray(rng.integers(0, 256, n_bytes, dtype=np.uint8).tobytes())
+    versions = []
+    for k in range(repeats):
+        struct.pack_into('<2H', data, n_bytes // 3, k, k + 1)
+        struct.pack_into('<H', data, n_bytes - 2, k * 7)
+        versions.append(bytes(data))
+
+    t_full, _ = time_call(lambda: FskWaveform(table, versions[-1]), repeats)
+    waveform = FskWaveform(table, versions[0])
+    t0 = time.perf_counter()
+    for v in versions:
+        waveform.set_data(v)
+    t_incr = (time.perf_counter() - t0) / repeats
+
+    legacy = legacy_fsk(versions[-1], FS, symbol_rate, taps)
+    ok = len(waveform.samples) == len(legacy)
+    err = np.max(np.abs(waveform.samples - legacy)) if ok else float('inf')
+    ok = ok and err < 1e-2
+    mode = "incremental" if n_bytes >= FskWaveform.INCREMENTAL_MIN_BYTES else "rebuild"
+    print(f"  {n_bytes:5d} B, {table.ntaps:3d} taps ({len(waveform.samples):6d} samples) | "
+          f"rebuild: {t_full * 1e6:7.1f} us | "
+          f"set_data ({mode}): {t_incr * 1e6:7.1f} us | {'[PASS]' if ok else '[FAIL]'} max err {err:.1e}")
+    return ok
+
+
+if __name__ == "__main__":
+    # firdes 抽头数的一组中 legacy 不含滤波器设计时间 (抽头预先给出)
+    print("=== 0x0A01 frame synthesis (32 B preamble + 24 B payload) ===")
+    ok = True
+    for firdes_taps in (False, True):
+        for symbol_rate in (250000, 500000, 285000, 200000):
+            ok &= bench_synth(symbol_rate, firdes_taps)
+
+    print("\n=== Small edit to a long byte stream (250 kBd) ===")
+    for n_bytes in (65, 300, 1000, 3125):
+        ok &= bench_incremental(n_bytes)
+    print("\n=== Small edit to a long byte stream (285 kBd, firdes tap count) ===")
+    for n_bytes in (300, 1000):
+        ok &= bench_incremental(n_bytes, symbol_rate=285000, firdes_taps=True)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,93 @@
+// 二进制频谱帧解码 (与 backend/sdr/spectrum_codec.py 版本 1 对应)
+// 头部 44 字节 (小端):
+//   magic 'SP' | version u8 | kind u8 | flags u8 | dtype u8 | id_len u8 | 保留 u8
+//   bins u16 | axis_id u16 | center_freq f64 | bin_width f64 | timestamp f64 | offset f32 | step f32
+// 之后为设备 ID (UTF-8) 与数据: 轴帧为 bins 个 f64，功率帧为 bins 个量化值 (dB = offset + step * q)
+
+export const SPECTRUM_VERSION = 1;
+const HEADER_SIZE = 44;
+const KIND_AXIS = 1;
+const FLAG_OVERFLOW = 0x01;
+const FLAG_UNDERFLOW = 0x02;
+const FLAG_PEAK = 0x04;
+
+export interface SpectrumFrame {
+  deviceId: string;
+  centerFreq: number;
+  binWidth: number;
+  timestamp: number;
+  frequencies: number[];
+  power: number[];
+  peak?: number[];
+  overflow: boolean;
+  underflow: boolean;
+}
+
+const decoder = new TextDecoder();
+// device_id -> 最近收到的频率轴
+const axes = new Map<string, { id: number; frequencies: number[] }>();
+
+function dequantize(buffer: ArrayBuffer, offset: number, bins: number, dtype: number,
+                    base: number, step: number): number[] {
+  const view = new DataView(buffer);
+  const out = new Array<number>(bins);
+  for (let i = 0; i < bins; i++) {
+    const q = dtype === 0 ? view.getUint8(offset + i) : view.getInt16(offset + 2 * i, true);
+    out[i] = base + step * q;
+  }
+  return out;
+}
+
+/**
+ * 解析一帧二进制频谱。轴帧只更新缓存并返回 null，
+ * 功率帧在对应轴已收到时返回完整频谱。
+ */
+export function decodeSpectrumFrame(buffer: ArrayBuffer): SpectrumFrame | null {
+  const view = new DataView(buffer);
+  if (buffer.byteLength < HEADER_SIZE || view.getUint8(0) !== 0x53 || view.getUint8(1) !== 0x50
+      || view.getUint8(2) !== SPECTRUM_VERSION) {
+    return null;
+  }
+  const kind = view.getUint8(3);
+  const flags = view.getUint8(4);
+  const dtype = view.getUint8(5);
+  const idLen = view.getUint8(6);
+  const bins = view.getUint16(8, true);
+  const axisId = view.getUint16(10, true);
+  const centerFreq = view.getFloat64(12, true);
+  const binWidth = view.getFloat64(20, true);
+  const timestamp = view.getFloat64(28, true);
+  const base = view.getFloat32(36, true);
+  const step = view.getFloat32(40, true);
+  const deviceId = decoder.decode(new Uint8Array(buffer, HEADER_SIZE, idLen));
+  const dataOffset = HEADER_SIZE + idLen;
+
+  if (kind === KIND_AXIS) {
+    const frequencies = new Array<number>(bins);
+    for (let i = 0; i < bins; i++) {
+      frequencies[i] = view.getFloat64(dataOffset + 8 * i, true);
+    }
+    axes.set(deviceId, { id: axisId, frequencies });
+    return null;
+  }
+
+  const axis = axes.get(deviceId);
+  if (!axis || axis.id !== axisId) {
+    return null;
+  }
+  const itemSize = dtype === 0 ? 1 : 2;
+  const frame: SpectrumFrame = {
+    deviceId,
+    centerFreq,
+    binWidth,
+    timestamp,
+    frequencies: axis.frequencies,
+    power: dequantize(buffer, dataOffset, bins, dtype, base, step),
+    overflow: (flags & FLAG_OVERFLOW) !== 0,
+    underflow: (flags & FLAG_UNDERFLOW) !== 0,
+  };
+  if (flags & FLAG_PEAK) {
+    frame.peak = dequantize(buffer, dataOffset + bins * itemSize, bins, dtype, base, step);
+  }
+  return frame;
+}
@@ -30,6 +30,15 @@ export function useWebSocket() {
         // 将 WebSocket 实例注册到 store 以支持命令发送
         if (socket.value) {
           store.setWebSocket(socket.value);
+          // 频谱改用二进制量化帧 (频率轴只在变化时发送)，点数约为图表宽度，最大值降点保留窄带峰值，
+          // 每台设备最多 30 帧/秒 (服务端只发送最新一帧)
+          store.sendCommand('set_spectrum_format', {
+            format: 'binary',
+            dtype: 'uint8',
+            bins: Math.min(1024, Math.max(128, Math.round(window.innerWidth))),
+            pooling: 'max',
+            fps: 30
+          });
         }
         
         // 启动心跳
@@ -90,6 +99,8 @@ export function useWebSocket() {
               store.addDecodedPacket({
                 timestamp: msg.timestamp,
                 hex: msg.hex,
+                cmdId: msg.cmd_id,
+                fields: msg.fields,
                 packetType: msg.packet_type,
                 isValid: msg.is_valid,
                 deviceId: msg.device_id
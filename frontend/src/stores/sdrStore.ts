@@ -2,6 +2,7 @@ import { defineStore } from 'pinia';
 import { ref, computed, shallowRef } from 'vue';
 import type { SDRStatus, SpectrumData, RadarTarget } from '@/types';
 import type { SDRTab, SDRConfig, TxSignalType, RxSignalType } from '@/types/sdrTypes';
+import { decodeSpectrumFrame } from '@/composables/spectrumCodec';
 
 export interface SDRDevice {
   id: string;
@@ -93,7 +94,9 @@ export const useSDRStore = defineStore('sdr', () => {
   // 解码的数据包
   interface DecodedPacket {
     timestamp: string;
-    hex: string;
+    hex?: string;                         // 未注册命令的原始帧
+    cmdId?: number;
+    fields?: Record<string, number>;      // 后端已解码的数据段字段
     packetType: string;
     isValid: boolean;
     deviceId: string;
@@ -285,9 +288,25 @@ export const useSDRStore = defineStore('sdr', () => {
   
   function setWebSocket(ws: WebSocket) {
     wsSocket.value = ws;
+    ws.binaryType = 'arraybuffer';
     
     ws.onmessage = (event) => {
       try {
+        // 二进制频谱帧 (set_spectrum_format 选择 binary 后)
+        if (event.data instanceof ArrayBuffer) {
+          const frame = decodeSpectrumFrame(event.data);
+          if (frame) {
+            updateSpectrum({
+              frequencies: frame.frequencies,
+              power: frame.power,
+              device_id: frame.deviceId,
+              overflow: frame.overflow,
+              underflow: frame.underflow
+            });
+          }
+          return;
+        }
+        
         const msg = JSON.parse(event.data);
         
         // 1. 检查是否是对某个命令的响应 (has cmd field)
@@ -320,6 +339,8 @@ export const useSDRStore = defineStore('sdr', () => {
           addDecodedPacket({
             timestamp: msg.timestamp,
             hex: msg.hex,
+            cmdId: msg.cmd_id,
+            fields: msg.fields,
             packetType: msg.packet_type,
             isValid: msg.is_valid,
             deviceId: msg.device_id
@@ -384,7 +405,7 @@ export const useSDRStore = defineStore('sdr', () => {
     });
 
     // 添加解码数据包
-    function addDecodedPacket(packet: { timestamp: string; hex: string; packetType: string; isValid: boolean; deviceId: string }) {
+    function addDecodedPacket(packet: DecodedPacket) {
         decodedPackets.value.push(packet);
         // 限制最大数量，防止内存溢出
         const MAX_PACKETS = 100;
@@ -0,0 +1,97 @@
+
+import sys
+import struct
+
+# Add backend to path
+sys.path.append('backend')
+
+from protocol.crc import append_crc8_check_sum, append_crc16_check_sum
+from protocol.packet import RadarPacket
+from protocol.dedup import PacketDeduplicator
+
+
+def make_frame(seq, cmd_id, payload):
+    header = append_crc8_check_sum(bytes([0xA5]) + struct.pack('<H', len(payload)) + bytes([seq]))
+    return append_crc16_check_sum(header + struct.pack('<H', cmd_id) + payload)
+
+
+def simulate(dedup, frames, rate_hz, seconds, start=0.0, buffer_period=0.008):
+    """循环发射: 每个 RX 缓冲区 (8 ms) 解出若干份同样的帧"""
+    fresh, repeats, rates = [], [], []
+    per_buffer = rate_hz * buffer_period
+    owed = 0.0
+    t = start
+    while t < start + seconds:
+        owed += per_buffer
+        packets = []
+        while owed >= 1.0:
+            packets += [RadarPacket(f, t) for f in frames]
+            owed -= 1.0
+        fresh += dedup.feed("pluto_0", packets, now=t)
+        r, l = dedup.poll(now=t)
+        repeats += r
+        rates += l
+        t += buffer_period
+    # 停止发射后再轮询一次，取回最后一个间隔的汇总
+    r, _ = dedup.poll(now=t + dedup.update_interval)
+    repeats += r
+    return fresh, repeats, rates
+
+
+def test_dedup():
+    print("Testing cyclic-TX deduplication...")
+    frames = [make_frame(0, 0x0A01, bytes(24)), make_frame(0, 0x0A02, bytes(12))]
+    dedup = PacketDeduplicator(window=2.0, update_interval=1.0)
+    ok = True
+
+    # 两种帧各 125 次/秒，持续 10 秒
+    fresh, repeats, rates = simulate(dedup, frames, 125, 10.0)
+    raw = 125 * 10 * len(frames)
+    messages = len(fresh) + len(repeats) + len(rates)
+    if len(fresh) == 2:
+        print(f"[PASS] {raw} decoded copies -> {len(fresh)} first-copy messages")
+    else:
+        print(f"[FAIL] expected 2 first-copy messages, got {len(fresh)}")
+        ok = False
+
+    last = {r['cmd_id']: r for r in repeats}
+    if all(abs(last[f]['count'] - 1250) <= 2 for f in (0x0A01, 0x0A02)) and len(repeats) <= 2 * 11:
+        print(f"[PASS] {len(repeats)} aggregated updates, final counts "
+              f"{last[0x0A01]['count']}/{last[0x0A02]['count']}")
+    else:
+        print(f"[FAIL] unexpected repeat updates: {len(repeats)}")
+        ok = False
+
+    # 速率取发射期间最后一个完整间隔
+    packet_rate = rates[-1]['packet_rate']
+    if abs(packet_rate - 250) < 5 and rates[-1]['unique_rate'] == 0:
+        print(f"[PASS] link rate {packet_rate:.1f} packets/s (broadcast load {raw} -> {messages} messages)")
+    else:
+        print(f"[FAIL] link rate {packet_rate:.1f} packets/s, unique {rates[-1]['unique_rate']:.1f}")
+        ok = False
+
+    # 超过窗口后重新出现的帧视为新帧
+    fresh, _, _ = simulate(dedup, frames[:1], 125, 1.0, start=15.0)
+    if len(fresh) == 1:
+        print("[PASS] frame re-emitted after dedup window expired")
+    else:
+        print(f"[FAIL] expected re-emission after window, got {len(fresh)}")
+        ok = False
+
+    # 窗口过后重新出现时，旧记录上未推送的重复次数不能随替换丢失
+    dedup = PacketDeduplicator(window=2.0, update_interval=1.0)
+    dedup.feed("pluto_0", [RadarPacket(frames[0], 0.0)], now=0.0)
+    dedup.feed("pluto_0", [RadarPacket(frames[0], 0.5)], now=0.5)
+    fresh = dedup.feed("pluto_0", [RadarPacket(frames[0], 3.0)], now=3.0)
+    repeats, _ = dedup.poll(now=3.0)
+    if len(fresh) == 1 and [(r['count'], r['last_seen']) for r in repeats] == [(2, 0.5)] \
+            and dedup.poll(now=3.0)[0] == []:
+        print("[PASS] unreported repeat count flushed when the frame record is replaced")
+    else:
+        print(f"[FAIL] fresh {len(fresh)}, repeats {repeats}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_dedup() else 1)
@@ -0,0 +1,146 @@
+
+import sys
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.frame_scheduler import FrameScheduler
+from sdr.signal_generator import _construct_frame
+from sdr.tx_engine import TxStreamEngine
+from sdr.sdr_manager import SDRManager, SDRInstance, SDRDeviceInfo
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from protocol.packet_parser import PacketParser
+from protocol.byte_sync import FourPhaseByteSync
+
+FS = 2_000_000
+BAUD = 250000
+BLOCK = 16384
+
+# 雷达链路命令: (cmd_id, 载荷字节数, 目标帧率 Hz)
+COMMANDS = [(0x0A01, 24, 10.0), (0x0A02, 12, 5.0), (0x0A04, 6, 2.0), (0x0A05, 36, 1.0)]
+
+
+def make_scheduler(rates=None):
+    scheduler = FrameScheduler(BAUD)
+    for cmd_id, size, rate in COMMANDS:
+        rate = (rates or {}).get(cmd_id, rate)
+        scheduler.set_payload(cmd_id, bytes([cmd_id & 0xFF]) * size, rate)
+    return scheduler
+
+
+def test_rates(duration=10.0):
+    print("Testing per-command rates over 10 s of airtime...")
+    scheduler = make_scheduler()
+    schedule = scheduler.build_schedule(duration)
+    stats = scheduler.get_stats()
+    ok = True
+
+    counts = {cmd_id: stats['commands'][cmd_id]['sent'] for cmd_id, _, _ in COMMANDS}
+    errors = [abs(counts[cmd_id] / duration - rate) / rate for cmd_id, _, rate in COMMANDS]
+    if max(errors) < 0.02 and all(c['skipped'] == 0 for c in stats['commands'].values()):
+        print(f"[PASS] frames sent {dict((hex(k), v) for k, v in counts.items())}, "
+              f"max rate error {max(errors) * 100:.1f}%, utilization {stats['utilization'] * 100:.2f}%")
+    else:
+        print(f"[FAIL] counts {counts}, rate errors {errors}")
+        ok = False
+
+    packets = PacketParser().feed_bytes(b''.join(schedule))
+    seqs = [p.seq for p in packets]
+    consecutive = all((b - a) & 0xFF == 1 for a, b in zip(seqs, seqs[1:]))
+    if len(packets) == sum(counts.values()) and consecutive:
+        print(f"[PASS] {len(packets)} back-to-back frames parsed, seq increments by 1 (mod 256)")
+    else:
+        print(f"[FAIL] parsed {len(packets)}/{sum(counts.values())} frames, consecutive seq: {consecutive}")
+        ok = False
+    return ok
+
+
+def test_saturation(duration=2.0):
+    print("Testing saturated link...")
+    scheduler = make_scheduler({0x0A01: 10000.0})
+    scheduler.build_schedule(duration)
+    stats = scheduler.get_stats()
+    fast = stats['commands'][0x0A01]
+    others = [stats['commands'][cmd_id] for cmd_id, _, _ in COMMANDS[1:]]
+    served = all(abs(c['sent'] - c['target_rate'] * duration) <= 1 for c in others)
+    if fast['achieved_rate'] < fast['target_rate'] and fast['skipped'] > 0 \
+            and stats['utilization'] > 0.99 and served:
+        print(f"[PASS] 0x0A01 achieved {fast['achieved_rate']:.0f}/{fast['target_rate']:.0f} Hz "
+              f"({fast['skipped']} slots skipped), utilization {stats['utilization'] * 100:.1f}%, "
+              f"slower commands still on rate")
+    else:
+        print(f"[FAIL] {stats}")
+        return False
+    return True
+
+
+def test_stream_decode(blocks=64):
+    print("Testing scheduler as TX engine frame source...")
+    scheduler = make_scheduler()
+    engine = TxStreamEngine(lambda s: None, FS, BAUD, BLOCK)
+    engine.set_frame_source(scheduler.next_frame)
+    iq = np.concatenate([engine.produce_block() for _ in range(blocks)])
+
+    config = DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS)
+    symbols, _ = Demodulator(config, streaming=True).demodulate(iq)
+    packets = FourPhaseByteSync().feed_symbols(symbols)
+    decoded = {p.cmd_id for p in packets}
+    seqs = [p.seq for p in packets]
+    sent = sum(c['sent'] for c in scheduler.get_stats()['commands'].values())
+    consecutive = all((b - a) & 0xFF == 1 for a, b in zip(seqs, seqs[1:]))
+    # 最后一帧可能被块边界截断
+    if decoded == {c[0] for c in COMMANDS} and consecutive and len(packets) >= sent - 1:
+        print(f"[PASS] {len(packets)}/{sent} frames decoded from {len(iq) / FS:.2f} s stream, "
+              f"all command IDs present, seq consecutive")
+        return True
+    print(f"[FAIL] decoded {len(packets)}/{sent}, cmd_ids {sorted(decoded)}, seqs {seqs[:10]}...")
+    return False
+
+
+def decode_cmd_ids(engine, blocks=16):
+    iq = np.concatenate([engine.produce_block() for _ in range(blocks)])
+    config = DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS)
+    symbols, _ = Demodulator(config, streaming=True).demodulate(iq)
+    return [p.cmd_id for p in FourPhaseByteSync().feed_symbols(symbols)]
+
+
+def test_reschedule_after_payload_update():
+    print("Testing set_tx_command after update_tx_payload...")
+    manager = SDRManager()
+    engine = TxStreamEngine(lambda s: None, FS, BAUD, BLOCK)
+    instance = SDRInstance(device_info=SDRDeviceInfo(id="fake", name="fake", uri="fake"),
+                           driver=None, tx_engine=engine)
+    manager._devices["fake"] = instance
+    manager.set_tx_command("fake", 0x0A02, "0102", 50.0)
+    manager.update_tx_payload("fake", "ABCD")
+    single = decode_cmd_ids(engine)
+    stale = "schedule" in manager.get_tx_stats("fake")
+    scheduled = manager.set_tx_command("fake", 0x0A01, "0A0B0C", 50.0)
+    resumed = decode_cmd_ids(engine)
+    # 切换前已在发送的帧 (跨块的剩余部分) 会先发完
+    if set(single[1:]) == {0x0201} and not stale and scheduled and set(resumed[1:]) == {0x0A01} \
+            and manager.get_tx_stats("fake")["schedule"]["commands"][0x0A01]["sent"] > 0:
+        print("[PASS] payload update returns to the single frame, later commands are scheduled on air again")
+        return True
+    print(f"[FAIL] after update {sorted(set(single))} (stale schedule {stale}), "
+          f"after set_tx_command {sorted(set(resumed))}")
+    return False
+
+
+def report_efficiency():
+    print("Airtime per 24-byte 0x0A01 frame:")
+    payload = bytes(24)
+    for preamble_len in (32, FrameScheduler.PREAMBLE_LEN):
+        frame = _construct_frame(payload, cmd_id=0x0A01, preamble_len=preamble_len)
+        print(f"  preamble {preamble_len:2d} B: {len(frame)} B, {len(frame) * 4 / BAUD * 1e6:.0f} us, "
+              f"payload share {len(payload) / len(frame) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    ok = test_rates()
+    ok &= test_saturation()
+    ok &= test_stream_decode()
+    ok &= test_reschedule_after_payload_update()
+    report_efficiency()
+    sys.exit(0 if ok else 1)
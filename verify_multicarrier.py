@@ -0,0 +1,90 @@
+
+import sys
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.multicarrier import generate_multicarrier
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from protocol.byte_sync import FourPhaseByteSync
+
+FS = 2_000_000
+SIGNALS = [('red_broadcast', 'ABCD1234'), ('red_jam_2', None)]
+
+
+def decode_carrier(samples, carrier, repeats=4):
+    """搬回基带后解调 (循环缓冲区重复 repeats 次)"""
+    iq = np.tile(samples, repeats)
+    n = np.arange(len(iq))
+    iq = (iq * np.exp(-2j * np.pi * carrier.offset * n / FS)).astype(np.complex64)
+    config = DemodulatorConfig.from_signal_type(carrier.signal_type, sample_rate=FS)
+    symbols, _ = Demodulator(config, streaming=True).demodulate(iq)
+    return FourPhaseByteSync().feed_symbols(symbols)
+
+
+def test_composite():
+    print("Testing red_broadcast + red_jam_2 from one LO...")
+    multi = generate_multicarrier(SIGNALS, FS, seed=7)
+    x = multi.samples
+    ok = True
+
+    peak = np.max(np.abs(x))
+    ratio_db = 20 * np.log10(multi.carriers[1].amplitude / multi.carriers[0].amplitude)
+    if x.dtype == np.complex64 and peak <= 0.9 * (1 + 1e-6) and abs(ratio_db - 20.0) < 1e-6:
+        print(f"[PASS] peak {peak:.4f} <= 0.9 full scale, jam/broadcast amplitude {ratio_db:.1f} dB "
+              f"(SIGNAL_SPECS power), LO {multi.center_freq / 1e6:.2f} MHz, TX gain {multi.tx_gain:.1f} dB")
+    else:
+        print(f"[FAIL] peak {peak:.4f}, amplitude ratio {ratio_db:.2f} dB, dtype {x.dtype}")
+        ok = False
+
+    # 循环缓冲区首尾衔接: 各路频偏转整数圈，衔接处步进不超过缓冲区内最大步进
+    turns = [c.offset * len(x) / FS for c in multi.carriers]
+    wrap = abs(x[0] - x[-1])
+    inner = np.max(np.abs(np.diff(x)))
+    if all(abs(t - round(t)) < 1e-9 for t in turns) and wrap <= inner:
+        print(f"[PASS] {len(x)}-sample cyclic buffer: offsets complete {turns} turns, "
+              f"wrap step {wrap:.3f} <= in-buffer max {inner:.3f}")
+    else:
+        print(f"[FAIL] turns {turns}, wrap step {wrap:.3f} vs {inner:.3f}")
+        ok = False
+
+    # 合成 = 各路单独合成之和 (同一本振与随机种子)
+    alone = [generate_multicarrier([s], FS, center_freq=multi.center_freq, min_samples=len(x), seed=7)
+             for s in SIGNALS]
+    parts = [a.samples / a.carriers[0].amplitude * c.amplitude for a, c in zip(alone, multi.carriers)]
+    err = np.max(np.abs(x - sum(parts)))
+    if len(alone[0].samples) == len(x) and err < 1e-5:
+        print(f"[PASS] composite equals the sum of single-carrier syntheses (max err {err:.1e})")
+    else:
+        print(f"[FAIL] composite differs from per-carrier sum (err {err:.1e})")
+        ok = False
+
+    # 广播载波搬回基带后每帧都能解出
+    packets = decode_carrier(alone[0].samples, alone[0].carriers[0])
+    expected = alone[0].carriers[0].frames * 4
+    if packets and all(bytes(p.payload).hex().upper() == 'ABCD1234' for p in packets) \
+            and len(packets) >= expected - 1:
+        print(f"[PASS] broadcast carrier at {alone[0].carriers[0].offset / 1e3:+.0f} kHz decodes "
+              f"{len(packets)}/{expected} frames")
+    else:
+        print(f"[FAIL] decoded {len(packets)}/{expected} broadcast frames")
+        ok = False
+    return ok
+
+
+def test_out_of_band():
+    print("Testing baseband range check...")
+    try:
+        generate_multicarrier([('red_broadcast', 'AB'), ('red_jam_1', None)], FS)
+    except ValueError as e:
+        print(f"[PASS] rejected: {e}")
+        return True
+    print("[FAIL] red_jam_1 at -1 MHz accepted in a 2 MHz baseband")
+    return False
+
+
+if __name__ == "__main__":
+    ok = test_composite()
+    ok &= test_out_of_band()
+    sys.exit(0 if ok else 1)
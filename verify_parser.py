@@ -70,5 +70,102 @@ def test_parser():
     else:
         print(f"[FAIL] Parsed frame with bad CRC16")
 
+def test_symbol_parser():
+    import numpy as np
+    from protocol.symbol_codec import bytes_to_levels
+
+    print("\nTesting symbol stream parsing...")
+    rng = np.random.default_rng(0)
+    frame = create_test_frame(seq=2, cmd_id=0x0201, data=b'Hello Radar')
+    burst = bytes_to_levels(bytes([0xE4] * 4) + frame)
+    noise = rng.uniform(-4, 4, 3001).astype(np.float32)
+    stream = np.concatenate([noise, burst, noise, burst, burst, noise]).astype(np.float32)
+    stream += rng.normal(0, 0.2, len(stream)).astype(np.float32)
+
+    parser = PacketParser()
+    packets = []
+    for i in range(0, len(stream), 257):
+        packets += parser.feed_symbols(stream[i:i + 257])
+    if len(packets) == 3 and all(p.payload == b'Hello Radar' for p in packets):
+        print("[PASS] Parsed 3 frames from chunked noisy symbol stream")
+    else:
+        print(f"[FAIL] Expected 3 frames, got {len(packets)}")
+
+    # 门限上的值按严格大于判决 (静默/补零输入 0.0 -> -1)
+    from protocol.symbol_codec import slice_symbols, decide_symbols
+    boundary = np.array([-2.0, 0.0, 2.0, -2.0001, 0.0001, 2.0001], dtype=np.float32)
+    expected = [-3.0, -1.0, 1.0, -3.0, 1.0, 3.0]
+    if list(decide_symbols(boundary)) == expected and list(slice_symbols(boundary)) == [0, 1, 2, 0, 2, 3]:
+        print("[PASS] Threshold values -2/0/2 decide to -3/-1/1 (strict >)")
+    else:
+        print(f"[FAIL] Boundary decisions {list(decide_symbols(boundary))}, expected {expected}")
+
+    # Preamble 后无 SOF 的长序列不应使缓冲区无限增长
+    parser.clear()
+    parser.feed_symbols(bytes_to_levels(bytes([0xE4] * 100000)))
+    if len(parser._symbol_ring) <= parser.SYMBOL_BUFFER_CAPACITY:
+        print(f"[PASS] Symbol buffer bounded ({len(parser._symbol_ring)} symbols)")
+    else:
+        print(f"[FAIL] Symbol buffer grew to {len(parser._symbol_ring)} symbols")
+
+def test_incremental_crc():
+    from protocol.crc import Crc8, Crc16, append_crc8_check_sum, append_crc16_check_sum
+
+    print("\nTesting incremental CRC...")
+    data = bytes(range(256)) * 2
+    crc8, crc16 = Crc8(), Crc16()
+    for i in range(0, len(data), 7):
+        crc8.update(data[i:i + 7])
+        crc16.update(data[i:i + 7])
+    if (data + crc8.digest() == append_crc8_check_sum(data) and
+            data + crc16.digest() == append_crc16_check_sum(data)):
+        print("[PASS] Crc8/Crc16 chunked updates match append_*_check_sum")
+    else:
+        print("[FAIL] Incremental CRC mismatch")
+
+    # 逐字节输入: 未完成帧的 CRC 状态跨调用延续
+    frame = create_test_frame(seq=3, cmd_id=0x0201, data=bytes(200))
+    stream = b'\x00\xA5\x13' + frame + b'\xA5' + frame
+    parser = PacketParser()
+    packets = []
+    for i in range(len(stream)):
+        packets += parser.feed_bytes(stream[i:i + 1])
+    if len(packets) == 2 and all(p.frame_bytes == frame for p in packets):
+        print("[PASS] Parsed 2 frames fed one byte at a time")
+    else:
+        print(f"[FAIL] Expected 2 frames from byte-wise feed, got {len(packets)}")
+
+def test_packet_types():
+    from protocol.packet import PacketBatch
+
+    print("\nTesting RadarPacket / PacketBatch...")
+    frames = [create_test_frame(seq=i, cmd_id=0x0201 if i % 2 else 0x0301, data=bytes([i]) * 6)
+              for i in range(8)]
+    parser = PacketParser()
+    packets = parser.feed_bytes(b''.join(frames))
+    pkt = packets[1]
+    try:
+        pkt.seq = 99
+        print("[FAIL] RadarPacket is mutable")
+    except AttributeError:
+        print("[PASS] RadarPacket is immutable")
+    if pkt.to_json("dev") is pkt.to_json("dev") and pkt.hex_string == frames[1].hex().upper():
+        print("[PASS] hex/JSON encoding cached")
+    else:
+        print("[FAIL] hex/JSON encoding not cached or wrong")
+
+    batch = parser.feed_bytes_batch(b''.join(frames))
+    odd = batch.select(0x0201)
+    matrix = odd.payload_matrix()
+    if (len(batch) == 8 and list(batch.records['seq']) == list(range(8)) and
+            matrix.shape == (4, 6) and list(matrix[:, 0]) == [1, 3, 5, 7] and
+            batch[2].frame_bytes == frames[2]):
+        print("[PASS] PacketBatch columns, select and payload_matrix")
+    else:
+        print("[FAIL] PacketBatch mismatch")
+
 if __name__ == "__main__":
     test_parser()
+    test_symbol_parser()
+    test_incremental_crc()
+    test_packet_types()
@@ -0,0 +1,179 @@
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.pluto_driver import PlutoDriver, PlutoConfig
+from sdr.rx_pipeline import RxPipeline
+
+FS = 2_000_000
+N = 16384
+
+
+class FakePluto:
+    """adi.Pluto 替身: 第 k 个缓冲区的样本值均为 k (complex128，与 pyadi 相同)，按采样节拍返回"""
+
+    def __init__(self, period=N / FS):
+        self._buffers = [np.full(N, k, dtype=np.complex128) for k in range(64)]
+        self._period = period
+        self._next = None
+        self.count = 0
+
+    def rx(self):
+        now = time.perf_counter()
+        self._next = now if self._next is None else self._next + self._period
+        if self._next > now:
+            time.sleep(self._next - now)
+        self.count += 1
+        return self._buffers[self.count % 64]
+
+
+def make_driver(period=N / FS):
+    driver = PlutoDriver(PlutoConfig(sample_rate=FS, buffer_size=N))
+    driver._sdr = FakePluto(period)
+    driver._is_connected = True
+    return driver
+
+
+def stream(driver, pipeline, seconds):
+    driver.start_streaming(pipeline, buffer_pool=pipeline)
+    time.sleep(seconds)
+    driver.stop_streaming()
+
+
+def test_independent_consumers():
+    print("Testing independent consumers with per-consumer overruns...")
+    fast_seen, slow_seen = [], []
+    pipeline = RxPipeline(lambda: 433.2e6, lambda: (True, False))
+    pipeline.add_consumer("fast", lambda b: fast_seen.append(b.seq), maxsize=4)
+    pipeline.add_consumer("slow", lambda b: (time.sleep(0.02), slow_seen.append(b.seq)), maxsize=3)
+    pipeline.start()
+    t0 = time.perf_counter()
+    for _ in range(50):
+        pipeline.publish(np.zeros(1024, dtype=np.complex64))
+        time.sleep(0.002)
+    publish_time = time.perf_counter() - t0
+    time.sleep(0.1)
+    pipeline.stop()
+    stats = pipeline.get_stats()
+    fast, slow = stats["consumers"]["fast"], stats["consumers"]["slow"]
+    ok = True
+    if fast_seen == list(range(1, 51)) and fast["overruns"] == 0 and publish_time < 0.5:
+        print(f"[PASS] fast consumer saw all 50 buffers in order while the slow one lagged "
+              f"(publish loop {publish_time * 1e3:.0f} ms)")
+    else:
+        print(f"[FAIL] fast consumer saw {len(fast_seen)} buffers, overruns {fast['overruns']}")
+        ok = False
+    # 慢消费者丢弃自己最旧的缓冲区并记录，最后处理的是最新的
+    lost = sorted(set(range(1, 51)) - set(slow_seen))
+    if slow["overruns"] == len(lost) > 0 and slow["last_overrun_seq"] == lost[-1] and slow_seen[-1] == 50 \
+            and slow_seen == sorted(slow_seen) and stats["ring"]["in_use"] == 0 \
+            and stats["ring"]["exhausted"] == 0:
+        print(f"[PASS] slow consumer processed {slow['processed']}, {slow['overruns']} overruns "
+              f"(last lost seq {slow['last_overrun_seq']}), all {stats['ring']['slots']} slots released")
+    else:
+        print(f"[FAIL] slow consumer stats {slow}, ring {stats['ring']}")
+        ok = False
+    return ok
+
+
+def test_shared_read_only():
+    print("Testing shared read-only slot views and capture metadata...")
+    seen = []
+    pipeline = RxPipeline(lambda: 433.2e6, lambda: (True, False))
+    pipeline.add_consumer("a", seen.append)
+    pipeline.add_consumer("b", seen.append)
+    pipeline.start()
+    samples = np.arange(1024).astype(np.complex64)
+    pipeline.publish(samples)
+    time.sleep(0.05)
+    pipeline.stop()
+    try:
+        seen[0].samples[0] = 0
+        writable = True
+    except ValueError:
+        writable = False
+    if len(seen) == 2 and seen[0] is seen[1] and np.array_equal(seen[0].samples, samples) and not writable \
+            and seen[0].center_freq == 433.2e6 and seen[0].overflow and not seen[0].underflow \
+            and pipeline.copied == 1:
+        print("[PASS] external array copied once into a slot, one read-only view shared by both consumers")
+        return True
+    print(f"[FAIL] seen {len(seen)}, writable {writable}, copied {pipeline.copied}")
+    return False
+
+
+def test_slots_never_overwritten_while_held():
+    print("Testing driver writes into slots without overwriting held buffers...")
+    corrupt = []
+
+    def holder(buffer):
+        # 持有期间槽内容不得被生产者改写
+        first = buffer.samples[0]
+        time.sleep(0.015)
+        if buffer.samples[0] != first or buffer.samples[-1] != first:
+            corrupt.append(buffer.seq)
+
+    pipeline = RxPipeline(slot_size=N)
+    pipeline.add_consumer("slow", holder, maxsize=3)
+    pipeline.add_consumer("fast", lambda b: None, maxsize=3)
+    pipeline.start()
+    driver = make_driver()
+    stream(driver, pipeline, 1.0)
+    pipeline.stop()
+    stats = pipeline.get_stats()
+    slow, fast = stats["consumers"]["slow"], stats["consumers"]["fast"]
+    if not corrupt and pipeline.copied == 0 and stats["ring"]["exhausted"] == 0 and slow["overruns"] > 0 \
+            and fast["overruns"] == 0 and stats["ring"]["in_use"] == 0:
+        print(f"[PASS] {stats['published']} buffers written straight into {stats['ring']['slots']} slots "
+              f"({stats['ring']['bytes'] / 1024:.0f} KiB), slow consumer {slow['overruns']} overruns, "
+              f"no held slot overwritten")
+        return True
+    print(f"[FAIL] corrupt {corrupt[:5]}, copied {pipeline.copied}, stats {stats['ring']}, "
+          f"overruns slow {slow['overruns']} fast {fast['overruns']}")
+    return False
+
+
+def test_no_steady_state_allocation():
+    print("Testing RX loop allocation (tracemalloc peak over 1 s of streaming)...")
+    results = {}
+    for label, use_pool in (("np.array per buffer", False), ("slot ring", True)):
+        pipeline = RxPipeline(slot_size=N)
+        pipeline.add_consumer("spectrum", lambda b: None, maxsize=4)
+        pipeline.add_consumer("demod", lambda b: None, maxsize=10)
+        pipeline.start()
+        driver = make_driver(period=0.0005)
+        driver.start_streaming(pipeline, buffer_pool=pipeline if use_pool else None)
+        time.sleep(1.2)  # 预热: 槽环、线程就绪，耗时统计队列 (最多 2000 项) 填满
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        count = driver._sdr.count
+        time.sleep(1.0)
+        current, peak = tracemalloc.get_traced_memory()
+        count = driver._sdr.count - count
+        tracemalloc.stop()
+        driver.stop_streaming()
+        pipeline.stop()
+        results[label] = (peak - base, current - base, count, pipeline.copied)
+        print(f"  {label:20s} {count} buffers: peak +{(peak - base) / 1024:.1f} KiB, "
+              f"retained +{(current - base) / 1024:.1f} KiB, copies in publish {pipeline.copied}")
+    peak, retained, _, copied = results["slot ring"]
+    legacy_peak = results["np.array per buffer"][0]
+    if peak < N * 8 / 4 and retained < 8 * 1024 and copied == 0 and legacy_peak >= N * 8:
+        print(f"[PASS] slot ring peak +{peak / 1024:.1f} KiB < one {N * 8 // 1024} KiB buffer "
+              f"(np.array path +{legacy_peak / 1024:.0f} KiB)")
+        return True
+    print(f"[FAIL] slot ring peak {peak} B, retained {retained} B, copied {copied}")
+    return False
+
+
+if __name__ == "__main__":
+    ok = test_independent_consumers()
+    ok &= test_shared_read_only()
+    ok &= test_slots_never_overwritten_while_held()
+    ok &= test_no_steady_state_allocation()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,191 @@
+
+import sys
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_processor import SignalProcessor, pool_spectrum
+
+FS = 2_000_000
+N = 16384  # RX 缓冲区长度
+rng = np.random.default_rng(1)
+
+
+def legacy_spectrum(samples, fft_size=1024, sample_rate=FS, center_freq=0.0):
+    """旧实现: 只用最后 fft_size 个样本，输出全长列表"""
+    samples = samples[-fft_size:] / 2048.0
+    win = np.hanning(fft_size)
+    fft_result = np.fft.fftshift(np.fft.fft(samples * win) / np.sum(win))
+    power_db = 10 * np.log10(np.abs(fft_result) ** 2 + 1e-20)
+    freqs = np.fft.fftshift(np.fft.fftfreq(fft_size, 1.0 / sample_rate)) + center_freq
+    return freqs.tolist(), power_db.tolist()
+
+
+def tone(freq, n=N, amplitude=2048.0):
+    return (amplitude * np.exp(2j * np.pi * freq * np.arange(n) / FS)).astype(np.complex64)
+
+
+def noise(n=N, level=20.0):
+    return (level * (rng.standard_normal(n) + 1j * rng.standard_normal(n))).astype(np.complex64)
+
+
+def time_call(fn, repeats=2000):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats
+
+
+def test_calibration():
+    print("Testing dBFS calibration...")
+    x = tone(250_000) + noise(level=1.0)
+    freqs, legacy = legacy_spectrum(x, center_freq=433.2e6)
+    single = SignalProcessor(FS, mode='single').compute_spectrum(x, center_freq=433.2e6)
+    welch = SignalProcessor(FS).compute_spectrum(x, center_freq=433.2e6)
+    legacy = np.array(legacy)
+    err = np.max(np.abs(single.power - legacy)[legacy > -100])
+    peak_bin = int(np.argmax(welch.power))
+    if err < 0.05 and np.allclose(single.freqs, freqs) and abs(welch.power.max()) < 0.05 \
+            and welch.freqs[peak_bin] == 433.45e6:
+        print(f"[PASS] single mode matches legacy (max diff {err:.1e} dB), "
+              f"0 dBFS tone reads {welch.power.max():+.3f} dB at {welch.freqs[peak_bin] / 1e6:.2f} MHz "
+              f"in {welch.segments} Welch segments")
+        return True
+    print(f"[FAIL] legacy diff {err:.2e} dB, welch peak {welch.power.max():.3f} dB at bin {peak_bin}")
+    return False
+
+
+def test_variance_and_burst():
+    print("Testing noise variance and short bursts...")
+    ok = True
+    floor = noise()
+    single = SignalProcessor(FS, mode='single').compute_spectrum(floor)
+    welch = SignalProcessor(FS).compute_spectrum(floor)
+    welch50 = SignalProcessor(FS, overlap=0.5).compute_spectrum(floor)
+    spread = [np.std(s.power) for s in (single, welch, welch50)]
+    if spread[1] < spread[0] / 3 and spread[2] < spread[1]:
+        print(f"[PASS] noise floor spread {spread[0]:.2f} dB (single) -> {spread[1]:.2f} dB "
+              f"({welch.segments} segments) / {spread[2]:.2f} dB ({welch50.segments} segments, 50% overlap)")
+    else:
+        print(f"[FAIL] noise floor spread {spread}")
+        ok = False
+
+    # 缓冲区开头 1024 个样本的突发 (如一帧)，single 模式只看最后 1024 个样本
+    burst = floor.copy()
+    burst[:1024] += tone(-300_000, 1024, amplitude=200.0)
+    results = {}
+    for mode in ('single', 'welch'):
+        spectrum = SignalProcessor(FS, mode=mode).compute_spectrum(burst)
+        k = int(np.argmin(np.abs(spectrum.freqs + 300_000)))
+        results[mode] = spectrum.power[k] - np.median(spectrum.power)
+    if results['welch'] > 10 and results['single'] < 6:
+        print(f"[PASS] 0.5 ms burst at buffer start: +{results['welch']:.1f} dB over floor (welch), "
+              f"{results['single']:+.1f} dB (single)")
+    else:
+        print(f"[FAIL] burst visibility {results}")
+        ok = False
+    return ok
+
+
+def test_averaging():
+    print("Testing exponential averaging and peak hold...")
+    processor = SignalProcessor(FS, avg_alpha=0.25, peak_hold=True)
+    k = None
+    levels = []
+    for i in range(20):
+        x = noise() + (tone(500_000, amplitude=1000.0) if i == 0 else 0)
+        spectrum = processor.compute_spectrum(x)
+        if k is None:
+            k = int(np.argmax(spectrum.power))
+        levels.append(spectrum.power[k])
+    held = spectrum.peak[k] - np.median(spectrum.power)
+    # 单次出现的音调按 (1 - alpha)^n 衰减
+    decayed = levels[-1] - levels[0]
+    expected = 10 * np.log10(0.75 ** 19)
+    decreasing = all(b <= a for a, b in zip(levels, levels[1:]))
+    processor.reset()
+    fresh = processor.compute_spectrum(noise())
+    if held > 30 and abs(decayed - expected) < 0.5 and decreasing \
+            and fresh.peak[k] - np.median(fresh.power) < 10:
+        print(f"[PASS] one-buffer tone held at +{held:.1f} dB, average decays {decayed:.1f} dB "
+              f"after 19 buffers (expected {expected:.1f}), reset clears peak")
+        return True
+    print(f"[FAIL] held {held:.1f} dB, decayed {decayed:.1f} dB, decreasing {decreasing}")
+    return False
+
+
+def test_pooling():
+    print("Testing max/mean pooling to a client bin count...")
+    ok = True
+    # 窄带载波落在 [::10] 保留点之间 (第 515 个频点)
+    f_tone = (515 - 512) * FS / 1024
+    x = noise() + tone(f_tone, amplitude=200.0)
+    spectrum = SignalProcessor(FS).compute_spectrum(x)
+    tone_db = spectrum.power.max()
+    thinned = spectrum.power[::10].max()
+    pooled = pool_spectrum(spectrum, 103, 'max')
+    if abs(pooled.power.max() - tone_db) < 1e-6 and thinned < tone_db - 20:
+        print(f"[PASS] narrowband carrier {tone_db:.1f} dB: max pooling keeps it, "
+              f"[::10] thinning shows {thinned:.1f} dB")
+    else:
+        print(f"[FAIL] tone {tone_db:.1f} dB, pooled {pooled.power.max():.1f} dB, thinned {thinned:.1f} dB")
+        ok = False
+
+    # reduceat 与逐组循环一致 (1024 -> 300，组长 3 或 4)
+    bins = 300
+    edges = np.linspace(0, 1024, bins + 1).round().astype(int)
+    groups = [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+    ref_max = np.array([spectrum.power[g].max() for g in groups])
+    ref_mean = np.array([10 * np.log10(np.mean(10 ** (spectrum.power[g] / 10))) for g in groups])
+    ref_freq = np.array([spectrum.freqs[g].mean() for g in groups])
+    mean = pool_spectrum(spectrum, bins, 'mean')
+    maxed = pool_spectrum(spectrum, bins, 'max')
+    err = max(np.max(np.abs(maxed.power - ref_max)), np.max(np.abs(mean.power - ref_mean)),
+              np.max(np.abs(mean.freqs - ref_freq)))
+    floor = np.median(spectrum.power)
+    if err < 1e-3 and len(mean.power) == bins and abs(np.median(mean.power) - floor) < 3:
+        print(f"[PASS] 1024 -> {bins} bins matches per-group loop (max err {err:.1e}), "
+              f"mean floor {np.median(mean.power):.1f} dB vs per-bin median {floor:.1f} dB")
+    else:
+        print(f"[FAIL] pooling error {err:.2e}, mean floor {np.median(mean.power):.1f} dB")
+        ok = False
+
+    t = time_call(lambda: pool_spectrum(spectrum, 400, 'max'))
+    t_mean = time_call(lambda: pool_spectrum(spectrum, 400, 'mean'))
+    print(f"  pooling 1024 -> 400: max {t * 1e6:.1f} us, mean {t_mean * 1e6:.1f} us per subscription")
+    return ok
+
+
+def test_cpu():
+    print("Testing per-buffer CPU (spectrum + 1/10 output points, as in the RX callback)...")
+    x = noise() + tone(100_000)
+    t_legacy = time_call(lambda: [v[::10] for v in legacy_spectrum(x, center_freq=433.2e6)])
+    ok = True
+    for label, processor in (("welch default", SignalProcessor(FS)),
+                             ("welch 50% overlap", SignalProcessor(FS, overlap=0.5)),
+                             ("single", SignalProcessor(FS, mode='single'))):
+        def run():
+            s = processor.compute_spectrum(x, center_freq=433.2e6)
+            s = pool_spectrum(s, processor.fft_size // 10, 'max')
+            return s.freqs.tolist(), s.power.tolist()
+        t = time_call(run)
+        print(f"  {label:18s} {t * 1e6:6.1f} us (legacy single FFT {t_legacy * 1e6:.1f} us)")
+        if label == "welch default":
+            if t <= t_legacy:
+                print(f"[PASS] default Welch over all {N} samples costs {t / t_legacy:.2f}x the legacy path")
+            else:
+                print(f"[FAIL] default Welch {t * 1e6:.1f} us > legacy {t_legacy * 1e6:.1f} us")
+                ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    ok = test_calibration()
+    ok &= test_variance_and_burst()
+    ok &= test_averaging()
+    ok &= test_pooling()
+    ok &= test_cpu()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,113 @@
+
+import sys
+import json
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_processor import SignalProcessor
+from sdr.spectrum_codec import (SpectrumEncoder, decode_frame, QUANTIZATION, KIND_AXIS, KIND_POWER,
+                                FLAG_OVERFLOW, FLAG_PEAK)
+
+FS = 2_000_000
+N = 16384
+RATE = FS / N  # 每个 RX 缓冲区一次频谱更新
+rng = np.random.default_rng(3)
+
+
+def rx_buffer():
+    x = 20.0 * (rng.standard_normal(N) + 1j * rng.standard_normal(N))
+    x += 1000.0 * np.exp(2j * np.pi * 250_000 * np.arange(N) / FS)
+    return x.astype(np.complex64)
+
+
+def json_message(device_id, spectrum, decimation=10):
+    """JSON 路径 (与 main.publish_spectrum 相同)"""
+    return json.dumps({
+        "type": "spectrum",
+        "device_id": device_id,
+        "frequencies": spectrum.freqs[::decimation].tolist(),
+        "power": spectrum.power[::decimation].tolist(),
+        "overflow": False,
+        "underflow": False,
+    })
+
+
+def time_call(fn, repeats=2000):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats
+
+
+def test_roundtrip():
+    print("Testing binary frame round trip...")
+    processor = SignalProcessor(FS, peak_hold=True)
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    freqs, power, peak = spectrum.freqs[::10], spectrum.power[::10], spectrum.peak[::10]
+    encoder = SpectrumEncoder()
+    ok = True
+    for dtype, (_, np_type, offset, step) in QUANTIZATION.items():
+        frame = encoder.encode("pluto-1", freqs, power, 433.2e6, dtype, peak, overflow=True)
+        axis = decode_frame(frame.axis)
+        decoded = decode_frame(frame.data)
+        # 量化范围外的值被截断 (uint8 覆盖 -127.5 ~ 0 dBFS)
+        info = np.iinfo(np_type)
+        in_range = (power >= offset + step * info.min) & (power <= offset + step * info.max)
+        err = np.max(np.abs(decoded["power"] - power)[in_range])
+        if axis["kind"] == KIND_AXIS and np.array_equal(axis["frequencies"], freqs) \
+                and decoded["kind"] == KIND_POWER and decoded["axis_id"] == axis["axis_id"] \
+                and decoded["device_id"] == "pluto-1" and decoded["bin_width"] == freqs[1] - freqs[0] \
+                and decoded["flags"] == FLAG_OVERFLOW | FLAG_PEAK and err <= step / 2 + 1e-4 \
+                and np.max(np.abs(decoded["peak"] - peak)[in_range]) <= step / 2 + 1e-4:
+            print(f"[PASS] {dtype}: {len(frame.data)} B frame, axis {len(frame.axis)} B, "
+                  f"max quantization error {err:.4f} dB (step {step} dB)")
+        else:
+            print(f"[FAIL] {dtype}: err {err}, header {decoded}")
+            ok = False
+    return ok
+
+
+def test_axis_changes():
+    print("Testing axis frames only on change...")
+    processor = SignalProcessor(FS)
+    encoder = SpectrumEncoder()
+    axis_ids = []
+    for center in (433.2e6,) * 5 + (432.6e6,) * 3:
+        spectrum = processor.compute_spectrum(rx_buffer(), center_freq=center)
+        axis_ids.append(encoder.encode("pluto-1", spectrum.freqs[::10], spectrum.power[::10], center).axis_id)
+    other = encoder.encode("pluto-2", spectrum.freqs[::10], spectrum.power[::10], 432.6e6).axis_id
+    if len(set(axis_ids[:5])) == 1 and len(set(axis_ids[5:])) == 1 and axis_ids[0] != axis_ids[5] \
+            and other not in axis_ids:
+        print(f"[PASS] axis ids {axis_ids}: new axis only after retune, per-device axes")
+        return True
+    print(f"[FAIL] axis ids {axis_ids}, other device {other}")
+    return False
+
+
+def report_bandwidth():
+    print(f"Per-client cost at {RATE:.0f} spectrum updates/s (one device):")
+    processor = SignalProcessor(FS)
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    encoder = SpectrumEncoder()
+    message = json_message("pluto-1", spectrum)
+    t_json = time_call(lambda: json_message("pluto-1", spectrum))
+    print(f"  json   {len(message):5d} B/update  {len(message) * RATE / 1024:7.1f} KiB/s  "
+          f"encode {t_json * 1e6:6.1f} us")
+    freqs, power = spectrum.freqs[::10], spectrum.power[::10]
+    for dtype in QUANTIZATION:
+        frame = encoder.encode("pluto-1", freqs, power, 433.2e6, dtype)
+        t = time_call(lambda: encoder.encode("pluto-1", freqs, power, 433.2e6, dtype))
+        print(f"  {dtype:6s} {len(frame.data):5d} B/update  {len(frame.data) * RATE / 1024:7.1f} KiB/s  "
+              f"encode {t * 1e6:6.1f} us  ({len(message) / len(frame.data):.1f}x smaller, "
+              f"axis {len(frame.axis)} B once per retune)")
+
+
+if __name__ == "__main__":
+    ok = test_roundtrip()
+    ok &= test_axis_changes()
+    report_bandwidth()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,247 @@
+
+import sys
+import time
+import asyncio
+import threading
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from main import manager, publish_spectrum, spectrum_pump, spectrum_slots, encode_spectrum, SpectrumUpdate
+from sdr.signal_processor import SignalProcessor
+from sdr.spectrum_codec import decode_frame, KIND_POWER
+
+FS = 2_000_000
+N = 16384
+RATE = FS / N  # RX 缓冲区速率
+rng = np.random.default_rng(7)
+
+
+class FakeWebSocket:
+    """记录收到的消息与时间"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append((time.perf_counter(), text))
+
+    async def send_bytes(self, data):
+        self.messages.append((time.perf_counter(), data))
+
+
+def rx_buffer():
+    return (20.0 * (rng.standard_normal(N) + 1j * rng.standard_normal(N))).astype(np.complex64)
+
+
+def rx_thread(device_id, processor, seconds, stop, publish_times, overflow_at=None):
+    """按 RX 缓冲区速率写入频谱槽"""
+    buffers = [rx_buffer() for _ in range(8)]
+    period = 1.0 / RATE
+    t_next = time.perf_counter()
+    i = 0
+    while not stop.is_set() and i < seconds * RATE:
+        spectrum = processor.compute_spectrum(buffers[i % len(buffers)], center_freq=433.2e6)
+        t0 = time.perf_counter()
+        publish_spectrum(device_id, spectrum, 433.2e6, overflow=(i == overflow_at))
+        publish_times.append(time.perf_counter() - t0)
+        i += 1
+        t_next += period
+        time.sleep(max(0.0, t_next - time.perf_counter()))
+
+
+async def run_session(seconds=2.0):
+    spectrum_slots.clear()
+    fast, slow, default = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for ws in (fast, slow, default):
+        await manager.connect(ws)
+    manager.set_spectrum_format(fast, 'binary', 'uint8', bins=512, pooling='max', fps=30)
+    manager.set_spectrum_format(slow, 'binary', 'uint8', bins=512, pooling='max', fps=10)
+    pump = asyncio.create_task(spectrum_pump())
+    stop = threading.Event()
+    publish_times = []
+    # 第 10 个缓冲区置溢出标志: 即使该帧被覆盖，标志也要送到客户端
+    thread = threading.Thread(target=rx_thread, args=("pluto-1", SignalProcessor(FS, peak_hold=True),
+                                                      seconds, stop, publish_times, 10))
+    thread.start()
+    await asyncio.get_running_loop().run_in_executor(None, thread.join)
+    await asyncio.sleep(0.15)
+    pump.cancel()
+    for ws in (fast, slow, default):
+        manager.disconnect(ws)
+    return fast, slow, default, publish_times
+
+
+def power_frames(ws):
+    frames = []
+    for t, message in ws.messages:
+        if isinstance(message, bytes):
+            frame = decode_frame(message)
+            if frame["kind"] == KIND_POWER:
+                frames.append((t, frame))
+    return frames
+
+
+def test_rate_and_coalescing():
+    print("Testing per-client frame rate and latest-wins coalescing...")
+    seconds = 2.0
+    fast, slow, default, publish_times = asyncio.run(run_session(seconds))
+    slot = spectrum_slots["pluto-1"]
+    ok = True
+    produced = slot.seq
+    results = {}
+    for name, ws, fps in (("30 fps", fast, 30), ("10 fps", slow, 10)):
+        frames = power_frames(ws)
+        gaps = np.diff([t for t, _ in frames])
+        results[name] = frames
+        rate = len(frames) / seconds
+        if abs(rate - fps) <= fps * 0.2 and gaps.min() > 0.5 / fps:
+            print(f"[PASS] {name} client: {len(frames)} frames in {seconds:.0f} s of {produced} RX buffers, "
+                  f"min gap {gaps.min() * 1e3:.1f} ms")
+        else:
+            print(f"[FAIL] {name} client: {len(frames)} frames, min gap {gaps.min() * 1e3:.1f} ms")
+            ok = False
+    texts = [m for _, m in default.messages if isinstance(m, str)]
+    if abs(len(texts) / seconds - 30) <= 6:
+        print(f"[PASS] unsubscribed client gets JSON at the 30 fps default ({len(texts)} messages)")
+    else:
+        print(f"[FAIL] default client got {len(texts)} messages")
+        ok = False
+
+    flagged = any(f["flags"] & 1 for _, f in results["30 fps"]) and any(f["flags"] & 1 for _, f in results["10 fps"])
+    if slot.coalesced > produced / 2 and flagged:
+        print(f"[PASS] {slot.coalesced}/{produced} updates coalesced in the slot, "
+              f"one-buffer overflow flag reaches both clients")
+    else:
+        print(f"[FAIL] coalesced {slot.coalesced}/{produced}, overflow delivered {flagged}")
+        ok = False
+    print(f"  RX-thread publish cost: median {np.median(publish_times) * 1e6:.1f} us, "
+          f"max {np.max(publish_times) * 1e6:.1f} us per buffer")
+    return ok
+
+
+def test_skipped_frames_feed_peak_hold():
+    print("Testing that coalesced buffers still feed peak hold...")
+    spectrum_slots.clear()
+    processor = SignalProcessor(FS, peak_hold=True)
+    # 只有中间一个缓冲区有载波，之后的缓冲区覆盖它
+    for i in range(4):
+        x = rx_buffer()
+        if i == 1:
+            x += (1000.0 * np.exp(2j * np.pi * 300_000 * np.arange(N) / FS)).astype(np.complex64)
+        publish_spectrum("pluto-1", processor.compute_spectrum(x, center_freq=433.2e6), 433.2e6)
+    update = spectrum_slots["pluto-1"].latest
+    frame = decode_frame(encode_spectrum("pluto-1", update, ('binary', 'uint8', 512, 'max')).data)
+    k = int(np.argmax(frame["peak"]))
+    held = frame["peak"][k] - np.median(frame["power"])
+    if spectrum_slots["pluto-1"].coalesced == 3 and held > 30 and frame["power"][k] - np.median(frame["power"]) < 10:
+        print(f"[PASS] carrier seen only in an overwritten buffer is held at +{held:.1f} dB in the sent frame")
+        return True
+    print(f"[FAIL] coalesced {spectrum_slots['pluto-1'].coalesced}, held {held:.1f} dB")
+    return False
+
+
+def test_overflow_per_client():
+    print("Testing overflow flags per client...")
+    spectrum_slots.clear()
+    processor = SignalProcessor(FS)
+    key = ('binary', 'uint8', 512, 'max')
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    publish_spectrum("pluto-1", spectrum, 433.2e6)
+    publish_spectrum("pluto-1", spectrum, 433.2e6, overflow=True)   # seq 2，随后被覆盖
+    publish_spectrum("pluto-1", spectrum, 433.2e6)
+    first = spectrum_slots["pluto-1"].latest
+    fast_flags = decode_frame(encode_spectrum("pluto-1", first, key, 0).data)["flags"]
+    publish_spectrum("pluto-1", spectrum, 433.2e6)
+    second = spectrum_slots["pluto-1"].latest
+    # 快客户端已在 seq 3 收到溢出，慢客户端上次停在 seq 1
+    fast_next = decode_frame(encode_spectrum("pluto-1", second, key, 3).data)["flags"]
+    slow = decode_frame(encode_spectrum("pluto-1", second, key, 1).data)["flags"]
+    if fast_flags & 1 and not fast_next & 1 and slow & 1:
+        print("[PASS] overflow in an overwritten buffer is reported once to each client")
+        return True
+    print(f"[FAIL] flags fast {fast_flags}/{fast_next}, slow {slow}")
+    return False
+
+
+class DisconnectingWebSocket(FakeWebSocket):
+    """第一次发送期间让另一个连接断开 (模拟 await 期间的客户端关闭)"""
+
+    def __init__(self, other):
+        super().__init__()
+        self.other = other
+
+    async def send_text(self, text):
+        if self.other is not None:
+            other, self.other = self.other, None
+            await asyncio.sleep(0)
+            manager.disconnect(other)
+        await super().send_text(text)
+
+
+async def run_disconnect_session():
+    spectrum_slots.clear()
+    b = FakeWebSocket()
+    a = DisconnectingWebSocket(b)
+    await manager.connect(a)
+    await manager.connect(b)
+    pump = asyncio.create_task(spectrum_pump())
+    processor = SignalProcessor(FS)
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    for _ in range(10):
+        publish_spectrum("pluto-1", spectrum, 433.2e6)
+        await asyncio.sleep(0.05)
+    error = pump.exception() if pump.done() else None
+    pump.cancel()
+    await asyncio.gather(pump, return_exceptions=True)
+    manager.disconnect(a)
+    return a, b, error
+
+
+def test_disconnect_during_send():
+    print("Testing a client disconnecting while the pump awaits another send...")
+    a, b, error = asyncio.run(run_disconnect_session())
+    if error is None and len(a.messages) >= 5 and b not in manager.spectrum_clients:
+        print(f"[PASS] pump survives the disconnect, remaining client got {len(a.messages)} frames")
+        return True
+    print(f"[FAIL] pump exited with {error!r}, remaining client got {len(a.messages)} frames")
+    return False
+
+
+def report_rx_cost():
+    print("RX-thread cost per buffer (2 binary + 1 JSON subscription, as before vs now):")
+    processor = SignalProcessor(FS)
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    keys = [('binary', 'uint8', 512, 'max'), ('binary', 'uint8', 1024, 'max'), ('json', None, None, 'max')]
+
+    def encode_all():
+        update = SpectrumUpdate(1, spectrum, 433.2e6)
+        for key in keys:
+            encode_spectrum("pluto-1", update, key)
+
+    def time_call(fn, repeats=500):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - t0) / repeats
+
+    t_encode = time_call(encode_all)
+    t_publish = time_call(lambda: publish_spectrum("pluto-1", spectrum, 433.2e6))
+    print(f"  pool + encode every buffer: {t_encode * 1e6:6.1f} us x {RATE:.0f}/s = "
+          f"{t_encode * RATE * 100:.2f}% CPU, plus one run_coroutine_threadsafe per buffer")
+    print(f"  slot write every buffer:    {t_publish * 1e6:6.1f} us x {RATE:.0f}/s = "
+          f"{t_publish * RATE * 100:.3f}% CPU; encoding moves to the loop at <= client fps")
+
+
+if __name__ == "__main__":
+    ok = test_rate_and_coalescing()
+    ok &= test_skipped_frames_feed_peak_hold()
+    ok &= test_overflow_per_client()
+    ok &= test_disconnect_during_send()
+    report_rx_cost()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,114 @@
+
+import sys
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_generator import generate_signal
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from protocol.packet_parser import PacketParser
+from protocol.byte_sync import FourPhaseByteSync
+
+
+def make_capture(signal_type, payload_hex, repeats=6, snr_db=20.0, seed=1234):
+    """生成带噪声的长采集数据 (多个循环缓冲区拼接)"""
+    rng = np.random.default_rng(seed)
+    iq = generate_signal(signal_type, payload=payload_hex, sample_rate=2000000)
+    iq = np.tile(iq, repeats)
+    noise_std = np.sqrt(10 ** (-snr_db / 10) / 2)
+    noise = rng.normal(0, noise_std, len(iq)) + 1j * rng.normal(0, noise_std, len(iq))
+    return (iq + noise).astype(np.complex64)
+
+
+def demod_whole(config, iq):
+    demod = Demodulator(config, streaming=True)
+    symbols, decoded = demod.demodulate(iq)
+    return symbols, decoded
+
+
+def demod_chunked(config, iq, rng, min_chunk=1, max_chunk=20000):
+    demod = Demodulator(config, streaming=True)
+    sym_parts = []
+    byte_parts = []
+    pos = 0
+    while pos < len(iq):
+        n = int(rng.integers(min_chunk, max_chunk))
+        symbols, decoded = demod.demodulate(iq[pos:pos + n])
+        sym_parts.append(symbols)
+        byte_parts.append(decoded)
+        pos += n
+    return np.concatenate(sym_parts), b''.join(byte_parts)
+
+
+def test_streaming(signal_type):
+    print(f"\nTesting streaming demodulator: {signal_type}")
+    config = DemodulatorConfig.from_signal_type(signal_type, sample_rate=2000000)
+    iq = make_capture(signal_type, "ABCD1234")
+    print(f"Capture: {len(iq)} samples")
+
+    ref_symbols, ref_bytes = demod_whole(config, iq)
+    print(f"Whole capture: {len(ref_symbols)} symbols, {len(ref_bytes)} bytes")
+
+    ok = True
+    rng = np.random.default_rng(42)
+    # 随机大小切块 (含极小块) 与典型 RX 缓冲区大小
+    for label, lo, hi in [("random 1..20000", 1, 20000),
+                          ("random 1..64", 1, 64),
+                          ("fixed 16384", 16384, 16385)]:
+        symbols, decoded = demod_chunked(config, iq, rng, lo, hi)
+        if len(symbols) != len(ref_symbols) or not np.array_equal(symbols, ref_symbols):
+            print(f"[FAIL] {label}: symbol stream differs ({len(symbols)} vs {len(ref_symbols)})")
+            ok = False
+        elif decoded != ref_bytes:
+            print(f"[FAIL] {label}: byte stream differs")
+            ok = False
+        else:
+            print(f"[PASS] {label}: identical symbol and byte streams")
+    return ok
+
+
+def count_packets(config, iq, chunk, use_phase_sync):
+    """按固定块大小流式解调并统计解出的数据包数"""
+    demod = Demodulator(config, streaming=True)
+    sync = FourPhaseByteSync()
+    parser = PacketParser()
+    count = 0
+    for pos in range(0, len(iq), chunk):
+        symbols, decoded = demod.demodulate(iq[pos:pos + chunk])
+        if use_phase_sync:
+            count += len(sync.feed_symbols(symbols))
+        else:
+            count += len(parser.feed_bytes(decoded))
+    return count
+
+
+def test_phase_sync(signal_type):
+    print(f"\nTesting four-phase byte sync: {signal_type}")
+    config = DemodulatorConfig.from_signal_type(signal_type, sample_rate=2000000)
+    iq = make_capture(signal_type, "ABCD1234")
+    sps = config.samples_per_symbol
+
+    ok = True
+    yields = set()
+    # 在采集前插入 0..3 个符号的偏移，使帧起点落在 4 种不同的符号相位
+    for shift in range(4):
+        shifted = iq[shift * sps:]
+        phase_sync = count_packets(config, shifted, 16384, True)
+        byte_only = count_packets(config, shifted, 16384, False)
+        yields.add(phase_sync)
+        print(f"  shift {shift} symbols: phase sync {phase_sync} packets, byte-aligned parser {byte_only}")
+        if phase_sync == 0:
+            ok = False
+
+    if ok and len(yields) == 1:
+        print(f"[PASS] packet yield independent of symbol alignment ({yields.pop()} packets)")
+        return True
+    print(f"[FAIL] packet yield depends on alignment: {sorted(yields)}")
+    return False
+
+
+if __name__ == "__main__":
+    results = [test_streaming(t) for t in ('red_broadcast', 'red_jam_2')]
+    results += [test_phase_sync(t) for t in ('red_broadcast', 'red_jam_2')]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,196 @@
+
+import sys
+import socket
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.frame_scheduler import FrameScheduler
+from sdr.telemetry_ingest import TelemetryIngest, pack_positions, POSITION_CMD_ID
+from sdr.tx_engine import TxStreamEngine
+from sdr.sdr_manager import SDRManager, SDRInstance, SDRDeviceInfo
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from protocol.byte_sync import FourPhaseByteSync
+from protocol.packet_parser import PacketParser
+from protocol.decoders import decode_packet
+
+FS = 2_000_000
+BAUD = 250000
+
+
+class FakeTxDevice:
+    """替身驱动: 按 DAC 速率阻塞写入，只记录样本"""
+
+    def __init__(self, sample_rate=FS):
+        self.sample_rate = sample_rate
+        self.blocks = []
+        self._deadline = None
+
+    def write(self, samples):
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += len(samples) / self.sample_rate
+        self.blocks.append(samples.copy())
+        delay = self._deadline - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def positions(k):
+    return [(100 * k + i, 50 * k + i) for i in range(6)]
+
+
+def test_datagram():
+    print("Testing datagram layout and coalescing...")
+    scheduler = FrameScheduler(BAUD)
+    ingest = TelemetryIngest(scheduler, udp_addr=None)
+    ingest.attach(None)
+    ok = True
+
+    bad = [b'XX' + pack_positions(positions(1))[2:], pack_positions(positions(1))[:-2]]
+    accepted = [ingest.handle_datagram(d) for d in bad]
+    # 组帧前连续到达 5 条，只发送最新一条
+    for k in range(5):
+        ingest.handle_datagram(pack_positions(positions(k)))
+    frames = scheduler.build_schedule(1.2)
+    packets = PacketParser().feed_bytes(b''.join(frames))
+    decoded = decode_packet(packets[0]) if packets else None
+    if not any(accepted) and ingest.rejected == 2 and decoded \
+            and (decoded['hero_x'], decoded['sentry_y']) == (400, 205):
+        print("[PASS] malformed datagrams rejected, coordinates land in the 0x0A01 layout")
+    else:
+        print(f"[FAIL] accepted={accepted} decoded={decoded}")
+        ok = False
+
+    stats = ingest.get_stats()
+    keepalive = len(packets) - 1
+    if stats['coalesced'] == 4 and stats['sent'] == 1 and keepalive == 2 \
+            and all(p.cmd_id == POSITION_CMD_ID for p in packets):
+        print(f"[PASS] 5 updates before the frame boundary -> 1 frame (4 coalesced), "
+              f"{keepalive} keepalive repeats at {ingest.keepalive_hz:.0f} Hz")
+    else:
+        print(f"[FAIL] stats={stats} packets={len(packets)}")
+        ok = False
+    return ok
+
+
+def run_stream(block_size, rate_hz=60, duration=1.5):
+    device = FakeTxDevice()
+    engine = TxStreamEngine(device.write, FS, BAUD, block_size)
+    scheduler = FrameScheduler(BAUD)
+    engine.set_frame_source(scheduler.next_frame)
+    # 16384 样本块只用于对比延迟，正常接入会拒绝
+    ingest = TelemetryIngest(scheduler, udp_addr=('127.0.0.1', 0), max_block_size=None)
+    ingest.attach(engine)
+    ingest.start()
+    engine.start()
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    updates = int(duration * rate_hz)
+    t0 = time.perf_counter()
+    for k in range(updates):
+        # 每条在非整块时刻到达
+        while time.perf_counter() < t0 + k / rate_hz:
+            time.sleep(0.0005)
+        sender.sendto(pack_positions(positions(k)), ingest.udp_addr)
+    time.sleep(0.05)
+    engine.stop()
+    stats = ingest.get_stats()
+    ingest.stop()
+    sender.close()
+    return device, engine, stats, updates
+
+
+def test_latency():
+    print("Testing UDP ingest -> air latency at 60 Hz...")
+    ok = True
+    results = {}
+    for block_size in (4096, 16384):
+        device, engine, stats, updates = run_stream(block_size)
+        results[block_size] = stats
+        lat = stats['ingest_to_air']
+        budget = (engine.NUM_BUFFERS + 1) * block_size / FS * 1e3 + 1.0
+        print(f"  block {block_size:5d} ({block_size / FS * 1e3:.1f} ms): received {stats['received']}, "
+              f"sent {stats['sent']}, coalesced {stats['coalesced']}, "
+              f"ingest->air p50 {lat['p50_ms']:.2f} / p90 {lat['p90_ms']:.2f} / p99 {lat['p99_ms']:.2f} ms, "
+              f"ingest->frame p50 {stats['ingest_to_frame']['p50_ms']:.3f} ms")
+        if block_size == 4096:
+            if stats['received'] == updates and lat['p99_ms'] < budget:
+                print(f"[PASS] p99 {lat['p99_ms']:.2f} ms within {budget:.1f} ms "
+                      f"((NUM_BUFFERS + 1) blocks + 1 ms)")
+            else:
+                print(f"[FAIL] p99 {lat['p99_ms']:.2f} ms exceeds {budget:.1f} ms")
+                ok = False
+
+            config = DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS)
+            symbols, _ = Demodulator(config, streaming=True).demodulate(np.concatenate(device.blocks))
+            seen = {bytes(p.payload) for p in FourPhaseByteSync().feed_symbols(symbols)
+                    if p.cmd_id == POSITION_CMD_ID}
+            last = pack_positions(positions(updates - 1))[4:]
+            if last in seen and len(seen) >= stats['sent'] - 1:
+                print(f"[PASS] {len(seen)} distinct coordinate frames decoded, latest update on air")
+            else:
+                print(f"[FAIL] decoded {len(seen)} of {stats['sent']} sent updates")
+                ok = False
+    return ok
+
+
+def make_manager(block_size):
+    manager = SDRManager()
+    engine = TxStreamEngine(lambda s: None, FS, BAUD, block_size)
+    engine.set_payload(b'\x01\x02')
+    manager._devices["fake"] = SDRInstance(device_info=SDRDeviceInfo(id="fake", name="fake", uri="fake"),
+                                           driver=None, tx_engine=engine)
+    return manager, engine
+
+
+def test_manager_guards():
+    print("Testing start_telemetry_ingest guards...")
+    ok = True
+    manager, engine = make_manager(16384)
+    refused = manager.start_telemetry_ingest("fake", port=0)
+    if refused is None and manager.get_tx_stats("fake").get("schedule") is None and engine._source is None:
+        print(f"[PASS] {engine.block_size}-sample TX block refused, single-frame stream left untouched")
+    else:
+        print(f"[FAIL] large block accepted or stream switched: {refused}")
+        ok = False
+
+    manager, engine = make_manager(TelemetryIngest.MAX_BLOCK_SIZE)
+    manager.set_tx_command("fake", POSITION_CMD_ID, "0A0B", 5.0)
+    refused = manager.start_telemetry_ingest("fake", port=0)
+    kept = manager.get_tx_stats("fake")["schedule"]["commands"].get(POSITION_CMD_ID)
+    if refused is None and kept is not None and kept["target_rate"] == 5.0:
+        print("[PASS] ingest refused while 0x0A01 is scheduled by set_tx_command, command kept")
+    else:
+        print(f"[FAIL] ingest {refused}, 0x0A01 after refusal {kept}")
+        ok = False
+
+    # 载荷更新后重新接入，遥测仍能上链路；接入期间不能改写 0x0A01
+    manager.update_tx_payload("fake", "ABCD")
+    started = manager.start_telemetry_ingest("fake", port=0)
+    blocked = manager.set_tx_command("fake", POSITION_CMD_ID, "0A0B", 5.0) \
+        or manager.remove_tx_command("fake", POSITION_CMD_ID)
+    manager._devices["fake"].telemetry_ingest.submit(pack_positions(positions(3))[4:])
+    frames = [engine.produce_block() for _ in range(4)]
+    stats = manager.get_tx_stats("fake")["telemetry"]
+    manager.stop_telemetry_ingest("fake")
+    config = DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS)
+    symbols, _ = Demodulator(config, streaming=True).demodulate(np.concatenate(frames))
+    on_air = [p for p in FourPhaseByteSync().feed_symbols(symbols) if p.cmd_id == POSITION_CMD_ID]
+    if started is not None and not blocked and stats["sent"] == 1 and on_air:
+        print("[PASS] ingest after update_tx_payload reaches the air, 0x0A01 protected while attached")
+    else:
+        print(f"[FAIL] started {started is not None}, blocked {not blocked}, sent {stats['sent']}, "
+              f"decoded {len(on_air)}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    ok = test_datagram()
+    ok &= test_latency()
+    ok &= test_manager_guards()
+    sys.exit(0 if ok else 1)
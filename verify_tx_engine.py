@@ -0,0 +1,168 @@
+
+import sys
+import time
+import struct
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_generator import generate_signal, _construct_frame
+from sdr.tx_engine import StreamingFskModulator, TxStreamEngine
+from sdr.demodulator import Demodulator, DemodulatorConfig
+from protocol.byte_sync import FourPhaseByteSync
+from protocol.symbol_codec import bytes_to_levels
+
+FS = 2_000_000
+BAUD = 250000
+BLOCK = 16384
+
+
+class FakeTxDevice:
+    """替身驱动: 按 DAC 速率阻塞写入，只记录样本，从不重建缓冲区"""
+
+    def __init__(self, sample_rate=FS):
+        self.sample_rate = sample_rate
+        self.blocks = []
+        self.block_lengths = set()
+        self._deadline = None
+
+    def write(self, samples):
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += len(samples) / self.sample_rate
+        self.blocks.append(samples.copy())
+        self.block_lengths.add(len(samples))
+        delay = self._deadline - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def reference_modulation(frames, modulator):
+    """对拼接后的整段字节流一次性调制 (参考实现)"""
+    stream = b''.join(frames)
+    sps = modulator.sps
+    upsampled = np.zeros(len(stream) * 4 * sps)
+    upsampled[::sps] = bytes_to_levels(stream)
+    # 与脉冲表相同的 float32 系数 (已乘灵敏度)，float64 运算
+    taps = modulator.table.poly[::-1].ravel().astype(np.float64)
+    freq = np.convolve(upsampled, taps)[:len(upsampled)]
+    return modulator.amplitude * np.exp(1j * np.cumsum(freq))
+
+
+def position_payload(k):
+    return struct.pack('<12H', *[(100 * k + i) & 0xFFFF for i in range(12)])
+
+
+def test_splice_continuity():
+    print("Testing frame-boundary splicing and phase continuity...")
+    engine = TxStreamEngine(lambda s: None, FS, BAUD, BLOCK)
+    frame_a = _construct_frame(position_payload(1), cmd_id=0x0A01)
+    frame_b = _construct_frame(position_payload(2), cmd_id=0x0A01)
+
+    engine.set_frame(frame_a)
+    blocks = [engine.produce_block() for _ in range(3)]
+    frames_a = engine.frames_sent
+    engine.set_frame(frame_b)
+    blocks += [engine.produce_block() for _ in range(3)]
+    out = np.concatenate(blocks)
+
+    ref = reference_modulation([frame_a] * frames_a + [frame_b] * (engine.frames_sent - frames_a),
+                               StreamingFskModulator(FS, BAUD))
+    # float32 合成的舍入误差随帧累积 (约 2e-5 rad/帧，相当于 mHz 级频偏)
+    err = np.max(np.abs(out - ref[:len(out)]))
+    ok = True
+    if err < 1e-2:
+        print(f"[PASS] streamed blocks match one-shot modulation of the frame sequence (max err {err:.2e})")
+    else:
+        print(f"[FAIL] streamed blocks deviate from reference (max err {err:.2e})")
+        ok = False
+
+    # 切换点的相位跳变应不超过帧内正常调制的最大相位步进，而旧循环缓冲区首尾衔接处会跳变
+    def phase_steps(x):
+        return np.abs(np.angle(x[1:] * np.conj(x[:-1])))
+    splice = frames_a * engine.modulator.frame_samples(frame_a)
+    jump = phase_steps(out[splice - 1:splice + 1])[0]
+    inner = phase_steps(out[:splice]).max()
+    cyclic = generate_signal('red_broadcast', payload=position_payload(1).hex(), sample_rate=FS)
+    wrap = phase_steps(np.array([cyclic[-1], cyclic[0]]))[0]
+    if jump <= inner:
+        print(f"[PASS] phase step at splice {jump:.3f} rad <= in-frame max {inner:.3f} rad "
+              f"(cyclic buffer wrap: {wrap:.3f} rad)")
+    else:
+        print(f"[FAIL] phase discontinuity at splice: {jump:.3f} rad > {inner:.3f} rad")
+        ok = False
+    return ok
+
+
+def test_streaming_updates(duration=1.2, rate_hz=10):
+    print("Testing threaded streaming with 10 Hz payload updates...")
+    device = FakeTxDevice()
+    engine = TxStreamEngine(device.write, FS, BAUD, BLOCK)
+    engine.set_payload(position_payload(0), cmd_id=0x0A01)
+    engine.start()
+    updates = int(duration * rate_hz)
+    for k in range(1, updates):
+        time.sleep(1.0 / rate_hz)
+        engine.set_payload(position_payload(k), cmd_id=0x0A01)
+    time.sleep(1.0 / rate_hz)
+    engine.stop()
+    stats = engine.get_stats()
+
+    ok = True
+    if stats['underruns'] == 0 and device.block_lengths == {BLOCK}:
+        print(f"[PASS] {stats['blocks_written']} blocks, {stats['frames_sent']} frames, "
+              f"0 underruns, max write gap {stats['max_write_gap'] * 1e3:.2f} ms")
+    else:
+        print(f"[FAIL] underruns={stats['underruns']} block sizes={device.block_lengths}")
+        ok = False
+
+    # 解调整段发射流，每个载荷都应出现
+    config = DemodulatorConfig.from_signal_type('red_broadcast', sample_rate=FS)
+    symbols, _ = Demodulator(config, streaming=True).demodulate(np.concatenate(device.blocks))
+    packets = FourPhaseByteSync().feed_symbols(symbols)
+    seen = {bytes(p.payload) for p in packets}
+    decoded = sum(position_payload(k) in seen for k in range(updates))
+    if decoded == updates:
+        print(f"[PASS] all {updates} payload updates decoded from the continuous stream ({len(packets)} packets)")
+    else:
+        print(f"[FAIL] decoded {decoded}/{updates} payload updates")
+        ok = False
+    return ok
+
+
+def test_underrun_per_gap(stall=0.35):
+    print("Testing one underrun per producer stall...")
+    device = FakeTxDevice()
+    frame = _construct_frame(position_payload(0), cmd_id=0x0A01)
+    calls = [0]
+
+    def source():
+        # 第 200 帧时生产端卡住 stall 秒 (跨越多次 0.1 s 空闲轮询)
+        calls[0] += 1
+        if calls[0] == 200:
+            time.sleep(stall)
+        return frame
+
+    flagged = []
+    engine = TxStreamEngine(device.write, FS, BAUD, 4096, on_underrun=lambda: flagged.append(time.perf_counter()))
+    engine.set_frame_source(source)
+    engine.start()
+    time.sleep(stall + 0.3)
+    engine.stop()
+    stats = engine.get_stats()
+    if stats['underruns'] == 1 and len(flagged) == 1 and stats['max_write_gap'] > stall * 0.8:
+        print(f"[PASS] {stall * 1e3:.0f} ms stall -> 1 underrun (write gap {stats['max_write_gap'] * 1e3:.0f} ms), "
+              f"{stats['blocks_written']} blocks")
+        return True
+    print(f"[FAIL] underruns={stats['underruns']} callbacks={len(flagged)} "
+          f"max gap {stats['max_write_gap'] * 1e3:.1f} ms")
+    return False
+
+
+if __name__ == "__main__":
+    ok = test_splice_continuity()
+    ok &= test_streaming_updates()
+    ok &= test_underrun_per_gap()
+    sys.exit(0 if ok else 1)
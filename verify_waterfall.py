@@ -0,0 +1,126 @@
+
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+from sdr.signal_processor import SignalProcessor
+from sdr.waterfall import WaterfallHistory, decode_block
+
+FS = 2_000_000
+N = 16384
+RATE = FS / N  # 每个 RX 缓冲区一行
+rng = np.random.default_rng(5)
+
+
+def rx_buffer(tone_freq=250_000, amplitude=1000.0):
+    x = 20.0 * (rng.standard_normal(N) + 1j * rng.standard_normal(N))
+    if amplitude:
+        x += amplitude * np.exp(2j * np.pi * tone_freq * np.arange(N) / FS)
+    return x.astype(np.complex64)
+
+
+def test_ring_and_roundtrip():
+    print("Testing ring wrap, time-range query and block round trip...")
+    processor = SignalProcessor(FS)
+    history = WaterfallHistory(processor.fft_size, rows=100)
+    spectra = []
+    for i in range(250):
+        center = 433.2e6 if i < 200 else 432.6e6
+        spectrum = processor.compute_spectrum(rx_buffer(), center_freq=center)
+        spectra.append((spectrum.power.copy(), center))
+        history.append(spectrum, center, timestamp=1000.0 + i)
+    ok = True
+
+    timestamps, centers, rows = history.query()
+    if len(history) == 100 and np.array_equal(timestamps, 1000.0 + np.arange(150, 250)):
+        print(f"[PASS] 250 rows into a 100-row ring keeps the newest 100 in time order")
+    else:
+        print(f"[FAIL] {len(history)} rows, timestamps {timestamps[:3]}...{timestamps[-3:]}")
+        ok = False
+
+    block = history.encode_block(1180.0, 1219.0)
+    decoded = decode_block(block)
+    expected = np.array([p for p, _ in spectra[180:220]])
+    in_range = (expected >= -127.5) & (expected <= 0.0)
+    err = np.max(np.abs(decoded["power"] - expected)[in_range])
+    freqs = decoded["center_freqs"][0] + decoded["first_offset"] + np.arange(history.bins) * decoded["bin_width"]
+    if len(decoded["timestamps"]) == 40 and decoded["timestamps"][0] == 1180.0 \
+            and np.array_equal(decoded["center_freqs"], [c for _, c in spectra[180:220]]) \
+            and err <= 0.25 + 1e-4 and np.allclose(freqs, spectrum.freqs - 432.6e6 + 433.2e6):
+        print(f"[PASS] range [1180, 1219] -> 40 rows across a retune, {len(block)} B block, "
+              f"max quantization error {err:.3f} dB")
+    else:
+        print(f"[FAIL] {len(decoded['timestamps'])} rows, err {err:.3f} dB")
+        ok = False
+
+    # 行数上限: 相邻行取最大值合并，单行突发不丢
+    burst = processor.compute_spectrum(rx_buffer(-600_000, 2000.0))
+    k = int(np.argmax(burst.power))
+    history.append(burst, 432.6e6, timestamp=1250.0)
+    for i in range(9):
+        history.append(processor.compute_spectrum(rx_buffer(amplitude=0)), 432.6e6, timestamp=1251.0 + i)
+    _, _, merged = history.query(1241.0, None, max_rows=4)
+    level = -127.5 + 0.5 * merged[:, k].astype(float)
+    if len(merged) == 4 and level.max() > -10:
+        print(f"[PASS] max_rows=4 over 19 rows keeps a one-row burst at {level.max():.1f} dB")
+    else:
+        print(f"[FAIL] merged rows {len(merged)}, burst level {level}")
+        ok = False
+    return ok
+
+
+def test_bounded_and_no_alloc():
+    print("Testing bounded memory and allocation-free writes...")
+    processor = SignalProcessor(FS)
+    history = WaterfallHistory(processor.fft_size)
+    spectrum = processor.compute_spectrum(rx_buffer(), center_freq=433.2e6)
+    size = history.nbytes
+    history.append(spectrum, 433.2e6)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(2 * history.rows):
+        history.append(spectrum, 433.2e6)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for _ in range(history.rows):
+        history.append(spectrum, 433.2e6)
+    t = (time.perf_counter() - t0) / history.rows
+    seconds = history.rows / RATE
+    if history.nbytes == size == history.rows * (history.bins + 16) and peak - base < 1024 \
+            and current - base < 1024:
+        print(f"[PASS] {history.rows} x {history.bins} ring = {size / 2**20:.2f} MiB "
+              f"({seconds:.0f} s at {RATE:.0f} rows/s), {2 * history.rows} writes allocate "
+              f"{peak - base} B peak, {t * 1e6:.1f} us per write")
+        return True
+    print(f"[FAIL] nbytes {history.nbytes} (was {size}), traced peak {peak - base} B, current {current - base} B")
+    return False
+
+
+def report_replay():
+    print("Full-history replay block (one device, noise + tone):")
+    processor = SignalProcessor(FS)
+    history = WaterfallHistory(processor.fft_size)
+    for i in range(history.rows):
+        history.append(processor.compute_spectrum(rx_buffer(), center_freq=433.2e6), 433.2e6,
+                       timestamp=1000.0 + i / RATE)
+    for max_rows in (None, 1024):
+        t0 = time.perf_counter()
+        block = history.encode_block(max_rows=max_rows)
+        t = time.perf_counter() - t0
+        rows = history.rows if max_rows is None else max_rows
+        raw = rows * (history.bins + 16)
+        print(f"  rows {rows:5d}: {len(block) / 1024:7.1f} KiB ({raw / len(block):.1f}x smaller than raw), "
+              f"encode {t * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    ok = test_ring_and_roundtrip()
+    ok &= test_bounded_and_no_alloc()
+    report_replay()
+    sys.exit(0 if ok else 1)
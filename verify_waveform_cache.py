@@ -0,0 +1,152 @@
+
+import sys
+import time
+import numpy as np
+
+# Add backend to path
+sys.path.append('backend')
+
+import sdr.signal_generator as signal_generator
+from sdr.pluto_driver import PlutoConfig
+from sdr.sdr_manager import SDRManager, SDRInstance, SDRDeviceInfo
+from sdr.waveform_cache import WaveformCache, compute_tx_preview
+
+
+class FakeTxDriver:
+    """替身驱动: 只记录发射的样本"""
+
+    def __init__(self):
+        self.config = PlutoConfig()
+        self.transmitted = []
+
+    def set_tx_frequency(self, freq):
+        pass
+
+    def set_tx_gain(self, gain):
+        pass
+
+    def set_tx_rf_bandwidth(self, bandwidth):
+        pass
+
+    def transmit_samples(self, samples):
+        self.transmitted.append(samples)
+
+    def stop_transmission(self):
+        pass
+
+
+def legacy_preview(samples, sample_rate, fft_size=2048):
+    """旧实现: 逐段 Python 循环"""
+    preview_len = min(len(samples), fft_size * 8)
+    preview_samples = samples[:preview_len]
+    num_segments = preview_len // fft_size
+    window = np.hamming(fft_size)
+    window_sum = np.sum(window)
+    avg_power = np.zeros(fft_size)
+    for i in range(num_segments):
+        segment = preview_samples[i * fft_size:(i + 1) * fft_size]
+        magnitude = np.abs(np.fft.fft(segment * window)) / window_sum
+        avg_power += magnitude ** 2
+    avg_power /= num_segments
+    power_db = np.fft.fftshift(10 * np.log10(avg_power + 1e-12))
+    step = max(1, fft_size // 256)
+    return power_db[::step]
+
+
+def make_manager():
+    manager = SDRManager()
+    driver = FakeTxDriver()
+    manager._devices["fake"] = SDRInstance(
+        device_info=SDRDeviceInfo(id="fake", name="fake", uri="fake"), driver=driver)
+    return manager, driver
+
+
+def test_preview():
+    print("Testing vectorized preview spectrum...")
+    samples = signal_generator.generate_signal('red_broadcast', 'ABCD1234', 2_000_000)
+    new = np.array(compute_tx_preview(samples, 2_000_000)["power"])
+    err = np.max(np.abs(new - legacy_preview(samples, 2_000_000)))
+    if err < 1e-3:
+        print(f"[PASS] preview matches per-segment loop (max diff {err:.1e} dB)")
+        return True
+    print(f"[FAIL] preview differs by {err:.3f} dB")
+    return False
+
+
+def test_repeat_start():
+    print("Testing repeated start_tx_signal...")
+    manager, driver = make_manager()
+    ok = True
+
+    # 生成时记录管理器锁是否被占用
+    generate = signal_generator.generate_signal
+    locked_during_generation = []
+
+    def watched_generate(*args, **kwargs):
+        locked_during_generation.append(manager._lock.locked())
+        return generate(*args, **kwargs)
+
+    signal_generator.generate_signal = watched_generate
+    try:
+        t0 = time.perf_counter()
+        success, preview = manager.start_tx_signal("fake", "red_broadcast", "ABCD1234")
+        t_cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        repeats = 50
+        for _ in range(repeats):
+            success2, preview2 = manager.start_tx_signal("fake", "red_broadcast", "ABCD1234")
+        t_warm = (time.perf_counter() - t0) / repeats
+        manager.start_tx_signal("fake", "red_jam_1")
+        manager.start_tx_signal("fake", "red_jam_1")
+    finally:
+        signal_generator.generate_signal = generate
+
+    stats = manager._waveform_cache.get_stats()
+    if success and success2 and len(locked_during_generation) == 2 and stats['hits'] == repeats + 1:
+        print(f"[PASS] {len(driver.transmitted)} starts, 2 generations, {stats['hits']} cache hits "
+              f"(cold {t_cold * 1e3:.2f} ms, warm {t_warm * 1e3:.3f} ms)")
+    else:
+        print(f"[FAIL] generations={len(locked_during_generation)} stats={stats}")
+        ok = False
+
+    if driver.transmitted[0] is driver.transmitted[1] and not driver.transmitted[0].flags.writeable:
+        print("[PASS] repeated start reuses the read-only cached waveform")
+    else:
+        print("[FAIL] cached waveform was not reused")
+        ok = False
+
+    if preview2 == preview and preview['center_freq'] == signal_generator.SIGNAL_SPECS['red_broadcast']['freq']:
+        print("[PASS] cached preview returned with center frequency")
+    else:
+        print("[FAIL] preview mismatch")
+        ok = False
+
+    if not any(locked_during_generation):
+        print("[PASS] manager lock not held while generating waveforms")
+    else:
+        print("[FAIL] waveform generated while holding the manager lock")
+        ok = False
+    return ok
+
+
+def test_budget():
+    print("Testing LRU memory budget...")
+    cache = WaveformCache(max_bytes=3 * 32768 * 8)
+    for i in range(10):
+        cache.put(cache.make_key(2_000_000, 250000, str(i)), np.zeros(32768, dtype=np.complex64), {})
+        cache.get(cache.make_key(2_000_000, 250000, "0"))  # 保持 "0" 最近使用
+    keep = cache.get(cache.make_key(2_000_000, 250000, "0")) is not None
+    stats = cache.get_stats()
+    if stats['bytes'] <= cache.max_bytes and stats['entries'] == 3 and keep and stats['evictions'] == 7:
+        print(f"[PASS] {stats['entries']} entries / {stats['bytes']} bytes within budget, "
+              f"{stats['evictions']} evictions, recently used entry kept")
+        return True
+    print(f"[FAIL] {stats}")
+    return False
+
+
+if __name__ == "__main__":
+    ok = test_preview()
+    ok &= test_repeat_start()
+    ok &= test_budget()
+    sys.exit(0 if ok else 1)